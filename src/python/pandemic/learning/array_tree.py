@@ -0,0 +1,450 @@
+"""
+Search tree stored in growable NumPy arrays instead of one TreeNode with a children dict and a
+PandemicMctsState per node. Nodes are indices into the arrays, edges are action ids of the action
+catalog and states are only kept as snapshots of expanded nodes, which takes about forty bytes for
+every other node. ArraySpMcts, ArrayMcts and ArrayTreeSearch are SpMcts, Mcts and TreeSearch on such a
+tree.
+"""
+
+import math
+import random
+import time
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from pandemic.learning.mcts_state import PandemicMctsState
+from pandemic.learning.rollout import Rollout
+from pandemic.simulation.action_catalog import ACTION_IDS, PASS, action_of
+from pandemic.simulation.model.enums import GameState
+from pandemic.simulation.simulation import UNCACHED_PHASES
+
+NO_NODE = -1
+NO_STEPS = np.iinfo(np.int32).max
+
+# dtype and initial value of the node columns
+_COLUMNS = {
+    "num_visits": (np.uint32, 0),
+    "total_reward": (np.float64, 0),
+    "squared_reward": (np.float64, 0),
+    "max_reward": (np.float32, -np.inf),
+    # fewest steps of the rollouts reaching max_reward
+    "max_steps": (np.int32, NO_STEPS),
+    "parent": (np.int32, NO_NODE),
+    "first_child": (np.int32, NO_NODE),
+    "child_count": (np.uint16, 0),
+    # action id leading from the parent to the node
+    "action": (np.uint16, PASS),
+    "terminal": (np.bool_, False),
+}
+
+
+class ArrayTree:
+    """
+    Nodes with the statistics of TreeNode in one array per column. The children of a node are added at
+    once and take a contiguous range of nodes starting at first_child, arrays grow by doubling.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        if capacity < 1:
+            raise ValueError("capacity must be at least one")
+        self.size = 0
+        self.capacity = capacity
+        for name, (dtype, initial) in _COLUMNS.items():
+            setattr(self, name, np.full(capacity, initial, dtype=dtype))
+        # snapshots of the states of nodes which need them
+        self.states: Dict[int, bytes] = {}
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def nbytes(self) -> int:
+        """memory of the node columns and the stored states"""
+        columns = sum(getattr(self, name).nbytes for name in _COLUMNS)
+        return columns + sum(len(state) for state in self.states.values())
+
+    def add_node(self, parent: int = NO_NODE, action: int = PASS) -> int:
+        node = self._allocate(1)
+        self.parent[node] = parent
+        self.action[node] = action
+        return node
+
+    def add_children(self, node: int, actions: Sequence[int]) -> int:
+        """adds a child for each of the action ids to node and returns the first one"""
+        count = len(actions)
+        if not count:
+            raise ValueError("a node is expanded with at least one child")
+        first = self._allocate(count)
+        children = slice(first, first + count)
+        self.parent[children] = node
+        self.action[children] = actions
+        self.first_child[node] = first
+        self.child_count[node] = count
+        return first
+
+    def children(self, node: int) -> range:
+        first = int(self.first_child[node])
+        return range(first, first + int(self.child_count[node])) if first != NO_NODE else range(0)
+
+    def child(self, node: int, action: int) -> int:
+        children = self.children(node)
+        found = np.flatnonzero(self.action[children.start : children.stop] == action)
+        if not len(found):
+            raise KeyError(action)
+        return children.start + int(found[0])
+
+    def path(self, node: int) -> np.ndarray:
+        """nodes from node up to the root"""
+        path = []
+        parent = self.parent
+        while node != NO_NODE:
+            path.append(node)
+            node = int(parent[node])
+        return np.array(path, dtype=np.int64)
+
+    def backpropagate(self, node: int, reward: float, steps: int):
+        path = self.path(node)
+        self.num_visits[path] += 1
+        self.total_reward[path] += reward
+        self.squared_reward[path] += reward * reward
+        max_reward = self.max_reward[path]
+        better = path[reward > max_reward]
+        self.max_reward[better] = reward
+        self.max_steps[better] = steps
+        equal = path[reward == max_reward]
+        self.max_steps[equal] = np.minimum(self.max_steps[equal], steps)
+
+    def best_child(self, node: int, exploration_value: float, D: float) -> int:
+        """the child with the best value of SpMcts, unvisited children first"""
+        children = self.children(node)
+        rows = slice(children.start, children.stop)
+        visits = self.num_visits[rows].astype(np.float64)
+        unvisited = np.flatnonzero(visits == 0)
+        if len(unvisited):
+            return children.start + int(unvisited[0])
+        mean = self.total_reward[rows] / visits
+        values = (
+            mean
+            + exploration_value * np.sqrt(2 * math.log(self.num_visits[node]) / visits)
+            + np.sqrt((self.squared_reward[rows] - visits * mean * mean + D) / visits)
+        )
+        return children.start + int(np.argmax(values))
+
+    def ucb_child(self, node: int, exploration_value: float) -> int:
+        """the child with the best value of Mcts, unvisited children first"""
+        children = self.children(node)
+        rows = slice(children.start, children.stop)
+        visits = self.num_visits[rows].astype(np.float64)
+        unvisited = np.flatnonzero(visits == 0)
+        if len(unvisited):
+            return children.start + int(unvisited[0])
+        values = self.total_reward[rows] / visits + exploration_value * np.sqrt(
+            2 * math.log(self.num_visits[node]) / visits
+        )
+        return children.start + int(np.argmax(values))
+
+    def max_reward_child(self, node: int, exploration_value: float, D: float) -> int:
+        """the visited child with the best value of TreeSearch, its max reward in place of the mean of SpMcts"""
+        children = self.children(node)
+        rows = slice(children.start, children.stop)
+        visits = self.num_visits[rows].astype(np.float64)
+        visited = visits > 0
+        values = np.full(len(children), -np.inf)
+        mean = self.total_reward[rows][visited] / visits[visited]
+        values[visited] = (
+            self.max_reward[rows][visited]
+            + exploration_value * np.sqrt(2 * math.log(self.num_visits[node]) / visits[visited])
+            + np.sqrt((self.squared_reward[rows][visited] - visits[visited] * mean * mean + D) / visits[visited])
+        )
+        return children.start + int(np.argmax(values))
+
+    def mean_child(self, node: int) -> int:
+        """the visited child with the best average reward"""
+        children = self.children(node)
+        rows = slice(children.start, children.stop)
+        visits = self.num_visits[rows]
+        means = np.full(len(children), -np.inf)
+        np.divide(self.total_reward[rows], visits, out=means, where=visits > 0)
+        return children.start + int(np.argmax(means))
+
+    def most_rewarding_child(self, node: int) -> int:
+        children = self.children(node)
+        return children.start + int(np.argmax(self.max_reward[children.start : children.stop]))
+
+    def _allocate(self, count: int) -> int:
+        first = self.size
+        if first + count > self.capacity:
+            capacity = max(2 * self.capacity, first + count)
+            for name, (dtype, initial) in _COLUMNS.items():
+                column = np.full(capacity, initial, dtype=dtype)
+                column[:first] = getattr(self, name)[:first]
+                setattr(self, name, column)
+            self.capacity = capacity
+        self.size += count
+        return first
+
+
+class _ArraySearch:
+    """
+    Search on an ArrayTree for PandemicMctsStates. Expanding a node adds all its children at once, the
+    state of a node without a snapshot is made by stepping from its closest ancestor with one. Actions
+    are action ids of the action catalog, PASS for waiting.
+    """
+
+    def __init__(self, initial_state: PandemicMctsState, capacity: int, seed):
+        self.env = initial_state.env
+        self.action_filter = initial_state.action_filter
+        self.reward_function = initial_state.reward_function
+        # nodes are stepped into with random seeded by seed and the node
+        self.seed = random.Random(seed).getrandbits(64)
+        self.tree = ArrayTree(capacity)
+        self.root = self.tree.add_node()
+        self.tree.states[self.root] = initial_state.state
+        self.tree.terminal[self.root] = initial_state.is_terminal()
+
+    def play(self, node: int) -> Tuple[float, int]:
+        """rollout from node, backpropagated to the root"""
+        self.enter(node)
+        reward, steps = self.rollout.play_on(self.env, self.action_filter, self.reward_function)
+        self.tree.backpropagate(node, reward, steps)
+        return reward, steps
+
+    def choose_child(self, node: int) -> int:
+        raise NotImplementedError
+
+    def descend(self, node: int) -> int:
+        tree = self.tree
+        while not tree.terminal[node]:
+            if not tree.child_count[node]:
+                return self.expand(node)
+            node = self.choose_child(node)
+            if not tree.num_visits[node]:
+                return node
+        return node
+
+    def expand(self, node: int) -> int:
+        """adds the children of node and returns the first one, or node if it turns out to be terminal"""
+        tree = self.tree
+        self.enter(node)
+        if tree.terminal[node]:
+            return node
+        tree.states[node] = self.env.state.snapshot()
+        return self.add_children(node)
+
+    def add_children(self, node: int) -> int:
+        """adds the children of node, which the simulation is in the state of"""
+        actions = self.env.get_possible_actions()
+        if actions:
+            actions = [action for action in actions if self.action_filter(action)] or actions
+        return self.tree.add_children(node, [ACTION_IDS[action] for action in actions] if actions else [PASS])
+
+    def enter(self, node: int):
+        """puts the simulation into the state of node"""
+        tree = self.tree
+        states = tree.states
+        path = []
+        while node not in states:
+            path.append(node)
+            node = int(tree.parent[node])
+        self.env.state.restore(states[node])
+        for node in reversed(path):
+            self.step_into(node)
+
+    def step_into(self, node: int):
+        """
+        steps the simulation from the state of the parent of node into the one of node. Snapshots do not
+        hold the random state of the simulation, so the step is seeded by node, which makes epidemics and
+        other shuffles lead to the same state on every visit. The random state is restored afterwards and
+        rollouts stay random.
+        """
+        game = self.env.state
+        if game.phase in UNCACHED_PHASES:
+            # as when the action was chosen, generating actions sets up choosing cards
+            self.env.get_possible_actions()
+        outer = game.random.getstate()
+        game.random.seed(self.seed + node)
+        self.env.step(action_of(int(self.tree.action[node])))
+        game.random.setstate(outer)
+        self.tree.terminal[node] = game.game_state != GameState.RUNNING
+
+
+class ArraySpMcts(_ArraySearch):
+    """SpMcts on an ArrayTree, see _ArraySearch"""
+
+    def __init__(
+        self,
+        initial_state: PandemicMctsState,
+        time_limit=None,
+        exploration_constant=1 / math.sqrt(2),
+        rollout_policy: Optional[Rollout] = None,
+        D=0.1,
+        select_treshold=10,
+        capacity: int = 1 << 16,
+        seed: Optional[int] = None,
+    ):
+        super().__init__(initial_state, capacity, seed)
+        self.search_limit = time_limit
+        self.exploration_constant = exploration_constant
+        self.rollout = rollout_policy if rollout_policy is not None else Rollout()
+        self.D = D
+        self.select_treshold = select_treshold
+        self.max_reward = float("-inf")
+        self.max_steps = 0
+
+    def search(self) -> int:
+        time_limit = time.time() + self.search_limit / 1000
+        while time.time() < time_limit:
+            self.execute_round()
+        return int(self.tree.action[self.tree.most_rewarding_child(self.root)])
+
+    def execute_round(self):
+        reward, steps = self.play(self.select_node(self.root))
+        self.max_reward = max(self.max_reward, reward)
+        self.max_steps = max(self.max_steps, steps)
+
+    def get_next_action(self, action: int) -> int:
+        tree = self.tree
+        self.root = tree.child(self.root, action)
+        return int(tree.action[tree.most_rewarding_child(self.root)])
+
+    def select_node(self, node: int) -> int:
+        if self.tree.num_visits[node] < self.select_treshold:
+            return node
+        return self.descend(node)
+
+    def choose_child(self, node: int) -> int:
+        return self.tree.best_child(node, self.exploration_constant, self.D)
+
+
+class ArrayMcts(_ArraySearch):
+    """
+    Mcts on an ArrayTree, see _ArraySearch. The tree is made for the initial_state, so unlike Mcts a
+    search continues it, and search returns the action id of the child with the best average reward.
+    """
+
+    def __init__(
+        self,
+        initial_state: PandemicMctsState,
+        time_limit=None,
+        iteration_limit=None,
+        exploration_constant=1 / math.sqrt(2),
+        rollout_policy: Optional[Rollout] = None,
+        capacity: int = 1 << 16,
+        seed: Optional[int] = None,
+    ):
+        if (time_limit is None) == (iteration_limit is None):
+            raise ValueError("Must have either a time limit or an iteration limit")
+        if iteration_limit is not None and iteration_limit < 1:
+            raise ValueError("Iteration limit must be greater than one")
+        super().__init__(initial_state, capacity, seed)
+        self.time_limit = time_limit
+        self.iteration_limit = iteration_limit
+        self.exploration_constant = exploration_constant
+        self.rollout = rollout_policy if rollout_policy is not None else Rollout()
+
+    def search(self) -> int:
+        if self.time_limit is not None:
+            time_limit = time.time() + self.time_limit / 1000
+            while time.time() < time_limit:
+                self.execute_round()
+        else:
+            for _ in range(self.iteration_limit):
+                self.execute_round()
+        return int(self.tree.action[self.tree.mean_child(self.root)])
+
+    def execute_round(self):
+        self.play(self.descend(self.root))
+
+    def choose_child(self, node: int) -> int:
+        return self.tree.ucb_child(node, self.exploration_constant)
+
+
+class ArrayTreeSearch(_ArraySearch):
+    """
+    TreeSearch on an ArrayTree, see _ArraySearch. Every walk goes from current_node down to a final
+    state, to random children or, in explored nodes visited more than select_threshold times, to the
+    best one by max reward. All nodes of a walk stay in the tree, only the ones current_node moves to
+    keep their snapshot. current_node moves on to its best child once it has been visited more than
+    select_threshold times, and back to the root from a final state.
+    """
+
+    def __init__(
+        self,
+        initial_state: PandemicMctsState,
+        time_limit=None,
+        exploration_constant=1 / math.sqrt(2),
+        D=0.1,
+        select_threshold=1000,
+        capacity: int = 1 << 16,
+        seed: Optional[int] = None,
+    ):
+        super().__init__(initial_state, capacity, seed)
+        self.time_limit = time_limit
+        self.exploration_constant = exploration_constant
+        self.D = D
+        self.select_threshold = select_threshold
+        self.random = random.Random(self.seed)
+        self.current_node = self.root
+        self.max_reward = -100
+        self.max_depth = 0
+        self.discovered_nodes = 0
+        self.visited_nodes = 0
+        self.discovered_final_states = 0
+
+    def search(self) -> int:
+        """walks for time_limit and returns the action id of the most rewarding child of the root"""
+        time_limit = time.time() + self.time_limit / 1000
+        while time.time() < time_limit:
+            self.walk()
+        return int(self.tree.action[self.tree.most_rewarding_child(self.root)])
+
+    def walk(self) -> float:
+        tree = self.tree
+        node = self.current_node
+        reward = self.walk_from(node)
+        if tree.num_visits[node] > self.select_threshold:
+            if tree.terminal[node]:
+                self.current_node = self.root
+            else:
+                self.current_node = tree.max_reward_child(node, self.exploration_constant, self.D)
+                self.enter(self.current_node)
+                tree.states[self.current_node] = self.env.state.snapshot()
+        return reward
+
+    def walk_from(self, node: int) -> float:
+        """one walk from node to a final state, whose reward is returned"""
+        tree = self.tree
+        self.enter(node)
+        walk_reward = float("-inf")
+        while not tree.terminal[node]:
+            explored = False
+            if not tree.child_count[node]:
+                self.add_children(node)
+                self.discovered_nodes += int(tree.child_count[node])
+                # rewards reached on the way count, sooner is better
+                internal_state = self.env.state.internal_state
+                reward = self.reward_function(internal_state)
+                if reward and reward != walk_reward:
+                    walk_reward = reward
+                    reward = reward + 1 / internal_state.steps
+                    self.max_reward = max(self.max_reward, reward)
+                    tree.backpropagate(node, reward, internal_state.steps)
+            else:
+                children = tree.children(node)
+                explored = bool(tree.num_visits[children.start : children.stop].all())
+            if explored and tree.num_visits[node] > self.select_threshold:
+                child = tree.max_reward_child(node, self.exploration_constant, self.D)
+            else:
+                child = int(tree.first_child[node]) + self.random.randrange(int(tree.child_count[node]))
+                self.visited_nodes += not explored
+            self.step_into(child)
+            node = child
+
+        self.discovered_final_states += 1
+        internal_state = self.env.state.internal_state
+        reward = self.reward_function(internal_state)
+        self.max_reward = max(self.max_reward, reward)
+        tree.backpropagate(node, reward, internal_state.steps)
+        self.max_depth = max(self.max_depth, internal_state.steps)
+        return reward
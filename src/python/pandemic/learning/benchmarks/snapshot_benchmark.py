@@ -0,0 +1,62 @@
+import pickle
+import timeit
+from copy import deepcopy
+
+from pandemic.learning.mcts_state import PandemicMctsState
+from pandemic.simulation.model.enums import Character
+from pandemic.simulation.simulation import Simulation
+
+NUMBER = 2000
+
+
+def create_simulation(compact_state: bool) -> Simulation:
+    simulation = Simulation(
+        characters={Character.RESEARCHER, Character.CONTINGENCY_PLANNER},
+        player_deck_shuffle_seed=5,
+        infect_deck_shuffle_seed=10,
+        epidemic_shuffle_seed=12,
+        compact_state=compact_state,
+    )
+    # play a few steps to get a mid game state
+    for _ in range(40):
+        actions = simulation.get_possible_actions()
+        simulation.step(actions[0] if actions else None)
+    return simulation
+
+
+def report(name: str, copy, restore):
+    copy_time = timeit.timeit(copy, number=NUMBER) / NUMBER * 1e6
+    blob = copy()
+    restore_time = timeit.timeit(lambda: restore(blob), number=NUMBER) / NUMBER * 1e6
+    print(f"{name:<28} copy {copy_time:8.2f}us  restore {restore_time:8.2f}us")
+
+
+state = create_simulation(compact_state=False).state
+compact_state = create_simulation(compact_state=True).state
+
+
+def set_internal_state(value):
+    state.internal_state = value
+
+
+report(
+    "pickle InternalState",
+    lambda: pickle.dumps(state.internal_state),
+    lambda blob: set_internal_state(pickle.loads(blob)),
+)
+report(
+    "deepcopy InternalState", lambda: deepcopy(state.internal_state), lambda blob: set_internal_state(deepcopy(blob))
+)
+report("snapshot InternalState", state.snapshot, state.restore)
+report("snapshot CompactState", compact_state.snapshot, compact_state.restore)
+print("pickled InternalState bytes:", len(pickle.dumps(state.internal_state)))
+print("snapshot bytes:", len(compact_state.snapshot()))
+
+# what a tree search pays per node on either backend, restore, step and snapshot
+for name, simulation in (
+    ("InternalState", create_simulation(compact_state=False)),
+    ("CompactState", create_simulation(compact_state=True)),
+):
+    mcts_state = PandemicMctsState(simulation, simulation.state.snapshot())
+    take_action_time = timeit.timeit(lambda: mcts_state.take_action(0), number=NUMBER) / NUMBER * 1e6
+    print(f"{'take_action ' + name:<28} {take_action_time:8.2f}us")
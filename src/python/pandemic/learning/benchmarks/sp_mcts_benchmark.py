@@ -2,6 +2,7 @@ from pandemic.learning.mcts import Mcts
 from pandemic.learning.mcts_state import PandemicMctsState
 from pandemic.learning.sp_mcts import SpMcts
 from pandemic.simulation.model.actions import DriveFerry, DiscoverCure, ChooseCard
+from pandemic.simulation.compact_state import snapshot
 from pandemic.simulation.model.enums import Character
 from pandemic.simulation.simulation import Simulation
 from pandemic.learning.easy_mode import easy_state
@@ -11,15 +12,16 @@ env = Simulation(
     player_deck_shuffle_seed=5,
     infect_deck_shuffle_seed=10,
     epidemic_shuffle_seed=12,
+    compact_state=True,
 )
 
 action_filter = (
     lambda action: isinstance(action, DriveFerry) or isinstance(action, DiscoverCure) or isinstance(action, ChooseCard)
 )
 
-env.state.internal_state = easy_state
+env.state.restore(snapshot(easy_state))
 print(easy_state.active_player)
-initial_state = PandemicMctsState(env, easy_state)
+initial_state = PandemicMctsState(env, env.state.snapshot())
 mcts = SpMcts(initial_state, time_limit=30000, exploration_constant=0.06, D=0.1, select_treshold=100)
 next_state = initial_state
 # viz = Visualization(env.state.internal_state)
@@ -5,6 +5,7 @@ import pstats
 from pandemic.learning.easy_mode import easy_state
 from pandemic.learning.mcts_state import PandemicMctsState, PandemicTreeSearchState
 from pandemic.learning.tree_search import TreeSearch
+from pandemic.simulation.compact_state import snapshot
 from pandemic.simulation.model.enums import Character
 from pandemic.simulation.simulation import Simulation
 
@@ -14,10 +15,11 @@ env = Simulation(
     player_deck_shuffle_seed=5,
     infect_deck_shuffle_seed=10,
     epidemic_shuffle_seed=12,
+    compact_state=True,
 )
 
-env.state.internal_state = easy_state
-initial_state = PandemicTreeSearchState(env, env.state.internal_state)
+env.state.restore(snapshot(easy_state))
+initial_state = PandemicTreeSearchState(env, env.state.snapshot())
 tree_search = TreeSearch(time_limit=5 * 60 * 1000, report_steps=100, exploration_constant=0.7, D=10)
 
 pr = cProfile.Profile()
@@ -0,0 +1,17 @@
+import time
+
+from pandemic.simulation.model.enums import GameState
+from pandemic.simulation.vectorized import VectorizedSimulation
+
+NUM_GAMES = 4096
+
+simulation = VectorizedSimulation(NUM_GAMES, player_count=2, seed=1)
+start = time.time()
+calls = 0
+while (simulation.game_state == GameState.RUNNING).any():
+    simulation.step(simulation.sample_random_actions())
+    calls += 1
+duration = time.time() - start
+print(
+    f"{NUM_GAMES} random games in {duration:.2f}s ({calls} batched steps, {simulation.steps.sum() / duration:.0f} steps/s)"
+)
@@ -0,0 +1,221 @@
+"""
+Replay memory on local disk: transitions are appended to fixed size chunk files which are memory
+mapped, so only the pages touched by sampling are read into memory. Once capacity is exceeded the
+oldest chunk file is deleted as a whole. A directory of chunks can be reopened after a restart and
+appending continues in its newest chunk.
+"""
+
+import os
+import struct
+from typing import List, Tuple
+
+import numpy as np
+
+from pandemic.learning.transition import TransitionBatch
+
+REPLAY_MAGIC = b"PNDR"
+REPLAY_FORMAT_VERSION = 1
+# magic, format version, observation size, chunk size and number of stored transitions
+REPLAY_HEADER = struct.Struct("<4sHIQQ")
+REPLAY_HEADER_SIZE = 64
+CHUNK_SUFFIX = ".chunk"
+
+
+def _header(observation_size: int, chunk_size: int, count: int) -> bytes:
+    header = REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_FORMAT_VERSION, observation_size, chunk_size, count)
+    return header.ljust(REPLAY_HEADER_SIZE, b"\0")
+
+
+class _Chunk:
+    """
+    one chunk file: the header followed by the columns actions, states, next states, rewards and dones,
+    the columns with the widest items first to keep them aligned
+    """
+
+    def __init__(self, path: str, observation_size: int, chunk_size: int, count: int, mode: str):
+        self.path = path
+        self.observation_size = observation_size
+        self.chunk_size = chunk_size
+        self.count = count
+        raw = np.memmap(path, dtype=np.uint8, mode=mode)
+        self._raw = raw
+
+        def column(start: int, dtype, shape) -> Tuple[np.ndarray, int]:
+            end = start + int(np.prod(shape)) * np.dtype(dtype).itemsize
+            return raw[start:end].view(dtype).reshape(shape), end
+
+        offset = REPLAY_HEADER_SIZE
+        self.actions, offset = column(offset, np.int64, (chunk_size,))
+        self.states, offset = column(offset, np.float32, (chunk_size, observation_size))
+        self.next_states, offset = column(offset, np.float32, (chunk_size, observation_size))
+        self.rewards, offset = column(offset, np.float32, (chunk_size,))
+        self.dones, offset = column(offset, bool, (chunk_size,))
+
+    @staticmethod
+    def file_size(observation_size: int, chunk_size: int) -> int:
+        return REPLAY_HEADER_SIZE + chunk_size * (8 + 2 * 4 * observation_size + 4 + 1)
+
+    @classmethod
+    def create(cls, path: str, observation_size: int, chunk_size: int) -> "_Chunk":
+        with open(path, "wb") as file:
+            file.write(_header(observation_size, chunk_size, 0))
+            file.truncate(cls.file_size(observation_size, chunk_size))
+        return cls(path, observation_size, chunk_size, 0, "r+")
+
+    @classmethod
+    def open(cls, path: str, observation_size: int, chunk_size: int) -> "_Chunk":
+        with open(path, "rb") as file:
+            magic, version, file_observation_size, file_chunk_size, count = REPLAY_HEADER.unpack(
+                file.read(REPLAY_HEADER.size)
+            )
+        if magic != REPLAY_MAGIC:
+            raise ValueError(f"{path} is not a replay chunk")
+        if version != REPLAY_FORMAT_VERSION:
+            raise ValueError(f"unsupported replay chunk version {version}, expected {REPLAY_FORMAT_VERSION}")
+        if (file_observation_size, file_chunk_size) != (observation_size, chunk_size):
+            raise ValueError(
+                f"{path} holds observations of {file_observation_size} in chunks of {file_chunk_size}, "
+                f"expected {observation_size} in chunks of {chunk_size}"
+            )
+        return cls(path, observation_size, chunk_size, count, "r+")
+
+    @property
+    def full(self) -> bool:
+        return self.count == self.chunk_size
+
+    def flush(self):
+        self._raw.flush()
+        with open(self.path, "r+b") as file:
+            file.write(_header(self.observation_size, self.chunk_size, self.count))
+
+    def close(self):
+        self.flush()
+        self.actions = self.states = self.next_states = self.rewards = self.dones = self._raw = None
+
+
+class DiskReplayMemory:
+    """
+    Replay memory of up to capacity transitions in chunk files of chunk_size transitions in directory.
+    Transitions are only durable after flush, which close and every filled chunk do as well.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        observation_size: int,
+        capacity: int,
+        chunk_size: int = 1 << 16,
+        seed=None,
+    ):
+        if chunk_size < 1 or capacity < chunk_size:
+            raise ValueError("capacity must hold at least one chunk of at least one transition")
+        self.directory = directory
+        self.observation_size = observation_size
+        self.chunk_size = chunk_size
+        self.capacity = capacity
+        self.max_chunks = -(-capacity // chunk_size)
+        self.random = np.random.default_rng(seed)
+        os.makedirs(directory, exist_ok=True)
+
+        names = sorted(name for name in os.listdir(directory) if name.endswith(CHUNK_SUFFIX))
+        self._chunks: List[_Chunk] = [
+            _Chunk.open(os.path.join(directory, name), observation_size, chunk_size) for name in names
+        ]
+        self._next_sequence = int(names[-1][: -len(CHUNK_SUFFIX)]) + 1 if names else 0
+        if any(not chunk.full for chunk in self._chunks[:-1]):
+            raise ValueError(f"{directory} has partially filled chunks before its newest one")
+        self._evict(self.max_chunks)
+
+    def __len__(self) -> int:
+        if not self._chunks:
+            return 0
+        return (len(self._chunks) - 1) * self.chunk_size + self._chunks[-1].count
+
+    def push(self, state, action: int, next_state, reward: float, done: bool = False):
+        """Saves a transition."""
+        self.push_batch([state], [action], [next_state], [reward], [done])
+
+    def push_batch(self, states, actions, next_states, rewards, dones=None):
+        states = np.asarray(states, dtype=np.float32)
+        actions = np.asarray(actions)
+        next_states = np.asarray(next_states, dtype=np.float32)
+        rewards = np.asarray(rewards)
+        dones = np.asarray(dones) if dones is not None else np.zeros(len(states), dtype=bool)
+        start = 0
+        while start < len(states):
+            chunk = self._writable_chunk()
+            count = min(len(states) - start, self.chunk_size - chunk.count)
+            rows = slice(chunk.count, chunk.count + count)
+            batch = slice(start, start + count)
+            chunk.states[rows] = states[batch]
+            chunk.actions[rows] = actions[batch]
+            chunk.next_states[rows] = next_states[batch]
+            chunk.rewards[rows] = rewards[batch]
+            chunk.dones[rows] = dones[batch]
+            chunk.count += count
+            if chunk.full:
+                chunk.flush()
+            start += count
+
+    def sample(self, batch_size: int) -> TransitionBatch:
+        """uniform batch over all chunks, indices count from the oldest stored transition"""
+        size = len(self)
+        if size == 0:
+            raise ValueError("can not sample from an empty memory")
+        return self.gather(self.random.integers(0, size, batch_size))
+
+    def gather(self, indices: np.ndarray) -> TransitionBatch:
+        """transitions at indices counted from the oldest stored one, read chunk by chunk"""
+        indices = np.asarray(indices, dtype=np.int64)
+        count = len(indices)
+        states = np.empty((count, self.observation_size), dtype=np.float32)
+        actions = np.empty(count, dtype=np.int64)
+        next_states = np.empty((count, self.observation_size), dtype=np.float32)
+        rewards = np.empty(count, dtype=np.float32)
+        dones = np.empty(count, dtype=bool)
+
+        chunk_of, rows = np.divmod(indices, self.chunk_size)
+        order = np.argsort(chunk_of, kind="stable")
+        for group in np.split(order, np.flatnonzero(np.diff(chunk_of[order])) + 1):
+            if not len(group):
+                continue
+            chunk = self._chunks[chunk_of[group[0]]]
+            chunk_rows = rows[group]
+            states[group] = chunk.states[chunk_rows]
+            actions[group] = chunk.actions[chunk_rows]
+            next_states[group] = chunk.next_states[chunk_rows]
+            rewards[group] = chunk.rewards[chunk_rows]
+            dones[group] = chunk.dones[chunk_rows]
+        return TransitionBatch(states, actions, next_states, rewards, dones, indices, np.ones(count, np.float32))
+
+    def flush(self):
+        if self._chunks:
+            self._chunks[-1].flush()
+
+    def close(self):
+        for chunk in self._chunks:
+            chunk.close()
+        self._chunks = []
+
+    def __enter__(self) -> "DiskReplayMemory":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def _writable_chunk(self) -> _Chunk:
+        if self._chunks and not self._chunks[-1].full:
+            return self._chunks[-1]
+        self._evict(self.max_chunks - 1)
+        path = os.path.join(self.directory, f"{self._next_sequence:012d}{CHUNK_SUFFIX}")
+        self._next_sequence += 1
+        chunk = _Chunk.create(path, self.observation_size, self.chunk_size)
+        self._chunks.append(chunk)
+        return chunk
+
+    def _evict(self, keep: int):
+        """delete the oldest chunks until at most keep are left"""
+        while len(self._chunks) > keep:
+            chunk = self._chunks.pop(0)
+            chunk.close()
+            os.remove(chunk.path)
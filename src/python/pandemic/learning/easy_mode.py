@@ -1,6 +1,7 @@
 from pandemic.simulation.model import constants
 from pandemic.simulation.model.actions import DriveFerry, DiscoverCure, ChooseCard
 from pandemic.simulation.model.city_id import Card
+from pandemic.simulation.model.deck import Deck
 from pandemic.simulation.model.enums import Character, Virus
 from pandemic.simulation.simulation import Simulation
 
@@ -12,7 +13,7 @@ def replace_card(list, x, y):
 def switch_player_card(s, player, x, y):
     s.players[player].remove_card(x)
     s.players[player].add_card(y)
-    s.player_deck = replace_card(s.player_deck, y, x)
+    s.player_deck = Deck(replace_card(s.player_deck, y, x))
 
 
 def swap_elements(list, x, y):
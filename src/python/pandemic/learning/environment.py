@@ -1,11 +1,14 @@
 import math
-from collections import defaultdict
-from copy import deepcopy
-from typing import List, Dict, Tuple, Set
+from collections import defaultdict, deque
+from typing import List, Dict, Optional, Tuple, Set
 
 import gym
 import numpy as np
 
+from pandemic.learning.observation import Observation
+from pandemic.learning.recorder import EpisodeRecorder
+from pandemic.simulation.action_catalog import ACTION_IDS, NUM_ACTION_IDS, PASS, action_of
+from pandemic.simulation.hooks import ACTION
 from pandemic.simulation.model.actions import ACTION_SPACE_DIM
 from pandemic.simulation.model.actions import ActionInterface
 from pandemic.simulation.model.enums import GameState
@@ -21,6 +24,13 @@ class Pandemic(gym.Env):
         player_deck_shuffle_seed=None,
         infect_deck_shuffle_seed=None,
         epidemic_shuffle_seed=None,
+        fast_reset: bool = True,
+        compact_state: bool = True,
+        catalog_actions: bool = False,
+        copy_observations: bool = True,
+        verbose: bool = False,
+        recorder: Optional[EpisodeRecorder] = None,
+        action_history: int = 1000,
     ):
         self._simulation = Simulation(
             num_epidemic_cards,
@@ -29,21 +39,37 @@ class Pandemic(gym.Env):
             player_deck_shuffle_seed,
             infect_deck_shuffle_seed,
             epidemic_shuffle_seed,
+            compact_state=compact_state,
+            fast_reset=fast_reset,
         )
-        self._action_lookup, self.action_space = self._encode_possible_actions(self._simulation.get_possible_actions())
+        if verbose:
+            self._simulation.add_listener(ACTION, print)
+        # without copies every observation and action mask is the same buffer, overwritten by the next step
+        self._copy_observations = copy_observations
+        # actions are action_catalog ids and action_space is the legal action mask over them, built from
+        # the compact state without action objects
+        self._catalog_actions = catalog_actions
+        self._action_lookup: Dict[int, ActionInterface] = {}
+        self._observation = Observation(len(self._simulation.state.players))
+        self._update_actions()
         self.observation_space = self._get_obs()
         self._steps = 0
         self._illegal_actions = 0
-        self.performed_actions_reward = list()
+        # the last action_history actions and rewards for render, full episodes go to the recorder
+        self.performed_actions_reward = deque(maxlen=action_history)
+        self._num_epidemic_cards = num_epidemic_cards
+        self._recorder = recorder
+        # episodes are begun with their first recorded step, so a reset after creating the env records none
+        self._recording = False
 
     def reset(self):
-        # TODO: smarter reset
         self._simulation.reset()
-        self._action_lookup, self.action_space = self._encode_possible_actions(self._simulation.get_possible_actions())
+        self._update_actions()
         self.observation_space = self._get_obs()
         self._steps = 0
         self._illegal_actions = 0
         self.performed_actions_reward.clear()
+        self._recording = False
 
     def render(self, mode="human"):
         [print("%s %s" % (a, r)) for a, r in self.performed_actions_reward]
@@ -54,35 +80,79 @@ class Pandemic(gym.Env):
         pass
 
     def step(self, action: int):
-        action_statement = self._action_lookup.get(action, None)
-        print(action_statement)
-        if action_statement is None:
-            self._illegal_actions += 1
-            return self.observation_space, -1, False, {"steps": self._steps}
-
-        if action == 0:
-            self._simulation.step(None)
+        if self._catalog_actions:
+            if not 0 <= action < NUM_ACTION_IDS or not self.action_space[action]:
+                self._illegal_actions += 1
+                return self.observation_space, -1, False, {"steps": self._steps}
+            action_id = action
+            action_statement = "Wait" if action == PASS else action_of(action)
+            self._steps += action != PASS
+            self._simulation.step_id(action)
         else:
-            self._steps += 1
-            self._simulation.step(action_statement)
+            action_statement = self._action_lookup.get(action, None)
+            if action_statement is None:
+                self._illegal_actions += 1
+                return self.observation_space, -1, False, {"steps": self._steps}
+            action_id = ACTION_IDS.get(action_statement, PASS)
+            if action == 0:
+                self._simulation.step(None)
+            else:
+                self._steps += 1
+                self._simulation.step(action_statement)
 
         reward = self._get_reward(self._simulation.state.internal_state)
         self.performed_actions_reward.append((action_statement, reward))
-        self._action_lookup, self.action_space = self._encode_possible_actions(self._simulation.get_possible_actions())
+        self._update_actions()
 
         self.observation_space = self._get_obs()
         done = self._get_done()
+        if self._recorder is not None:
+            if not self._recording:
+                self._begin_episode()
+            self._recorder.record(action_id, reward, self._simulation.state)
+            if done:
+                self._recorder.end_episode(self._simulation.state.game_state)
+                self._recording = False
         # observation, reward, done, info
         return self.observation_space, reward, done, {"steps": self._steps}
 
-    def get_state_copy(self):
-        return deepcopy(self._simulation.state.internal_state)
+    def _begin_episode(self):
+        self._recording = True
+        state = self._simulation.state
+        self._recorder.begin_episode(
+            state.characters,
+            self._num_epidemic_cards,
+            state.player_deck_shuffle_seed,
+            state.infect_deck_shuffle_seed,
+            state.epidemic_shuffle_seed,
+        )
+
+    def legal_actions(self) -> List[int]:
+        """the action indices step accepts in the current state"""
+        if self._catalog_actions:
+            return np.flatnonzero(self.action_space).tolist()
+        return list(self._action_lookup)
+
+    def get_state_copy(self) -> bytes:
+        return self._simulation.state.snapshot()
 
     def set_state(self, value):
-        self._simulation.state.internal_state = value
-        self._action_lookup, self.action_space = self._encode_possible_actions(self._simulation.get_possible_actions())
+        if isinstance(value, bytes):
+            self._simulation.state.restore(value)
+        else:
+            self._simulation.state.internal_state = value
+        self._update_actions()
         self.observation_space = self._get_obs()
 
+    def _update_actions(self):
+        if self._catalog_actions:
+            mask = self._simulation.get_legal_action_mask()
+            self.action_space = mask.copy() if self._copy_observations else mask
+        else:
+            self._action_lookup, self.action_space = self._encode_possible_actions(
+                self._simulation.get_possible_actions()
+            )
+
     def _get_done(self):
         return self._simulation.state.game_state != GameState.RUNNING
 
@@ -136,77 +206,8 @@ class Pandemic(gym.Env):
         else:
             return Pandemic.__insert_with_shift(feature_actions, index + 1, value)
 
-    def _get_obs(self) -> np.array:
-        state = self._simulation.state
-        phase = state.phase
-        # normalized outbreaks 1 = bad
-        outbreaks = state.outbreaks / 8
-        # num_epidemics bigger = badder
-        epidemics = state.infection_rate_marker / 7
-        # actions left smaller = less
-        actions_left = state.actions_left / 4
-        # player deck size 0 = game over
-        player_deck = len(state.player_deck)
-        # size infection discard pile
-        infection_discard = len(state.infection_discard_pile)
-        # research stations left
-        research_stations_left = state.research_stations
-        # active player
-        active_player = state.active_player
-
-        #######
-        # combine single features
-        ######
-
-        counts_vector = np.array(
-            [
-                active_player,
-                phase,
-                outbreaks,
-                epidemics,
-                actions_left,
-                player_deck,
-                infection_discard,
-                research_stations_left,
-            ]
-        )
-
-        # city state [ *researchstation *viral_states ]
-        city_feature_tuples = [
-            tuple([int(city.has_research_station())]) + tuple(city.viral_state.values())
-            for city in state.cities.values()
-        ]
-        city_feature_vector = np.array(list(sum(zip(*city_feature_tuples), ())))
-        # player characters + player locations
-        player_feature_tuples = [(id, player.city) for id, player in state.players.items()]
-        player_feature_vector = np.array(list(sum(zip(*player_feature_tuples), ())))
-
-        # player cards
-        hands_feature_vector = np.ndarray.flatten(
-            np.array(
-                [
-                    Pandemic.pad_with_zeros(10, np.array(list(player.cards)))
-                    for player in state.players.values()
-                ]
-            )
-        )
-        # cures
-        cures_vector = [int(s) for s in state.cures.values()]
-
-        # list of cubes normalized less is bad
-        cubes_stack_vector = np.array([c / 24 for c in state.cubes.values()])
-        # list of latest outbreaks ?
-
-        return np.concatenate(
-            [
-                counts_vector,
-                city_feature_vector,
-                player_feature_vector,
-                hands_feature_vector,
-                cubes_stack_vector,
-                cures_vector,
-            ]
-        )
+    def _get_obs(self) -> np.ndarray:
+        return self._observation.update(self._simulation.state, copy=self._copy_observations)
 
     @staticmethod
     def pad_with_zeros(n, array):
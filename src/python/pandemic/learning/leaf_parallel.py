@@ -0,0 +1,138 @@
+"""
+Leaf parallel search: one shared Mcts or SpMcts tree whose rollouts run in a persistent process pool.
+Up to batch_size leaves are selected ahead, each one marking its path with a virtual loss so the
+following selections spread over other leaves, and every result is backpropagated as soon as it is
+returned, after which the next leaf is selected.
+"""
+
+import multiprocessing
+import os
+import queue
+import random
+import time
+from typing import Callable, Dict, List, Optional
+
+from pandemic.learning.rollout import Rollout
+from pandemic.simulation.simulation import Simulation
+
+# the rollout of a worker process, set up once by _init_worker
+_worker_rollout = None
+
+
+def _init_worker(rollout, simulation_factory: Optional[Callable[[], Simulation]]):
+    global _worker_rollout
+    # the workers start with copies of one random state
+    random.seed()
+    rollout_random = getattr(rollout, "random", None)
+    if isinstance(rollout_random, random.Random):
+        rollout_random.seed()
+    if simulation_factory is not None:
+        rollout.simulation = simulation_factory()
+    _worker_rollout = rollout
+
+
+def _rollout_leaf(state):
+    return _worker_rollout(state)
+
+
+def _detach(state):
+    """a PandemicMctsState without the simulation of the tree, for workers which play on their own"""
+    return state.with_env(None) if hasattr(state, "with_env") else state
+
+
+def _keep(state):
+    return state
+
+
+def add_virtual_loss(node, visits: int) -> List:
+    """counts visits without reward on the path from node to the root, which is returned"""
+    path = []
+    while node is not None:
+        node.num_visits += visits
+        path.append(node)
+        node = node.parent
+    return path
+
+
+def remove_virtual_loss(path: List, visits: int):
+    for node in path:
+        node.num_visits -= visits
+
+
+class RolloutPool:
+    """
+    Process pool playing the rollouts of a search passed to execute_rounds, which is what Mcts and SpMcts
+    do when created with a rollout_pool. Every worker keeps rollout and, for PandemicMctsStates, a warm
+    simulation made by simulation_factory, alike to the one of the tree. Without one, and unless rollout
+    is a Rollout with its own simulation, leaves are sent with a copy of the simulation of the tree. So
+    rollout has to return what the rollout_policy of the search would, (reward, steps) for SpMcts and
+    the reward for Mcts.
+    """
+
+    def __init__(
+        self,
+        processes: Optional[int] = None,
+        rollout: Optional[Callable] = None,
+        simulation_factory: Optional[Callable[[], Simulation]] = None,
+        batch_size: Optional[int] = None,
+        virtual_loss: int = 1,
+        context: Optional[str] = None,
+    ):
+        self.processes = processes or os.cpu_count() or 1
+        self.batch_size = batch_size or self.processes
+        self.virtual_loss = virtual_loss
+        rollout = Rollout() if rollout is None else rollout
+        own_simulation = simulation_factory is not None or getattr(rollout, "simulation", None) is not None
+        self._prepare = _detach if own_simulation else _keep
+        mp_context = multiprocessing.get_context(context)
+        self._pool = mp_context.Pool(self.processes, _init_worker, (rollout, simulation_factory))
+
+    def execute_rounds(self, search, rounds: Optional[int] = None, time_limit: Optional[float] = None) -> int:
+        """
+        executes rounds of search, or starts new ones for time_limit milliseconds, and returns how many
+        rounds were executed. Rollouts still running at the end are waited for.
+        """
+        if (rounds is None) == (time_limit is None):
+            raise ValueError("Must have either a time limit or a number of rounds")
+        deadline = time.time() + time_limit / 1000 if time_limit is not None else None
+        # each call has its own queue, results of an aborted call can not mix in
+        results: queue.SimpleQueue = queue.SimpleQueue()
+        pending: Dict[int, tuple] = {}
+        started = 0
+        try:
+            while True:
+                while (
+                    len(pending) < self.batch_size
+                    and (rounds is None or started < rounds)
+                    and (deadline is None or time.time() < deadline)
+                ):
+                    node = search.select_node(search.root)
+                    pending[started] = (node, add_virtual_loss(node, self.virtual_loss))
+                    self._pool.apply_async(
+                        _rollout_leaf,
+                        (self._prepare(node.state),),
+                        callback=lambda result, key=started: results.put((key, result, None)),
+                        error_callback=lambda error, key=started: results.put((key, None, error)),
+                    )
+                    started += 1
+                if not pending:
+                    return started
+                key, result, error = results.get()
+                node, path = pending.pop(key)
+                remove_virtual_loss(path, self.virtual_loss)
+                if error is not None:
+                    raise error
+                search.complete_round(node, result)
+        finally:
+            for _, path in pending.values():
+                remove_virtual_loss(path, self.virtual_loss)
+
+    def close(self):
+        self._pool.close()
+        self._pool.join()
+
+    def __enter__(self) -> "RolloutPool":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
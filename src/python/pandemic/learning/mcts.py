@@ -4,6 +4,7 @@ import time
 import math
 import random
 
+from pandemic.learning.transposition import TranspositionTable
 from pandemic.simulation.model.actions import DriveFerry, DiscoverCure, ChooseCard, DirectFlight
 
 
@@ -20,6 +21,9 @@ class MctsState:
     def get_possible_actions(self):
         raise NotImplementedError
 
+    def state_hash(self) -> int:
+        raise NotImplementedError
+
     def get_current_player(self):
         raise NotImplementedError
 
@@ -65,12 +69,20 @@ class TreeNode:
         self.parent = parent
         self.num_visits = 0
         self.total_reward = 0
+        self.squared_reward = 0
+        self.max_reward = float("-inf")
         self.children = {}
 
 
 class Mcts:
     def __init__(
-        self, time_limit=None, iteration_limit=None, exploration_constant=1 / math.sqrt(2), rollout_policy=random_policy
+        self,
+        time_limit=None,
+        iteration_limit=None,
+        exploration_constant=1 / math.sqrt(2),
+        rollout_policy=random_policy,
+        transposition_table_size=None,
+        rollout_pool=None,
     ):
         if time_limit is not None:
             if iteration_limit is not None:
@@ -88,11 +100,22 @@ class Mcts:
             self.limit_type = "iterations"
         self.exploration_constant = exploration_constant
         self.rollout = rollout_policy
+        # share nodes of equal states, which turns the tree into a DAG
+        self.transpositions = TranspositionTable(transposition_table_size) if transposition_table_size else None
+        # leaf parallel rollouts in the processes of a RolloutPool instead of rollout_policy
+        self.rollout_pool = rollout_pool
 
     def search(self, initial_state):
         self.root = TreeNode(initial_state, None)
+        if self.transpositions is not None:
+            self.transpositions.clear()
 
-        if self.limit_type == "time":
+        if self.rollout_pool is not None:
+            if self.limit_type == "time":
+                self.rollout_pool.execute_rounds(self, time_limit=self.time_limit)
+            else:
+                self.rollout_pool.execute_rounds(self, rounds=self.search_limit)
+        elif self.limit_type == "time":
             time_limit = time.time() + self.time_limit / 1000
             while time.time() < time_limit:
                 self.execute_round()
@@ -104,22 +127,25 @@ class Mcts:
 
     def execute_round(self):
         node = self.select_node(self.root)
-        reward = self.rollout(node.state)
+        self.complete_round(node, self.rollout(node.state))
+
+    def complete_round(self, node, reward):
         self.backpropogate(node, reward)
 
     def select_node(self, node):
         while not node.is_terminal:
             if node.is_fully_expanded:
-                node = self.get_best_child(node, self.exploration_constant)
+                child = self.get_best_child(node, self.exploration_constant)
+                child.parent = node
+                node = child
             else:
                 return self.expand(node)
         return node
 
-    @staticmethod
-    def expand(node):
+    def expand(self, node):
         actions = node.state.get_possible_actions()
         for action in (a for a in actions if a not in node.children):
-            new_node = TreeNode(node.state.take_action(action), node)
+            new_node = self.new_node(node.state.take_action(action), node)
             node.children[action] = new_node
             if len(actions) == len(node.children):
                 node.is_fully_expanded = True
@@ -127,11 +153,19 @@ class Mcts:
 
         raise Exception("Should never reach here")
 
+    def new_node(self, state, parent):
+        if self.transpositions is None:
+            return TreeNode(state, parent)
+        return self.transpositions.node(state, parent, lambda: TreeNode(state, parent))
+
     @staticmethod
     def backpropogate(node, reward):
         while node is not None:
             node.num_visits += 1
             node.total_reward += reward
+            node.squared_reward += reward * reward
+            if reward > node.max_reward:
+                node.max_reward = reward
             node = node.parent
 
     @staticmethod
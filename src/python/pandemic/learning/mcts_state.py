@@ -1,13 +1,19 @@
-import pickle
+import copy
+from typing import Optional
 
 from pandemic.learning.environment import Pandemic
 from pandemic.learning.mcts import MctsState
 from pandemic.simulation.model.actions import DirectFlight
+from pandemic.simulation.compact_state import snapshot, snapshot_hash
 from pandemic.simulation.model.enums import GameState
 from pandemic.simulation.simulation import Simulation
 from pandemic.simulation.state import InternalState
 
 
+def accept_all(action) -> bool:
+    return True
+
+
 def compute_reward(int_state: InternalState):
     reward = False
     if int_state.game_state == GameState.WIN:
@@ -42,12 +48,12 @@ class PandemicMctsState(MctsState):
         done=False,
         reward=False,
         phase=1,
-        action_filter=lambda x: True,
+        action_filter=accept_all,
         steps=0,
         reward_function=compute_reward,
     ):
         self.env: Simulation = env
-        self.state = pickle.dumps(state)
+        self.state: bytes = state if isinstance(state, bytes) else snapshot(state)
         self.action_filter = action_filter
         self._possible_actions = (
             self.action_list(env.get_possible_actions()) if possible_actions is None else possible_actions
@@ -63,9 +69,7 @@ class PandemicMctsState(MctsState):
 
     def take_action(self, action):
         action = self._possible_actions[action]
-        new_state = pickle.loads(self.state)
-        self.env.state.internal_state = new_state
-        assert action in self._possible_actions
+        self.env.state.restore(self.state)
         if action == "Wait":
             self.env.step(None)
         else:
@@ -76,10 +80,9 @@ class PandemicMctsState(MctsState):
 
         # if any(self.env.state.cures.values()):
         #     print("found cure !__@_#_@_#_!__@_#arstarst_#)#)#) v", self.env.state.cures)
-        assert self.state != new_state
         return PandemicMctsState(
             self.env,
-            self.env.state.internal_state,
+            self.env.state.snapshot(),
             actions,
             done,
             reward,
@@ -92,6 +95,14 @@ class PandemicMctsState(MctsState):
     def get_reward(self):
         return self._reward
 
+    def with_env(self, env: Optional[Simulation]) -> "PandemicMctsState":
+        """this state on another simulation, or without one for sending it to another process"""
+        state = copy.copy(self)
+        state.env = env
+        return state
+
+    def state_hash(self) -> int:
+        return snapshot_hash(self.state)
 
     def get_possible_actions(self):
         return range(0, len(self._possible_actions))
@@ -113,7 +124,7 @@ class PandemicTreeSearchState(PandemicMctsState):
         done=False,
         reward=False,
         phase=1,
-        action_filter=lambda x: True,
+        action_filter=accept_all,
         steps=0,
         reward_function=compute_ts_reward,
     ):
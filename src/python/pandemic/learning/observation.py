@@ -0,0 +1,144 @@
+from typing import Optional
+
+import numpy as np
+
+from pandemic.simulation.compact_state import (
+    CompactState,
+    CUBES,
+    CUBES_ORDER,
+    NUM_CITIES,
+    NUM_VIRUSES,
+    VIRAL_STATE_ORDER,
+    W_RESEARCH_STATIONS,
+    DIRTY_ALL,
+    DIRTY_STATIONS,
+    DIRTY_HANDS,
+    DIRTY_PLAYERS,
+    DIRTY_POSITIONS,
+    DIRTY_ACTIVE_PLAYER,
+    DIRTY_PHASE,
+    DIRTY_CUBES,
+    DIRTY_CURES,
+    DIRTY_COUNTERS,
+    DIRTY_PLAYER_DECKS,
+    DIRTY_INFECTION_DECKS,
+)
+from pandemic.simulation.model.city_id import City
+
+HAND_SIZE = 10
+
+NUM_COUNTS = 8
+# blocks of the observation and the parts of the state they are built from
+COUNTS = 0
+STATIONS = COUNTS + NUM_COUNTS
+CITY_CUBES = STATIONS + NUM_CITIES
+PLAYERS = CITY_CUBES + NUM_CITIES * NUM_VIRUSES
+
+COUNTS_DEPENDENCIES = (
+    DIRTY_ACTIVE_PLAYER | DIRTY_PHASE | DIRTY_COUNTERS | DIRTY_PLAYER_DECKS | DIRTY_INFECTION_DECKS | DIRTY_STATIONS
+)
+PLAYERS_DEPENDENCIES = DIRTY_PLAYERS | DIRTY_POSITIONS
+HANDS_DEPENDENCIES = DIRTY_HANDS | DIRTY_PLAYERS
+
+# viral state columns of the cube rows of a compact state in observation order
+_VIRUS_COLUMNS = [virus - 1 for virus in VIRAL_STATE_ORDER]
+
+
+def observation_size(player_count: int) -> int:
+    return PLAYERS + player_count * (2 + HAND_SIZE) + 2 * NUM_VIRUSES
+
+
+class Observation:
+    """
+    Observation vector of a state in one preallocated float32 buffer with a fixed offset per block:
+
+    counts [active player, phase, outbreaks / 8, infection rate / 7, actions left / 4, player deck size,
+    infection discard pile size, research stations left], research station per city, cubes per city by
+    virus, player characters, player cities, sorted hands padded to HAND_SIZE, cube supply / 24 and cures.
+
+    A compact state is compared with the buffer the observation was last built from and only the blocks
+    depending on the changed parts are rewritten, other states are rebuilt completely.
+    """
+
+    def __init__(self, player_count: int):
+        self.player_count = player_count
+        self.size = observation_size(player_count)
+        self.hands = PLAYERS + 2 * player_count
+        self.supply = self.hands + HAND_SIZE * player_count
+        self.cures = self.supply + NUM_VIRUSES
+        self._buffer = np.zeros(self.size, dtype=np.float32)
+        self._cubes = self._buffer[CITY_CUBES:PLAYERS].reshape(NUM_VIRUSES, NUM_CITIES)
+        self._last: Optional[bytearray] = None
+
+    def update(self, state, copy: bool = False) -> np.ndarray:
+        """
+        the observation of state, the shared buffer is only valid until the next update unless copied
+        """
+        internal_state = state.internal_state
+        if not isinstance(internal_state, CompactState):
+            self._last = None
+            self._write(state, DIRTY_ALL)
+        elif self._last is None:
+            self._last = bytearray(internal_state._bytes)
+            self._write(state, DIRTY_ALL)
+        else:
+            dirty = internal_state._changed(self._last)
+            if dirty:
+                self._last[:] = internal_state._bytes
+                self._write(state, dirty)
+        return self._buffer.copy() if copy else self._buffer
+
+    def invalidate(self):
+        """rebuild every block on the next update"""
+        self._last = None
+
+    def _write(self, state, dirty: int):
+        out = self._buffer
+        internal_state = state.internal_state
+        compact = isinstance(internal_state, CompactState)
+        if dirty & COUNTS_DEPENDENCIES:
+            out[COUNTS:STATIONS] = (
+                state.active_player,
+                state.phase,
+                state.outbreaks / 8,
+                state.infection_rate_marker / 7,
+                state.actions_left / 4,
+                len(state.player_deck),
+                len(state.infection_discard_pile),
+                state.research_stations,
+            )
+        if dirty & DIRTY_STATIONS:
+            if compact:
+                stations = internal_state._words[W_RESEARCH_STATIONS]
+                out[STATIONS:CITY_CUBES] = np.unpackbits(
+                    np.frombuffer(stations.to_bytes(8, "little"), dtype=np.uint8), bitorder="little"
+                )[1 : NUM_CITIES + 1]
+            else:
+                out[STATIONS:CITY_CUBES] = [state.cities[city].has_research_station() for city in City.__members__]
+        if dirty & DIRTY_CUBES:
+            if compact:
+                rows = np.frombuffer(internal_state._bytes, np.uint8, NUM_CITIES * NUM_VIRUSES, CUBES)
+                self._cubes[:] = rows.reshape(NUM_CITIES, NUM_VIRUSES)[:, _VIRUS_COLUMNS].T
+            else:
+                self._cubes[:] = [
+                    [state.cities[city].viral_state[virus] for city in City.__members__] for virus in VIRAL_STATE_ORDER
+                ]
+        if dirty & PLAYERS_DEPENDENCIES:
+            players = state.players
+            out[PLAYERS : self.hands] = 0
+            out[PLAYERS : PLAYERS + len(players)] = list(players)
+            out[PLAYERS + self.player_count : PLAYERS + self.player_count + len(players)] = [
+                player.city for player in players.values()
+            ]
+        if dirty & HANDS_DEPENDENCIES:
+            out[self.hands : self.supply] = 0
+            for slot, player in enumerate(state.players.values()):
+                cards = sorted(player.cards)[:HAND_SIZE]
+                start = self.hands + slot * HAND_SIZE
+                out[start : start + len(cards)] = cards
+        if dirty & DIRTY_COUNTERS:
+            cubes = state.cubes
+            out[self.supply : self.cures] = [cubes[virus] / 24 for virus in CUBES_ORDER]
+        if dirty & DIRTY_CURES:
+            cures = state.cures
+            out[self.cures : self.size] = [cures[virus] for virus in CUBES_ORDER]
@@ -0,0 +1,207 @@
+"""
+Root parallel search: independent Mcts or SpMcts searches of the same root run in worker processes,
+each with its own random seed and budget. Only the statistics of the children of their roots are sent
+back and merged per action to choose the action to play. ParallelSpMcts runs the meta searches of
+SpMcts in worker processes and keeps the best line any of them found.
+"""
+
+import copy
+import multiprocessing
+import random
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from pandemic.learning.sp_mcts import SpMcts, TreeNode
+
+
+class ChildStatistics(NamedTuple):
+    num_visits: int
+    total_reward: float
+    squared_reward: float
+    max_reward: float
+    # fewest steps a rollout reaching max_reward took, only tracked by SpMcts
+    max_steps: float = float("inf")
+
+    @property
+    def mean_reward(self) -> float:
+        return self.total_reward / self.num_visits if self.num_visits else float("-inf")
+
+
+def root_statistics(root) -> Dict[object, ChildStatistics]:
+    """statistics of the children of root by action"""
+    return {
+        action: ChildStatistics(
+            child.num_visits,
+            child.total_reward,
+            child.squared_reward,
+            child.max_reward,
+            getattr(child, "max_steps", float("inf")),
+        )
+        for action, child in root.children.items()
+    }
+
+
+def merge_statistics(statistics: Sequence[Dict[object, ChildStatistics]]) -> Dict[object, ChildStatistics]:
+    """sums visits and rewards of equal actions, the max reward is the best one of any search"""
+    merged: Dict[object, ChildStatistics] = {}
+    for children in statistics:
+        for action, child in children.items():
+            known = merged.get(action)
+            if known is None:
+                merged[action] = child
+                continue
+            if child.max_reward > known.max_reward:
+                max_reward, max_steps = child.max_reward, child.max_steps
+            elif child.max_reward == known.max_reward:
+                max_reward, max_steps = known.max_reward, min(known.max_steps, child.max_steps)
+            else:
+                max_reward, max_steps = known.max_reward, known.max_steps
+            merged[action] = ChildStatistics(
+                known.num_visits + child.num_visits,
+                known.total_reward + child.total_reward,
+                known.squared_reward + child.squared_reward,
+                max_reward,
+                max_steps,
+            )
+    return merged
+
+
+def mean_reward(child: ChildStatistics):
+    """choice of Mcts.search: the best average reward"""
+    return child.mean_reward
+
+
+def max_reward(child: ChildStatistics):
+    """choice of SpMcts.search: the best reward of any rollout, reached in the fewest steps"""
+    return child.max_reward, -child.max_steps
+
+
+def _seed(search, seed: int):
+    random.seed(seed)
+    rollout_random = getattr(search.rollout, "random", None)
+    if isinstance(rollout_random, random.Random):
+        rollout_random.seed(seed)
+
+
+def _search_root(search, initial_state, seed: int) -> Dict[object, ChildStatistics]:
+    _seed(search, seed)
+    if isinstance(search, SpMcts):
+        search.search()
+    else:
+        search.search(initial_state)
+    return root_statistics(search.root)
+
+
+class RootParallelMcts:
+    """
+    Runs every one of searches in its own worker process. The searches are pickled to the workers, so
+    their limits are their budgets, and Mcts searches are given the initial_state passed to search
+    while SpMcts searches start from the root they were created with. The actions of the merged root
+    children are compared by criterion, which defaults to the choice the searches make themselves.
+    """
+
+    def __init__(
+        self,
+        searches: Sequence,
+        seed: Optional[int] = None,
+        criterion: Optional[Callable[[ChildStatistics], object]] = None,
+        context: Optional[str] = None,
+    ):
+        if not searches:
+            raise ValueError("at least one search is needed")
+        self.searches = list(searches)
+        self.random = random.Random(seed)
+        if criterion is None:
+            criterion = max_reward if isinstance(self.searches[0], SpMcts) else mean_reward
+        self.criterion = criterion
+        self.context = multiprocessing.get_context(context)
+        self.statistics: Dict[object, ChildStatistics] = {}
+
+    def search(self, initial_state=None):
+        seeds: List[int] = [self.random.getrandbits(32) for _ in self.searches]
+        jobs = [(search, initial_state, seed) for search, seed in zip(self.searches, seeds)]
+        with self.context.Pool(len(jobs)) as pool:
+            self.statistics = merge_statistics(pool.starmap(_search_root, jobs))
+        if not self.statistics:
+            raise ValueError("the searches did not expand the root")
+        return max(self.statistics, key=lambda action: self.criterion(self.statistics[action]))
+
+
+def _with_env(state, env):
+    return state.with_env(env) if hasattr(state, "with_env") else state
+
+
+def best_line(root: TreeNode) -> TreeNode:
+    """
+    copy of the path from root along the most rewarding children, as followed by get_next_action, with
+    states which are not bound to a simulation. The nodes of the copy can be expanded again.
+    """
+    line = None
+    node, action = root, None
+    while True:
+        copied = copy.copy(node)
+        copied.state = _with_env(node.state, None)
+        copied.is_fully_expanded = copied.is_terminal
+        copied.children = {}
+        copied.parent = line
+        if line is not None:
+            line.children[action] = copied
+        line = copied
+        if not node.children:
+            break
+        child = SpMcts.get_most_rewarding_child(node)
+        node, action = child, SpMcts.get_action(node, child)
+    while line.parent is not None:
+        line = line.parent
+    return line
+
+
+def _meta_searches(search: SpMcts, seed: int) -> Tuple[TreeNode, float, int]:
+    rand = random.Random(seed)
+    _seed(search, rand.getrandbits(32))
+    root = search.root
+    time_limit = time.time() + search.search_limit / 1000
+    while time.time() < time_limit:
+        search.meta_search(root, search.meta_time_limit, rand)
+    return best_line(root), search.max_reward, search.max_steps
+
+
+class ParallelSpMcts(SpMcts):
+    """
+    SpMcts whose search runs meta searches for time_limit in each of processes worker processes, every
+    one on a copy of the root and with its own random.Random. The best line of the worker with the
+    highest max_reward, fewest steps first, becomes the root, so get_next_action follows it.
+    """
+
+    def __init__(
+        self,
+        initial_state,
+        processes: int = 2,
+        seed: Optional[int] = None,
+        context: Optional[str] = None,
+        **kwargs,
+    ):
+        super().__init__(initial_state, **kwargs)
+        if processes < 1:
+            raise ValueError("at least one process is needed")
+        self.processes = processes
+        self.random = random.Random(seed)
+        self.context = multiprocessing.get_context(context)
+
+    def search(self):
+        env = getattr(self.root.state, "env", None)
+        jobs = [(self, self.random.getrandbits(32)) for _ in range(self.processes)]
+        with self.context.Pool(self.processes) as pool:
+            results = pool.starmap(_meta_searches, jobs)
+
+        best_root = max(results, key=lambda result: (result[0].max_reward, -result[0].max_steps))[0]
+        self.max_reward = max(result[1] for result in results)
+        self.max_steps = max(result[2] for result in results)
+        nodes = [best_root]
+        while nodes:
+            node = nodes.pop()
+            node.state = _with_env(node.state, env)
+            nodes.extend(node.children.values())
+        self.root = best_root
+        most_rewarding_child = self.get_most_rewarding_child(best_root)
+        return self.get_action(best_root, most_rewarding_child), best_root.state
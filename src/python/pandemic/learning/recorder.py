@@ -0,0 +1,186 @@
+"""
+Episode recorder streaming the steps of many games into compressed, columnar chunk files. Steps are
+collected in preallocated column buffers and written with np.savez_compressed whenever chunk_steps are
+full, so memory stays bounded however many games are played. load_episodes concatenates the columns of
+a directory into arrays.
+"""
+
+import glob
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from pandemic.simulation.model.enums import GameState
+
+CHUNK_SUFFIX = ".npz"
+MAX_PLAYERS = 4
+
+# scalar state features recorded after every step
+STEP_FEATURES = (
+    "phase",
+    "active_player",
+    "actions_left",
+    "outbreaks",
+    "infection_rate_marker",
+    "research_stations",
+    "player_deck",
+    "cures",
+)
+STEP_COLUMNS = ("episode", "action", "reward") + STEP_FEATURES
+# stored with an episode_ prefix
+EPISODE_COLUMNS = (
+    "id",
+    "player_deck_shuffle_seed",
+    "infect_deck_shuffle_seed",
+    "epidemic_shuffle_seed",
+    "num_epidemic_cards",
+    "characters",
+    "steps",
+    "game_state",
+)
+
+
+def step_features(state) -> Tuple[int, ...]:
+    return (
+        state.phase,
+        state.active_player,
+        state.actions_left,
+        state.outbreaks,
+        state.infection_rate_marker,
+        state.research_stations,
+        len(state.player_deck),
+        sum(state.cures.values()),
+    )
+
+
+def _seed(seed: Optional[int]) -> int:
+    return -1 if seed is None else seed
+
+
+class EpisodeRecorder:
+    """
+    Records episodes begun with begin_episode, their steps and how they ended. An episode row is written
+    to the chunk in which the episode ends, its steps may be spread over several chunks. Episode ids
+    continue from the chunks already in directory.
+    """
+
+    def __init__(self, directory: str, chunk_steps: int = 1 << 16):
+        if chunk_steps < 1:
+            raise ValueError("chunks need room for at least one step")
+        self.directory = directory
+        self.chunk_steps = chunk_steps
+        os.makedirs(directory, exist_ok=True)
+        chunks = _chunk_paths(directory)
+        self._next_chunk = len(chunks)
+        self._next_episode = 0
+        if chunks:
+            with np.load(chunks[-1]) as last:
+                self._next_episode = int(last["next_episode"])
+
+        self._episode: Optional[int] = None
+        self._episode_steps = 0
+        self._episode_metadata: Tuple = ()
+        self._episodes: List[Tuple] = []
+        self._columns = {
+            "episode": np.zeros(chunk_steps, dtype=np.int64),
+            "action": np.zeros(chunk_steps, dtype=np.uint16),
+            "reward": np.zeros(chunk_steps, dtype=np.float32),
+        }
+        self._features = np.zeros((chunk_steps, len(STEP_FEATURES)), dtype=np.int16)
+        self._size = 0
+
+    def begin_episode(
+        self,
+        characters,
+        num_epidemic_cards: int,
+        player_deck_shuffle_seed: Optional[int] = None,
+        infect_deck_shuffle_seed: Optional[int] = None,
+        epidemic_shuffle_seed: Optional[int] = None,
+    ) -> int:
+        """start an episode, an episode still running is ended first"""
+        if self._episode is not None:
+            self.end_episode(GameState.RUNNING)
+        self._episode = self._next_episode
+        self._next_episode += 1
+        self._episode_steps = 0
+        self._episode_metadata = (
+            _seed(player_deck_shuffle_seed),
+            _seed(infect_deck_shuffle_seed),
+            _seed(epidemic_shuffle_seed),
+            num_epidemic_cards,
+            tuple(sorted(characters)) + (0,) * (MAX_PLAYERS - len(characters)),
+        )
+        return self._episode
+
+    def record(self, action_id: int, reward: float, state):
+        """one step of the current episode: the action_catalog id taken and the state it led to"""
+        if self._episode is None:
+            raise ValueError("no episode has been begun")
+        index = self._size
+        columns = self._columns
+        columns["episode"][index] = self._episode
+        columns["action"][index] = action_id
+        columns["reward"][index] = reward
+        self._features[index] = step_features(state)
+        self._size += 1
+        self._episode_steps += 1
+        if self._size == self.chunk_steps:
+            self.flush()
+
+    def end_episode(self, game_state: int):
+        if self._episode is None:
+            return
+        self._episodes.append((self._episode,) + self._episode_metadata + (self._episode_steps, game_state))
+        self._episode = None
+
+    def flush(self):
+        """write the recorded steps and the episodes ended since the last flush to a new chunk"""
+        if not self._size and not self._episodes:
+            return
+        size = self._size
+        arrays = {name: self._columns[name][:size] for name in ("episode", "action", "reward")}
+        arrays.update((name, self._features[:size, i]) for i, name in enumerate(STEP_FEATURES))
+        episodes = list(zip(*self._episodes)) if self._episodes else [()] * len(EPISODE_COLUMNS)
+        for name, values in zip(EPISODE_COLUMNS, episodes):
+            shape = (len(self._episodes), MAX_PLAYERS) if name == "characters" else (len(self._episodes),)
+            arrays["episode_" + name] = np.array(values, dtype=np.int64).reshape(shape)
+        path = os.path.join(self.directory, f"{self._next_chunk:06d}{CHUNK_SUFFIX}")
+        np.savez_compressed(path, next_episode=self._next_episode, **arrays)
+        self._next_chunk += 1
+        self._size = 0
+        self._episodes.clear()
+
+    def close(self):
+        """end a running episode and write what is left"""
+        if self._episode is not None:
+            self.end_episode(GameState.RUNNING)
+        self.flush()
+
+    def __enter__(self) -> "EpisodeRecorder":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+def _chunk_paths(directory: str) -> List[str]:
+    return sorted(glob.glob(os.path.join(directory, "*" + CHUNK_SUFFIX)))
+
+
+def load_episodes(directory: str) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+    """
+    the step columns and the episode columns of all chunks in directory, the episode column of the
+    steps refers to the id column of the episodes
+    """
+    step_parts: Dict[str, List[np.ndarray]] = {name: [] for name in STEP_COLUMNS}
+    episode_parts: Dict[str, List[np.ndarray]] = {name: [] for name in EPISODE_COLUMNS}
+    for path in _chunk_paths(directory):
+        with np.load(path) as chunk:
+            for name in STEP_COLUMNS:
+                step_parts[name].append(chunk[name])
+            for name in EPISODE_COLUMNS:
+                episode_parts[name].append(chunk["episode_" + name])
+    steps = {name: np.concatenate(parts) if parts else np.zeros(0) for name, parts in step_parts.items()}
+    episodes = {name: np.concatenate(parts) if parts else np.zeros(0) for name, parts in episode_parts.items()}
+    return steps, episodes
@@ -0,0 +1,72 @@
+import random
+from typing import Callable, List, Optional, Tuple
+
+from pandemic.learning.mcts_state import PandemicMctsState, accept_all, compute_reward
+from pandemic.simulation.model.actions import ActionInterface, ChooseCard, DiscoverCure, DriveFerry
+from pandemic.simulation.model.enums import GameState
+from pandemic.simulation.simulation import Simulation
+
+# picks the action to play next out of the non empty list of possible (and filtered) actions
+RolloutPolicy = Callable[[List[ActionInterface], Simulation, random.Random], ActionInterface]
+
+
+def uniform_policy(actions: List[ActionInterface], simulation: Simulation, rand: random.Random) -> ActionInterface:
+    return rand.choice(actions)
+
+
+def filtered_policy(actions: List[ActionInterface], simulation: Simulation, rand: random.Random) -> ActionInterface:
+    """moving by car or ferry, curing and choosing cards if possible, like random_filtered_action_policy"""
+    preferred = [action for action in actions if isinstance(action, (DriveFerry, DiscoverCure, ChooseCard))]
+    return rand.choice(preferred if preferred else actions)
+
+
+class Rollout:
+    """
+    Rollout policy for SpMcts and Mcts on PandemicMctsStates. The snapshot of the leaf is restored once
+    and the game is played to its end directly on the simulation, without intermediate states. The
+    simulation defaults to the one of the leaf state, whose snapshots make it scratch space anyway.
+
+    Returns the reward and the step count of the final state like sp_mcts.random_policy, or just the
+    reward like mcts.random_policy without return_steps.
+    """
+
+    def __init__(
+        self,
+        policy: RolloutPolicy = uniform_policy,
+        simulation: Optional[Simulation] = None,
+        rand: Optional[random.Random] = None,
+        return_steps: bool = True,
+    ):
+        self.policy = policy
+        self.simulation = simulation
+        self.random = rand if rand is not None else random.Random()
+        self.return_steps = return_steps
+
+    def __call__(self, state: PandemicMctsState):
+        reward, steps = self.play(state)
+        return (reward, steps) if self.return_steps else reward
+
+    def play(self, state: PandemicMctsState) -> Tuple[float, int]:
+        if state.is_terminal():
+            return state.get_reward(), state.steps
+        simulation = self.simulation if self.simulation is not None else state.env
+        simulation.state.restore(state.state)
+        return self.play_on(simulation, state.action_filter, state.reward_function)
+
+    def play_on(
+        self, simulation: Simulation, action_filter=accept_all, reward_function=compute_reward
+    ) -> Tuple[float, int]:
+        """plays the game of simulation from its current state to its end"""
+        game = simulation.state
+        policy = self.policy
+        rand = self.random
+        while game.game_state == GameState.RUNNING:
+            actions = simulation.get_possible_actions()
+            if not actions:
+                simulation.step(None)
+                continue
+            if action_filter is not accept_all:
+                actions = [action for action in actions if action_filter(action)] or actions
+            simulation.step(policy(actions, simulation, rand))
+        internal_state = game.internal_state
+        return reward_function(internal_state), internal_state.steps
@@ -5,6 +5,7 @@ import math
 import random
 from operator import itemgetter
 
+from pandemic.learning.transposition import TranspositionTable
 from pandemic.simulation.model.actions import DriveFerry, DiscoverCure, ChooseCard, DirectFlight
 from pandemic.simulation.model.enums import Virus
 
@@ -22,6 +23,9 @@ class SpMctsState:
     def get_possible_actions(self):
         raise NotImplementedError
 
+    def state_hash(self) -> int:
+        raise NotImplementedError
+
 
 def random_policy(state: SpMctsState):
     while not state.is_terminal():
@@ -106,6 +110,8 @@ class SpMcts:
         D=0.1,
         select_treshold=10,
         meta_time_limit=1000,
+        transposition_table_size=None,
+        rollout_pool=None,
     ):
 
         self.search_limit = time_limit
@@ -117,6 +123,10 @@ class SpMcts:
         self.max_steps = 0
         self.select_treshold = select_treshold
         self.meta_time_limit = meta_time_limit
+        # share nodes of equal states, which turns the tree into a DAG
+        self.transpositions = TranspositionTable(transposition_table_size) if transposition_table_size else None
+        # leaf parallel rollouts in the processes of a RolloutPool instead of rollout_policy
+        self.rollout_pool = rollout_pool
 
     def search(self):
         meta_search_roots = []
@@ -130,10 +140,14 @@ class SpMcts:
         most_rewarding_child = self.get_most_rewarding_child(best_root)
         return self.get_action(best_root, most_rewarding_child), best_root.state
 
-    def meta_search(self, root, time_limit):
+    def meta_search(self, root, time_limit, rand=None):
         self.root = root
         executions = 0
-        rand = random.Random()
+        rand = rand if rand is not None else random.Random()
+
+        if self.rollout_pool is not None:
+            self.rollout_pool.execute_rounds(self, time_limit=time_limit)
+            return self.root
 
         time_limit = time.time() + time_limit / 1000
         while time.time() < time_limit:
@@ -147,7 +161,10 @@ class SpMcts:
 
     def execute_round(self, rand):
         node = self.select_node(self.root)
-        reward, steps = self.rollout(node.state)
+        self.complete_round(node, self.rollout(node.state))
+
+    def complete_round(self, node, result):
+        reward, steps = result
         self.max_reward = max(self.max_reward, reward)
         self.max_steps = max(self.max_steps, steps)
 
@@ -163,16 +180,17 @@ class SpMcts:
             return node
         while not node.is_terminal:
             if node.is_fully_expanded:
-                node = self.get_best_child(node, self.exploration_constant, self.D)
+                child = self.get_best_child(node, self.exploration_constant, self.D)
+                child.parent = node
+                node = child
             else:
                 return self.expand(node)
         return node
 
-    @staticmethod
-    def expand(node):
+    def expand(self, node):
         actions = node.state.get_possible_actions()
         for action in (a for a in actions if a not in node.children):
-            new_node = TreeNode(node.state.take_action(action), node)
+            new_node = self.new_node(node.state.take_action(action), node)
             node.children[action] = new_node
             if len(actions) == len(node.children):
                 node.is_fully_expanded = True
@@ -180,6 +198,11 @@ class SpMcts:
 
         raise Exception("Should never reach here")
 
+    def new_node(self, state, parent):
+        if self.transpositions is None:
+            return TreeNode(state, parent)
+        return self.transpositions.node(state, parent, lambda: TreeNode(state, parent))
+
     @staticmethod
     def backpropogate(node, reward, steps):
         while node is not None:
@@ -1,5 +1,8 @@
 from collections import namedtuple
 import random
+from typing import Optional
+
+import numpy as np
 
 Transition = namedtuple("Transition", ("state", "action", "next_state", "reward"))
 
@@ -27,3 +30,162 @@ class ReplayMemory(object):
 
     def __len__(self):
         return len(self.memory)
+
+
+TransitionBatch = namedtuple(
+    "TransitionBatch", ("state", "action", "next_state", "reward", "done", "indices", "weights")
+)
+
+
+class SumTree:
+    """
+    Binary tree over priorities in one array, every node holds the sum of its children and the root
+    the total. Updates and lookups of a batch walk the levels of the tree for all items at once.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity must be at least one")
+        self.capacity = capacity
+        self._depth = (capacity - 1).bit_length()
+        self._leaves = 1 << self._depth
+        self.tree = np.zeros(2 * self._leaves)
+
+    @property
+    def total(self) -> float:
+        return float(self.tree[1])
+
+    def __getitem__(self, indices):
+        return self.tree[np.asarray(indices) + self._leaves]
+
+    def update(self, indices: np.ndarray, priorities: np.ndarray):
+        nodes = np.asarray(indices, dtype=np.int64) + self._leaves
+        self.tree[nodes] = priorities
+        for _ in range(self._depth):
+            nodes = np.unique(nodes >> 1)
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+
+    def find(self, values: np.ndarray) -> np.ndarray:
+        """index of the leaf each value falls into, for values in [0, total)"""
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        tree = self.tree
+        for _ in range(self._depth):
+            left = 2 * nodes
+            left_sum = tree[left]
+            # rounding may leave a value past the sum of the left subtree when the right one is empty
+            right = (values >= left_sum) & (tree[left + 1] > 0)
+            values -= np.where(right, left_sum, 0)
+            nodes = left + right
+        return nodes - self._leaves
+
+
+class ArrayReplayMemory:
+    """
+    Replay memory in preallocated arrays: states and next states as float32 rows of observation_size,
+    actions, rewards and dones as columns. New transitions overwrite the oldest once capacity is reached.
+
+    Sampling gathers a batch with one index per array. Prioritized memories sample proportional to
+    priority ** alpha through a SumTree, new transitions get the highest priority seen so far and
+    batches come with importance weights (n * P(i)) ** -beta scaled by their maximum.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        observation_size: int,
+        prioritized: bool = False,
+        alpha: float = 0.6,
+        epsilon: float = 1e-6,
+        seed=None,
+    ):
+        if capacity < 1:
+            raise ValueError("capacity must be at least one")
+        self.capacity = capacity
+        self.observation_size = observation_size
+        self.states = np.zeros((capacity, observation_size), dtype=np.float32)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.next_states = np.zeros((capacity, observation_size), dtype=np.float32)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.dones = np.zeros(capacity, dtype=bool)
+        self.position = 0
+        self._size = 0
+        self.random = np.random.default_rng(seed)
+
+        self.alpha = alpha
+        self.epsilon = epsilon
+        self._priorities: Optional[SumTree] = SumTree(capacity) if prioritized else None
+        self._max_priority = 1.0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def prioritized(self) -> bool:
+        return self._priorities is not None
+
+    def push(self, state, action: int, next_state, reward: float, done: bool = False):
+        """Saves a transition."""
+        self.push_batch([state], [action], [next_state], [reward], [done])
+
+    def push_batch(self, states, actions, next_states, rewards, dones=None) -> np.ndarray:
+        """save a batch of transitions, returns the indices they were stored at"""
+        states = np.asarray(states, dtype=np.float32)
+        count = len(states)
+        # only the newest capacity transitions of a large batch survive
+        skip = max(count - self.capacity, 0)
+        indices = (self.position + skip + np.arange(count - skip)) % self.capacity
+        self.states[indices] = states[skip:]
+        self.actions[indices] = np.asarray(actions)[skip:]
+        self.next_states[indices] = np.asarray(next_states, dtype=np.float32)[skip:]
+        self.rewards[indices] = np.asarray(rewards)[skip:]
+        self.dones[indices] = np.asarray(dones)[skip:] if dones is not None else False
+        self.position = (self.position + count) % self.capacity
+        self._size = min(self._size + count, self.capacity)
+        if self._priorities is not None:
+            self._priorities.update(indices, np.full(len(indices), self._max_priority**self.alpha))
+        return indices
+
+    def sample(self, batch_size: int, beta: float = 0.4) -> TransitionBatch:
+        if self._size == 0:
+            raise ValueError("can not sample from an empty memory")
+        if self._priorities is None:
+            indices = self.random.integers(0, self._size, batch_size)
+            weights = np.ones(batch_size, dtype=np.float32)
+        else:
+            # one value per equal segment of the total priority
+            total = self._priorities.total
+            segments = (np.arange(batch_size) + self.random.random(batch_size)) * (total / batch_size)
+            indices = self._priorities.find(segments)
+            probabilities = self._priorities[indices] / total
+            weights = (self._size * probabilities) ** -beta
+            weights = (weights / weights.max()).astype(np.float32)
+        return self._batch(indices, weights)
+
+    def sample_slice(self, slice_size: int) -> TransitionBatch:
+        """consecutive transitions in the order they were pushed"""
+        if not 0 < slice_size <= self._size:
+            raise ValueError(f"can not take {slice_size} of {self._size} transitions")
+        oldest = self.position if self._size == self.capacity else 0
+        start = self.random.integers(0, self._size - slice_size + 1)
+        indices = (oldest + start + np.arange(slice_size)) % self.capacity
+        return self._batch(indices, np.ones(slice_size, dtype=np.float32))
+
+    def update_priorities(self, indices: np.ndarray, priorities: np.ndarray):
+        """new priorities of sampled transitions, e.g. their absolute td errors"""
+        if self._priorities is None:
+            raise ValueError("the memory is not prioritized")
+        priorities = np.abs(np.asarray(priorities, dtype=np.float64)) + self.epsilon
+        self._max_priority = max(self._max_priority, float(priorities.max()))
+        self._priorities.update(indices, priorities**self.alpha)
+
+    def _batch(self, indices: np.ndarray, weights: np.ndarray) -> TransitionBatch:
+        return TransitionBatch(
+            self.states[indices],
+            self.actions[indices],
+            self.next_states[indices],
+            self.rewards[indices],
+            self.dones[indices],
+            indices,
+            weights,
+        )
@@ -0,0 +1,54 @@
+from collections import OrderedDict
+from typing import Any, Callable
+
+
+class TranspositionTable:
+    """
+    Bounded map from state hash to search node, so move orders reaching the same state share one node
+    and its statistics. When full the least recently used entry is dropped: the node stays in the
+    tree but is no longer shared.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity must be at least one")
+        self.capacity = capacity
+        self._nodes: "OrderedDict[int, Any]" = OrderedDict()
+        self.hits = 0
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self._nodes
+
+    def get(self, key: int) -> Any:
+        node = self._nodes.get(key, None)
+        if node is not None:
+            self._nodes.move_to_end(key)
+            self.hits += 1
+        return node
+
+    def put(self, key: int, node: Any):
+        self._nodes[key] = node
+        self._nodes.move_to_end(key)
+        if len(self._nodes) > self.capacity:
+            self._nodes.popitem(last=False)
+
+    def clear(self):
+        self._nodes.clear()
+        self.hits = 0
+
+    def node(self, state, parent, create: Callable[[], Any]) -> Any:
+        """
+        the node of state, created if not known. A shared node gets parent as its parent, so
+        backpropagation follows the path it was reached by last.
+        """
+        key = state.state_hash()
+        node = self.get(key)
+        if node is None:
+            node = create()
+            self.put(key, node)
+        else:
+            node.parent = parent
+        return node
@@ -6,6 +6,7 @@ import random
 from typing import Dict, Any
 
 from pandemic.learning.mcts import MctsState
+from pandemic.learning.transposition import TranspositionTable
 
 
 @dataclass
@@ -24,7 +25,15 @@ class WalkNode:
 
 class TreeSearch:
     def __init__(
-        self, step_limit=None, report_steps=1000, time_limit=None, exploration_constant=1 / math.sqrt(2), D=0.1, select_threshold=1000, next_threshold=100
+        self,
+        step_limit=None,
+        report_steps=1000,
+        time_limit=None,
+        exploration_constant=1 / math.sqrt(2),
+        D=0.1,
+        select_threshold=1000,
+        next_threshold=100,
+        transposition_table_size=None,
     ):
         self.max_depth = 0
         self.next_threshold = next_threshold
@@ -41,6 +50,8 @@ class TreeSearch:
         self.steps = 0
         self.current_node = None
         self.select_threshold = select_threshold
+        # share nodes of equal states, which turns the tree into a DAG
+        self.transpositions = TranspositionTable(transposition_table_size) if transposition_table_size else None
 
     def search(self, initial_state: MctsState):
         self.root_node = WalkNode(dict(), initial_state, None) if self.root_node is None else self.root_node
@@ -59,7 +70,7 @@ class TreeSearch:
                     self.discovered_final_states,
                     self.max_reward,
                     self.root_node.visited_children,
-                    self.max_depth
+                    self.max_depth,
                 )
 
     def walk(self):
@@ -83,10 +94,12 @@ class TreeSearch:
         while not current_node.state.is_terminal():
             if current_node.explored:
                 if current_node.num_visits > self.select_threshold:
-                    current_node = self.get_best_child(current_node, self.exploration_constant, self.D)
+                    next_node = self.get_best_child(current_node, self.exploration_constant, self.D)
                 else:
                     action = random.choice(current_node.state.get_possible_actions())
-                    current_node = current_node.children[action]
+                    next_node = current_node.children[action]
+                next_node.parent = current_node
+                current_node = next_node
             else:
                 if current_node.visited_children == 0:
                     self.discovered_nodes += len(current_node.state.get_possible_actions())
@@ -107,8 +120,9 @@ class TreeSearch:
                 been_there = current_node.children.get(action, None)
                 if been_there:
                     next_node = been_there
+                    next_node.parent = current_node
                 else:
-                    next_node = WalkNode(dict(), current_node.state.take_action(action), current_node)
+                    next_node = self.new_node(current_node.state.take_action(action), current_node)
                     current_node.children[action] = next_node
                     current_node.visited_children += 1
                     if current_node.visited_children == len(current_node.state.get_possible_actions()):
@@ -123,6 +137,11 @@ class TreeSearch:
         self.max_depth = max(self.max_depth, current_node.state.steps)
         return reward
 
+    def new_node(self, state, parent):
+        if self.transpositions is None:
+            return WalkNode(dict(), state, parent)
+        return self.transpositions.node(state, parent, lambda: WalkNode(dict(), state, parent))
+
     def print_best_solution(self):
         print("===____ solution ____===")
         node = self.root_node
@@ -0,0 +1,202 @@
+"""
+Several Pandemic environments stepped in worker processes. The workers write observations, rewards,
+dones and legal action masks straight into arrays in shared memory, only commands and infos are sent
+through pipes.
+"""
+
+import ctypes
+import multiprocessing
+import traceback
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+from pandemic.learning.environment import Pandemic
+
+STEP = "step"
+RESET = "reset"
+CLOSE = "close"
+
+
+class _SharedArrays:
+    """numpy views of the shared buffers, created in the parent and passed to the workers"""
+
+    def __init__(self, context, num_envs: int, observation_size: int, action_size: int):
+        self.num_envs = num_envs
+        self.observation_size = observation_size
+        self.action_size = action_size
+        self.buffers = (
+            context.RawArray(ctypes.c_float, num_envs * observation_size),
+            context.RawArray(ctypes.c_float, num_envs),
+            context.RawArray(ctypes.c_bool, num_envs),
+            context.RawArray(ctypes.c_bool, num_envs * action_size),
+            context.RawArray(ctypes.c_int64, num_envs),
+        )
+        self._views()
+
+    def _views(self):
+        observations, rewards, dones, masks, actions = self.buffers
+        self.observations = np.frombuffer(observations, dtype=np.float32).reshape(self.num_envs, -1)
+        self.rewards = np.frombuffer(rewards, dtype=np.float32)
+        self.dones = np.frombuffer(dones, dtype=bool)
+        self.masks = np.frombuffer(masks, dtype=bool).reshape(self.num_envs, self.action_size)
+        self.actions = np.frombuffer(actions, dtype=np.int64)
+
+    def __getstate__(self):
+        return self.num_envs, self.observation_size, self.action_size, self.buffers
+
+    def __setstate__(self, state):
+        self.num_envs, self.observation_size, self.action_size, self.buffers = state
+        self._views()
+
+    def write(self, index: int, env: Pandemic):
+        self.observations[index] = env.observation_space
+        mask = self.masks[index]
+        mask[:] = False
+        mask[env.legal_actions()] = True
+
+
+def _worker(env_fns: Sequence[Callable[[], Pandemic]], start: int, arrays: _SharedArrays, pipe):
+    try:
+        envs = [env_fn() for env_fn in env_fns]
+        for index, env in enumerate(envs, start):
+            arrays.write(index, env)
+        pipe.send((True, None))
+        while True:
+            command = pipe.recv()
+            if command == STEP:
+                infos = []
+                for index, env in enumerate(envs, start):
+                    observation, reward, done, info = env.step(int(arrays.actions[index]))
+                    if done:
+                        # the episode starts over, its last observation goes with the info
+                        info["terminal_observation"] = np.array(observation, dtype=np.float32)
+                        env.reset()
+                    arrays.rewards[index] = reward
+                    arrays.dones[index] = done
+                    arrays.write(index, env)
+                    infos.append(info)
+                pipe.send((True, infos))
+            elif command == RESET:
+                for index, env in enumerate(envs, start):
+                    env.reset()
+                    arrays.dones[index] = False
+                    arrays.write(index, env)
+                pipe.send((True, None))
+            elif command == CLOSE:
+                pipe.send((True, None))
+                break
+    except KeyboardInterrupt:
+        pass
+    except Exception:
+        pipe.send((False, traceback.format_exc()))
+    finally:
+        pipe.close()
+
+
+class PandemicVectorEnv:
+    """
+    K environments made by env_fns, e.g. functools.partial(Pandemic, player_deck_shuffle_seed=i), split
+    over num_workers processes. An environment which is done is reset in the same step: the returned
+    observation is the first of its next episode and the info holds the terminal_observation.
+
+    The arrays returned by reset and step are shared with the workers and overwritten by the next call.
+    """
+
+    def __init__(
+        self,
+        env_fns: Sequence[Callable[[], Pandemic]],
+        num_workers: Optional[int] = None,
+        context: Optional[str] = None,
+    ):
+        if not env_fns:
+            raise ValueError("at least one environment is needed")
+        self.num_envs = len(env_fns)
+        self.num_workers = min(num_workers or multiprocessing.cpu_count(), self.num_envs)
+        mp_context = multiprocessing.get_context(context)
+
+        # environments have to agree on the observation and action sizes, e.g. the number of players
+        probe = env_fns[0]()
+        self.observation_size = len(probe.observation_space)
+        self.action_size = len(probe.action_space)
+        self._arrays = _SharedArrays(mp_context, self.num_envs, self.observation_size, self.action_size)
+        self.observations = self._arrays.observations
+        self.rewards = self._arrays.rewards
+        self.dones = self._arrays.dones
+        self.action_masks = self._arrays.masks
+
+        self._pipes = []
+        self._processes = []
+        self._waiting = False
+        self.closed = False
+        for chunk in np.array_split(np.arange(self.num_envs), self.num_workers):
+            parent_pipe, child_pipe = mp_context.Pipe()
+            process = mp_context.Process(
+                target=_worker,
+                args=([env_fns[i] for i in chunk], int(chunk[0]), self._arrays, child_pipe),
+                daemon=True,
+            )
+            process.start()
+            child_pipe.close()
+            self._pipes.append(parent_pipe)
+            self._processes.append(process)
+        self._receive()
+
+    def reset(self) -> np.ndarray:
+        """reset every environment, the observations of their first states"""
+        self._send(RESET)
+        self._receive()
+        return self.observations
+
+    def step_async(self, actions: Sequence[int]):
+        self._write_actions(actions)
+        self._send(STEP)
+        self._waiting = True
+
+    def step_wait(self):
+        """observations, rewards, dones and infos of the pending step"""
+        infos = sum(self._receive(), [])
+        self._waiting = False
+        return self.observations, self.rewards, self.dones, infos
+
+    def step(self, actions: Sequence[int]):
+        self.step_async(actions)
+        return self.step_wait()
+
+    def _write_actions(self, actions: Sequence[int]):
+        if len(actions) != self.num_envs:
+            raise ValueError(f"expected {self.num_envs} actions, got {len(actions)}")
+        self._arrays.actions[:] = actions
+
+    def close(self):
+        if self.closed:
+            return
+        if self._waiting:
+            self._receive()
+        self._send(CLOSE)
+        self._receive()
+        for process in self._processes:
+            process.join()
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _send(self, command: str):
+        if self.closed:
+            raise RuntimeError("the environments are closed")
+        for pipe in self._pipes:
+            pipe.send(command)
+
+    def _receive(self) -> List:
+        results = [pipe.recv() for pipe in self._pipes]
+        errors = [payload for ok, payload in results if not ok]
+        if errors:
+            self.closed = True
+            for process in self._processes:
+                process.terminate()
+            raise RuntimeError("environment worker failed:\n" + errors[0])
+        return [payload for _, payload in results]
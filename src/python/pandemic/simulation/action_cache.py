@@ -0,0 +1,90 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pandemic.simulation.compact_state import (
+    CompactState,
+    iter_bits,
+    DIRTY_STATIONS,
+    DIRTY_HANDS,
+    DIRTY_PLAYERS,
+    DIRTY_POSITIONS,
+    DIRTY_ACTIVE_PLAYER,
+    DIRTY_CUBES,
+    DIRTY_CURES,
+    DIRTY_PLAYER_DECKS,
+    DIRTY_INFECTION_DECKS,
+)
+from pandemic.simulation.model.actions import ActionInterface
+from pandemic.simulation.model.city_id import EventCard
+
+# action groups
+EVENTS = 0
+DISCARDS = 1
+MOVES = 2
+OTHERS = 3
+
+# parts of the state each group is generated from, the event actions depend on the event cards
+# on hand and are checked against them when hands change
+DEPENDENCIES = {
+    EVENTS: DIRTY_PLAYERS,
+    DISCARDS: DIRTY_HANDS | DIRTY_PLAYERS,
+    MOVES: DIRTY_HANDS | DIRTY_PLAYERS | DIRTY_POSITIONS | DIRTY_STATIONS | DIRTY_ACTIVE_PLAYER,
+    OTHERS: DIRTY_HANDS
+    | DIRTY_PLAYERS
+    | DIRTY_POSITIONS
+    | DIRTY_STATIONS
+    | DIRTY_ACTIVE_PLAYER
+    | DIRTY_CUBES
+    | DIRTY_CURES
+    | DIRTY_PLAYER_DECKS,
+}
+
+# additional dependencies of the event actions for a card on hand
+EVENT_CARD_DEPENDENCIES = {
+    EventCard.RESILIENT_POPULATION: DIRTY_INFECTION_DECKS,
+    EventCard.ONE_QUIET_NIGHT: 0,
+    EventCard.AIRLIFT: DIRTY_POSITIONS,
+    EventCard.GOVERNMENT_GRANT: DIRTY_STATIONS,
+    EventCard.FORECAST: DIRTY_INFECTION_DECKS,
+}
+
+
+class ActionCache:
+    """
+    Legal actions by group for a CompactState. A group is only regenerated after a write to
+    a part of the state it depends on, as recorded in the dirty flags of the state.
+    """
+
+    def __init__(self):
+        self._internal_state: Optional[CompactState] = None
+        self._groups: Dict[int, Tuple[Any, List[ActionInterface], int]] = {}
+        self._event_cards = 0
+
+    def refresh(self, internal_state) -> bool:
+        """drop the groups invalidated since the last refresh, False if the state can't be cached"""
+        if internal_state is not self._internal_state:
+            self._groups.clear()
+            if not isinstance(internal_state, CompactState):
+                self._internal_state = None
+                return False
+            self._internal_state = internal_state
+        elif internal_state.dirty:
+            dirty = internal_state.dirty
+            groups = self._groups
+            for group in [group for group, (_, _, dependencies) in groups.items() if dependencies & dirty]:
+                del groups[group]
+            if dirty & DIRTY_HANDS and EVENTS in groups and internal_state.event_cards_mask() != self._event_cards:
+                del groups[EVENTS]
+        internal_state.dirty = 0
+        return True
+
+    def get(self, group: int, key: Any, generate: Callable[[], List[ActionInterface]]) -> List[ActionInterface]:
+        """the cached actions of a group, generated if invalidated or cached for another key"""
+        cached = self._groups.get(group)
+        if cached is None or cached[0] != key:
+            dependencies = DEPENDENCIES[group]
+            if group == EVENTS:
+                self._event_cards = self._internal_state.event_cards_mask()
+                for card in iter_bits(self._event_cards):
+                    dependencies |= EVENT_CARD_DEPENDENCIES[card]
+            cached = self._groups[group] = (key, generate(), dependencies)
+        return cached[1]
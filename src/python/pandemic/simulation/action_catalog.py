@@ -0,0 +1,87 @@
+"""
+Catalog of every concrete action with a dense, stable integer id, so actions can be stored as two
+byte ids and looked up by indexing. Id 0 is passing, i.e. Simulation.step(None). New actions are
+only ever appended to keep stored ids valid.
+"""
+
+import itertools
+from typing import Dict, List, Optional
+
+from pandemic.simulation.model.actions import (
+    ActionInterface,
+    DriveFerry,
+    DirectFlight,
+    CharterFlight,
+    ShuttleFlight,
+    Dispatch,
+    OperationsFlight,
+    ShareKnowledge,
+    TreatDisease,
+    DiscoverCure,
+    BuildResearchStation,
+    ReserveCard,
+    MoveResearchStation,
+    Forecast,
+    GovernmentGrant,
+    Airlift,
+    ResilientPopulation,
+    OneQuietNight,
+    DiscardCard,
+    ChooseCard,
+)
+from pandemic.simulation.model.city_id import EventCard
+from pandemic.simulation.model.constants import CITY_COLORS
+from pandemic.simulation.model.enums import Character, Virus
+
+PASS = 0
+
+_CHARACTERS = sorted(Character.__members__)
+_CITIES = sorted(CITY_COLORS.keys())
+_VIRUSES = (Virus.BLUE, Virus.RED, Virus.YELLOW, Virus.BLACK)
+# cards which can be held or discarded, epidemics are resolved when drawn
+_CARDS = _CITIES + list(EventCard.__members__)
+
+
+def _enumerate_actions() -> List[Optional[ActionInterface]]:
+    actions: List[Optional[ActionInterface]] = [None]
+    for move in (DriveFerry, DirectFlight, CharterFlight, ShuttleFlight, Dispatch):
+        actions.extend(move(player, city) for player in _CHARACTERS for city in _CITIES)
+    actions.extend(
+        OperationsFlight(Character.OPERATIONS_EXPERT, destination=city, discard_card=card)
+        for city, card in itertools.product(_CITIES, _CITIES)
+    )
+    actions.extend(
+        ShareKnowledge(player, card, target_player)
+        for player, card, target_player in itertools.product(_CHARACTERS, _CITIES, _CHARACTERS)
+        if player != target_player
+    )
+    actions.extend(TreatDisease(city, virus) for city in _CITIES for virus in _VIRUSES)
+    actions.extend(DiscoverCure(virus) for virus in _VIRUSES)
+    actions.extend(BuildResearchStation(city) for city in _CITIES)
+    actions.extend(ReserveCard(card) for card in _CARDS)
+    actions.extend(MoveResearchStation(player, move_from=city) for player in _CHARACTERS for city in _CITIES)
+    actions.extend(Forecast(player=player) for player in _CHARACTERS)
+    actions.extend(GovernmentGrant(player=player, target_city=city) for player in _CHARACTERS for city in _CITIES)
+    actions.extend(
+        Airlift(player=player, target_player=target_player, destination=city)
+        for player, target_player, city in itertools.product(_CHARACTERS, _CHARACTERS, _CITIES)
+    )
+    actions.extend(ResilientPopulation(player=player, discard_city=city) for player in _CHARACTERS for city in _CITIES)
+    actions.extend(OneQuietNight(player=player) for player in _CHARACTERS)
+    actions.extend(DiscardCard(player, card) for player in _CHARACTERS for card in _CARDS)
+    actions.extend(ChooseCard(player, card) for player in _CHARACTERS for card in _CARDS)
+    return actions
+
+
+ACTIONS: List[Optional[ActionInterface]] = _enumerate_actions()
+ACTION_IDS: Dict[Optional[ActionInterface], int] = {action: action_id for action_id, action in enumerate(ACTIONS)}
+NUM_ACTION_IDS = len(ACTIONS)
+assert NUM_ACTION_IDS < 2**16, "action ids do not fit into two bytes"
+
+
+def action_id(action: Optional[ActionInterface]) -> int:
+    return ACTION_IDS[action]
+
+
+def action_of(action_id: int) -> Optional[ActionInterface]:
+    return ACTIONS[action_id]
@@ -0,0 +1,219 @@
+"""
+Legal action mask over the action_catalog ids, written into a preallocated bool buffer straight from
+the compact state buffer: moves from the neighbor masks, flights from the hand bitmasks, shuttles from
+the research station mask and so on, without creating action objects.
+"""
+
+import itertools
+
+import numpy as np
+
+from pandemic.simulation.action_catalog import ACTIONS, NUM_ACTION_IDS, PASS
+from pandemic.simulation.compact_state import (
+    CompactState,
+    CUBES,
+    NUM_VIRUSES,
+    NUM_PLAYERS,
+    PLAYER_CHARACTERS,
+    PLAYER_CITIES,
+    PLAYER_CONTINGENCY_CARDS,
+    PLAYER_SPECIAL_SHUTTLES,
+    W_HANDS,
+    W_RESEARCH_STATIONS,
+    popcount,
+)
+from pandemic.simulation.model.actions import (
+    DriveFerry,
+    DirectFlight,
+    CharterFlight,
+    ShuttleFlight,
+    Dispatch,
+    OperationsFlight,
+    ShareKnowledge,
+    TreatDisease,
+    DiscoverCure,
+    BuildResearchStation,
+    ReserveCard,
+    Forecast,
+    GovernmentGrant,
+    Airlift,
+    ResilientPopulation,
+    OneQuietNight,
+    DiscardCard,
+)
+from pandemic.simulation.model.city_id import EventCard
+from pandemic.simulation.model.constants import ALL_CITIES_MASK, CITY_CARDS_MASK, CITY_COLOR_MASKS, NEIGHBOR_MASKS
+from pandemic.simulation.model.enums import Character
+from pandemic.simulation.model.phases import Phase
+
+# index of the scratch slot after the mask, ids of impossible combinations point to it
+_NONE = NUM_ACTION_IDS
+
+
+def _id_table(action_type, key, shape) -> np.ndarray:
+    """action ids of one type indexed by key(action), _NONE where there is no action"""
+    table = np.full(shape, _NONE, dtype=np.int32)
+    for action_id, action in enumerate(ACTIONS):
+        if type(action) is action_type:
+            table[key(action)] = action_id
+    return table
+
+
+def _moves(action_type):
+    return _id_table(action_type, lambda a: (a.player, a.destination), (8, 64))
+
+
+_DRIVE_FERRY = _moves(DriveFerry)
+_DIRECT_FLIGHT = _moves(DirectFlight)
+_CHARTER_FLIGHT = _moves(CharterFlight)
+_SHUTTLE_FLIGHT = _moves(ShuttleFlight)
+_DISPATCH = _moves(Dispatch)
+_OPERATIONS_FLIGHT = _id_table(OperationsFlight, lambda a: (a.destination, a.discard_card), (64, 64))
+_SHARE_KNOWLEDGE = _id_table(ShareKnowledge, lambda a: (a.player, a.target_player, a.card), (8, 8, 64))
+_TREAT_DISEASE = _id_table(TreatDisease, lambda a: (a.city, a.target_virus), (64, 8))
+_DISCOVER_CURE = _id_table(DiscoverCure, lambda a: a.target_virus, 8)
+_BUILD_RESEARCH_STATION = _id_table(BuildResearchStation, lambda a: a.city, 64)
+_RESERVE_CARD = _id_table(ReserveCard, lambda a: a.card, 64)
+_FORECAST = _id_table(Forecast, lambda a: a.player, 8)
+_GOVERNMENT_GRANT = _id_table(GovernmentGrant, lambda a: (a.player, a.target_city), (8, 64))
+_AIRLIFT = _id_table(Airlift, lambda a: (a.player, a.target_player, a.destination), (8, 8, 64))
+_RESILIENT_POPULATION = _id_table(ResilientPopulation, lambda a: (a.player, a.discard_city), (8, 64))
+_ONE_QUIET_NIGHT = _id_table(OneQuietNight, lambda a: a.player, 8)
+_DISCARD_CARD = _id_table(DiscardCard, lambda a: (a.player, a.card), (8, 64))
+
+_CITY_BITS = np.zeros(64, dtype=bool)
+_CITY_BITS[[city for city in range(64) if ALL_CITIES_MASK >> city & 1]] = True
+
+
+def _bits(mask: int) -> np.ndarray:
+    """bool array of the 64 bits of mask"""
+    return np.unpackbits(np.frombuffer(mask.to_bytes(8, "little"), dtype=np.uint8), bitorder="little").view(bool)
+
+
+class ActionMask:
+    """
+    legal action ids of a simulation as a bool array of NUM_ACTION_IDS, equal to the ids of
+    Simulation.get_legal_action_ids. The array is reused by every call.
+    """
+
+    def __init__(self):
+        self._buffer = np.zeros(NUM_ACTION_IDS + 1, dtype=bool)
+        self.mask: np.ndarray = self._buffer[:NUM_ACTION_IDS]
+
+    def update(self, simulation) -> np.ndarray:
+        from pandemic.simulation.simulation import UNCACHED_PHASES, PASSING_PHASES
+
+        out = self._buffer
+        out[:] = False
+        state = simulation.state
+        compact = state.internal_state
+        phase = compact.phase
+        if phase in UNCACHED_PHASES or not isinstance(compact, CompactState):
+            # generating these actions changes the state, the object backend has no bitmasks
+            out[simulation.get_legal_action_ids()] = True
+            return self.mask
+
+        data = compact._bytes
+        words = compact._words
+        stations = words[W_RESEARCH_STATIONS]
+        slots = range(data[NUM_PLAYERS])
+        characters = [data[PLAYER_CHARACTERS + slot] for slot in slots]
+        cities = [data[PLAYER_CITIES + slot] for slot in slots]
+        hands = [words[W_HANDS + slot] for slot in slots]
+        cards = [
+            hand | (1 << data[PLAYER_CONTINGENCY_CARDS + slot] if data[PLAYER_CONTINGENCY_CARDS + slot] else 0)
+            for slot, hand in zip(slots, hands)
+        ]
+
+        # events
+        for slot, character in enumerate(characters):
+            if cards[slot] >> EventCard.RESILIENT_POPULATION & 1:
+                out[_RESILIENT_POPULATION[character][compact.infection_discard_pile.as_array()]] = True
+            if cards[slot] >> EventCard.AIRLIFT & 1:
+                for target, city in zip(characters, cities):
+                    out[_AIRLIFT[character, target, _CITY_BITS]] = True
+                    out[_AIRLIFT[character, target, city]] = False
+            if cards[slot] >> EventCard.FORECAST & 1 and len(compact.infection_deck) > 0:
+                out[_FORECAST[character]] = True
+            if cards[slot] >> EventCard.GOVERNMENT_GRANT & 1:
+                out[_GOVERNMENT_GRANT[character][_bits(ALL_CITIES_MASK & ~stations)]] = True
+            if cards[slot] >> EventCard.ONE_QUIET_NIGHT & 1:
+                out[_ONE_QUIET_NIGHT[character]] = True
+
+        # hand limit
+        discards = False
+        for slot, character in enumerate(characters):
+            if popcount(hands[slot]) > 7:
+                out[_DISCARD_CARD[character][_bits(cards[slot])]] = True
+                discards = True
+
+        if phase == Phase.ACTIONS and not discards:
+            active = compact.active_player
+            self._moves(out, data, stations, characters, cities, cards, active)
+            self._others(out, compact, data, stations, characters, cities, cards, active)
+
+        if phase in PASSING_PHASES and not discards or not out[:NUM_ACTION_IDS].any():
+            out[PASS] = True
+        return self.mask
+
+    @staticmethod
+    def _moves(out, data, stations, characters, cities, cards, active):
+        slot = characters.index(active)
+        city_cards = cards[slot] & CITY_CARDS_MASK
+        moved = characters if active == Character.DISPATCHER else [active]
+        for character in moved:
+            current = cities[characters.index(character)]
+            out[_DRIVE_FERRY[character][_bits(NEIGHBOR_MASKS[current])]] = True
+            out[_DIRECT_FLIGHT[character][_bits(city_cards & ~(1 << current))]] = True
+            if city_cards >> current & 1:
+                out[_CHARTER_FLIGHT[character][_bits(ALL_CITIES_MASK & ~(1 << current))]] = True
+            if stations >> current & 1:
+                out[_SHUTTLE_FLIGHT[character][_bits(stations & ~(1 << current))]] = True
+                if (
+                    active == Character.OPERATIONS_EXPERT
+                    and data[PLAYER_SPECIAL_SHUTTLES + characters.index(character)] == 1
+                ):
+                    out[_OPERATIONS_FLIGHT[np.ix_(_CITY_BITS, _bits(city_cards))]] = True
+        if active == Character.DISPATCHER:
+            for mover, target in itertools.permutations(range(len(characters)), 2):
+                out[_DISPATCH[characters[mover], cities[target]]] = True
+
+    @staticmethod
+    def _others(out, compact, data, stations, characters, cities, cards, active):
+        slot = characters.index(active)
+        current = cities[slot]
+        row = CUBES + (current - 1) * NUM_VIRUSES
+        for virus in range(1, NUM_VIRUSES + 1):
+            if data[row + virus - 1]:
+                out[_TREAT_DISEASE[current, virus]] = True
+
+        if not stations >> current & 1 and cards[slot] >> current & 1 or active == Character.OPERATIONS_EXPERT:
+            out[_BUILD_RESEARCH_STATION[current]] = True
+
+        if stations >> current & 1:
+            needed = 4 if active == Character.SCIENTIST else 5
+            for virus, mask in CITY_COLOR_MASKS.items():
+                if popcount(cards[slot] & mask) >= needed and not compact.cures[virus]:
+                    out[_DISCOVER_CURE[virus]] = True
+                    break
+
+        in_city = [other for other, city in zip(range(len(characters)), cities) if city == current]
+        if len(in_city) > 1:
+            for other in in_city:
+                if not cards[other] >> current & 1:
+                    continue
+                if other == slot:
+                    for target in in_city:
+                        if target != slot:
+                            out[_SHARE_KNOWLEDGE[active, characters[target], current]] = True
+                else:
+                    out[_SHARE_KNOWLEDGE[characters[other], active, current]] = True
+            if Character.RESEARCHER in characters and characters.index(Character.RESEARCHER) in in_city:
+                researcher = characters.index(Character.RESEARCHER)
+                city_cards = _bits(cards[researcher] & CITY_CARDS_MASK)
+                for target in in_city:
+                    if target != researcher:
+                        out[_SHARE_KNOWLEDGE[Character.RESEARCHER, characters[target]][city_cards]] = True
+
+        if active == Character.CONTINGENCY_PLANNER and not data[PLAYER_CONTINGENCY_CARDS + slot]:
+            out[_RESERVE_CARD[compact.player_discard_pile.as_array()]] = True
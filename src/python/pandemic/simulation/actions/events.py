@@ -14,7 +14,7 @@ from pandemic.simulation.model.actions import (
 )
 from pandemic.simulation.model.city_id import EventCard
 from pandemic.simulation.model.enums import Character
-from pandemic.simulation.model.phases import ChooseCardsPhase, Phase
+from pandemic.simulation.model.phases import ChooseCardsPhase, Phase, choose_cards_after
 from pandemic.simulation.state import State, CITY_DATA
 
 
@@ -47,7 +47,7 @@ def get_possible_event_actions(state: State) -> List[Event]:
         return []
     elif state.phase == Phase.MOVE_STATION:
         return [
-            MoveResearchStation(state.active_player, move_from=c)
+            MoveResearchStation(state.active_player, c)
             for c, s in state.cities.items()
             if s.has_research_station() and not c == state.last_build_research_station
         ]
@@ -73,17 +73,18 @@ def __action_for_event_card(state: State, character: Character, event_card: Even
         return __airlift(state, character)
 
     if event_card == EventCard.FORECAST:
-        return [Forecast(player=character)] if len(state.infection_deck) > 0 else []
+        return [Forecast(character)] if len(state.infection_deck) > 0 else []
 
     if event_card == EventCard.GOVERNMENT_GRANT:
         return __government_grant(state, character)
 
     if event_card == EventCard.ONE_QUIET_NIGHT:
-        return [OneQuietNight(player=character)]
+        return [OneQuietNight(character)]
 
 
+@choose_cards_after(1)
 def __forecast_after(s, _, c):
-    s.infection_deck[:6] = c
+    s.infection_deck.reorder_top(c)
 
 
 def __init_forecast(state: State):
@@ -101,8 +102,9 @@ def __init_forecast(state: State):
     state.start_choose_cards_phase(ccp)
 
 
+@choose_cards_after(2)
 def __cure_virus_after(state, p, cards):
-    state.cures[state.virus_to_cure] = True
+    state.cure(state.virus_to_cure)
     for card in cards:
         state.play_card(p, card)
     medic = state.players.get(Character.MEDIC, None)
@@ -129,20 +131,16 @@ def __init_cure_virus(state: State):
 
 def __resilient_population(state: State, character: Character) -> List[Event]:
     # TODO: split in two phases
-    return [ResilientPopulation(player=character, discard_city=card) for card in state.infection_discard_pile]
+    return [ResilientPopulation(character, card) for card in state.infection_discard_pile]
 
 
 def __airlift(state: State, character: Character) -> List[Event]:
     return [
-        Airlift(player=character, target_player=p, destination=city)
+        Airlift(character, p, city)
         for city, (p, c) in itertools.product(state.cities.keys(), state.players.items())
         if c.city != city
     ]
 
 
 def __government_grant(state: State, character: Character) -> List[Event]:
-    return [
-        GovernmentGrant(player=character, target_city=city)
-        for city, s in state.cities.items()
-        if not s.has_research_station()
-    ]
+    return [GovernmentGrant(character, city) for city, s in state.cities.items() if not s.has_research_station()]
@@ -95,8 +95,7 @@ def __possible_moves(state: State, character: Character, city_cards: Set[City])
     ):
         cities = state.cities.keys()
         operation_flights = [
-            OperationsFlight(character, destination=city, discard_card=card)
-            for city, card in itertools.product(cities, player_state.city_cards)
+            OperationsFlight(character, city, card) for city, card in itertools.product(cities, player_state.city_cards)
         ]
 
     return moves + direct_flights + charter_flights + shuttle_flights + operation_flights
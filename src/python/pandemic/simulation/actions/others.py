@@ -55,9 +55,7 @@ def get_possible_other_actions(state: State, character: Character = None) -> Lis
 
     # What is treatable?
     possible_actions.extend(
-        TreatDisease(current_city, target_virus=virus)
-        for virus, count in current_city_state.viral_state.items()
-        if count > 0
+        TreatDisease(current_city, virus) for virus, count in current_city_state.viral_state.items() if count > 0
     )
 
     # Can I build research station?
@@ -76,7 +74,7 @@ def get_possible_other_actions(state: State, character: Character = None) -> Lis
         append = possible_actions.append
         for virus, count in Counter(player_card_viruses).items():
             if count >= cards_for_cure and not state.cures[virus]:
-                append(DiscoverCure(target_virus=virus))
+                append(DiscoverCure(virus))
                 break
 
     # Can I share knowledge?
@@ -87,7 +85,7 @@ def get_possible_other_actions(state: State, character: Character = None) -> Lis
         researcher = players_in_city.get(Character.RESEARCHER, {})
         if researcher:
             possible_actions.extend(
-                ShareKnowledge(Character.RESEARCHER, card, target_player=other)
+                ShareKnowledge(Character.RESEARCHER, card, other)
                 for other, card in itertools.product(
                     (other for other in players_in_city.keys() if other != Character.RESEARCHER), researcher.city_cards
                 )
@@ -122,14 +120,14 @@ def __add_knowlegde_sharing(character, current_character, current_city, players_
     if character == current_character:
         # give card to other player
         share_with_others = list(
-            ShareKnowledge(card=current_city, player=current_character, target_player=other)
+            ShareKnowledge(current_character, current_city, other)
             for other in players_in_city.keys()
             if other != current_character
         )
         possible_actions.extend(share_with_others)
     else:
         # get card from other player
-        possible_actions.append(ShareKnowledge(card=current_city, player=character, target_player=current_character))
+        possible_actions.append(ShareKnowledge(character, current_city, current_character))
 
 
 def throw_card_action(state: State, action: DiscardCard):
@@ -0,0 +1,1156 @@
+"""
+Struct-of-arrays representation of the internal game state.
+
+The whole state lives in one fixed size bytearray: copying a state is a single buffer copy and a
+snapshot is just the bytes. Views on top of the buffer expose the same attribute API as
+InternalState, so a CompactState can be used as `State.internal_state`.
+"""
+
+import struct
+import sys
+from collections import defaultdict
+from collections.abc import Mapping, MutableMapping, MutableSequence, MutableSet
+from typing import Dict, List, Optional, Iterator, Iterable, Tuple, Any
+
+import numpy as np
+
+from pandemic.simulation.model import constants
+from pandemic.simulation.model.city_id import Card, City
+from pandemic.simulation.model.citystate import CityState
+from pandemic.simulation.model.deck import Deck
+from pandemic.simulation.model.enums import Character, Virus
+from pandemic.simulation.model.phases import ChooseCardsPhase, CHOOSE_CARDS_AFTER
+from pandemic.simulation.model.playerstate import PlayerState
+
+MAX_PLAYERS = 4
+NUM_CITIES = 48
+NUM_VIRUSES = 4
+
+PLAYER_DECK_CAPACITY = 64
+INFECTION_DECK_CAPACITY = NUM_CITIES
+CHOSEN_CARDS_CAPACITY = 6
+
+# iteration order of the dicts in InternalState
+CUBES_ORDER = (Virus.YELLOW, Virus.BLACK, Virus.BLUE, Virus.RED)
+VIRAL_STATE_ORDER = (Virus.BLUE, Virus.RED, Virus.YELLOW, Virus.BLACK)
+
+# 64 bit words
+W_RESEARCH_STATIONS = 0
+W_HANDS = 1
+W_CARDS_TO_CHOOSE_FROM = W_HANDS + MAX_PLAYERS
+# zobrist hash of the rest of the buffer without the steps
+W_ZOBRIST = W_CARDS_TO_CHOOSE_FROM + 1
+NUM_WORDS = W_ZOBRIST + 1
+
+STEPS = NUM_WORDS * 8
+
+# single bytes
+CUBES = STEPS + 4
+PHASE = CUBES + NUM_CITIES * NUM_VIRUSES
+PREVIOUS_PHASE = PHASE + 1
+ACTIVE_PLAYER = PREVIOUS_PHASE + 1
+RESEARCH_STATIONS = ACTIVE_PLAYER + 1
+OUTBREAKS = RESEARCH_STATIONS + 1
+INFECTION_RATE_MARKER = OUTBREAKS + 1
+CUBE_SUPPLY = INFECTION_RATE_MARKER + 1
+ACTIONS_LEFT = CUBE_SUPPLY + NUM_VIRUSES
+CURES = ACTIONS_LEFT + 1
+ONE_QUIET_NIGHT = CURES + NUM_VIRUSES
+DRAWN_CARDS = ONE_QUIET_NIGHT + 1
+INFECTIONS_STEPS = DRAWN_CARDS + 1
+LAST_BUILD_RESEARCH_STATION = INFECTIONS_STEPS + 1
+VIRUS_TO_CURE = LAST_BUILD_RESEARCH_STATION + 1
+GAME_STATE = VIRUS_TO_CURE + 1
+NUM_PLAYERS = GAME_STATE + 1
+
+# choose cards phase
+CCP_ACTIVE = NUM_PLAYERS + 1
+CCP_NEXT_PHASE = CCP_ACTIVE + 1
+CCP_COUNT = CCP_NEXT_PHASE + 1
+CCP_PLAYER = CCP_COUNT + 1
+CCP_AFTER = CCP_PLAYER + 1
+CCP_NUM_CHOSEN = CCP_AFTER + 1
+CCP_CHOSEN = CCP_NUM_CHOSEN + 1
+
+# players by slot
+PLAYER_CHARACTERS = CCP_CHOSEN + CHOSEN_CARDS_CAPACITY
+PLAYER_CITIES = PLAYER_CHARACTERS + MAX_PLAYERS
+PLAYER_CONTINGENCY_CARDS = PLAYER_CITIES + MAX_PLAYERS
+PLAYER_SPECIAL_SHUTTLES = PLAYER_CONTINGENCY_CARDS + MAX_PLAYERS
+
+# decks: one length byte followed by the cards, discard piles top card first and draw piles top card last
+PLAYER_DECK = PLAYER_SPECIAL_SHUTTLES + MAX_PLAYERS
+PLAYER_DISCARD_PILE = PLAYER_DECK + 1 + PLAYER_DECK_CAPACITY
+INFECTION_DECK = PLAYER_DISCARD_PILE + 1 + PLAYER_DECK_CAPACITY
+INFECTION_DISCARD_PILE = INFECTION_DECK + 1 + INFECTION_DECK_CAPACITY
+
+STATE_SIZE = INFECTION_DISCARD_PILE + 1 + INFECTION_DECK_CAPACITY
+
+# binary records: magic, format version and state size followed by the buffer. The phase state is
+# stored as data, its callback by CHOOSE_CARDS_AFTER id. Bump the version with every layout change.
+# The words and the step counter of the buffer are little endian: they are read through native
+# memoryview casts, so records are only written and read on little endian hosts.
+FORMAT_VERSION = 1
+RECORD_MAGIC = b"PNDS"
+RECORD_HEADER = struct.Struct("<4sHH")
+
+# dirty flags, every write sets the flag of the part of the buffer it touches
+DIRTY_STATIONS = 1
+DIRTY_HANDS = 2
+DIRTY_PLAYERS = 4
+DIRTY_ACTIVE_PLAYER = 8
+DIRTY_PHASE = 16
+DIRTY_CUBES = 32
+DIRTY_CURES = 64
+DIRTY_COUNTERS = 128
+DIRTY_PLAYER_DECKS = 256
+DIRTY_INFECTION_DECKS = 512
+DIRTY_POSITIONS = 1024
+DIRTY_ALL = 2047
+
+_DIRTY_WORDS = [DIRTY_STATIONS] + [DIRTY_HANDS] * MAX_PLAYERS + [DIRTY_PHASE, 0]
+_DIRTY_REGIONS = (
+    (0, W_HANDS * 8, DIRTY_STATIONS),
+    (W_HANDS * 8, W_CARDS_TO_CHOOSE_FROM * 8, DIRTY_HANDS),
+    (W_CARDS_TO_CHOOSE_FROM * 8, W_ZOBRIST * 8, DIRTY_PHASE),
+    (CUBES, PHASE, DIRTY_CUBES),
+    (PHASE, ACTIVE_PLAYER, DIRTY_PHASE),
+    (ACTIVE_PLAYER, RESEARCH_STATIONS, DIRTY_ACTIVE_PLAYER),
+    (RESEARCH_STATIONS, OUTBREAKS, DIRTY_STATIONS),
+    (OUTBREAKS, ACTIONS_LEFT, DIRTY_COUNTERS),
+    (ACTIONS_LEFT, CURES, DIRTY_PHASE),
+    (CURES, ONE_QUIET_NIGHT, DIRTY_CURES),
+    (ONE_QUIET_NIGHT, NUM_PLAYERS, DIRTY_PHASE),
+    (NUM_PLAYERS, CCP_ACTIVE, DIRTY_PLAYERS),
+    (CCP_ACTIVE, PLAYER_CHARACTERS, DIRTY_PHASE),
+    (PLAYER_CHARACTERS, PLAYER_CITIES, DIRTY_PLAYERS),
+    (PLAYER_CITIES, PLAYER_CONTINGENCY_CARDS, DIRTY_POSITIONS),
+    (PLAYER_CONTINGENCY_CARDS, PLAYER_DECK, DIRTY_PLAYERS),
+    (PLAYER_DECK, INFECTION_DECK, DIRTY_PLAYER_DECKS),
+    (INFECTION_DECK, STATE_SIZE, DIRTY_INFECTION_DECKS),
+)
+_DIRTY_BYTES = [0] * STATE_SIZE
+for _start, _end, _flag in _DIRTY_REGIONS:
+    _DIRTY_BYTES[_start:_end] = [_flag] * (_end - _start)
+# bits of the buffer read as one little endian int covered by each flag
+_DIRTY_REGION_MASKS = [
+    (sum(((1 << 8 * (end - start)) - 1) << 8 * start for start, end, f in _DIRTY_REGIONS if f == flag), flag)
+    for flag in sorted({flag for _, _, flag in _DIRTY_REGIONS})
+]
+
+# zobrist keys: one per bit of the bitmask words and one per byte and value after the steps,
+# the key of value 0 is 0 so the hash of an empty buffer is 0
+_zobrist_random = np.random.default_rng(0x5EED)
+_ZOBRIST_BIT_KEYS = _zobrist_random.integers(0, 2**64, W_ZOBRIST * 64, dtype=np.uint64, endpoint=False)
+_ZOBRIST_BYTE_KEYS = _zobrist_random.integers(0, 2**64, (STATE_SIZE, 64), dtype=np.uint64, endpoint=False)
+_ZOBRIST_BYTE_KEYS[:CUBES] = 0
+_ZOBRIST_BYTE_KEYS[:, 0] = 0
+_ZOBRIST_WORDS = _ZOBRIST_BIT_KEYS.reshape(W_ZOBRIST, 64).tolist()
+_ZOBRIST_BYTES = _ZOBRIST_BYTE_KEYS.tolist()
+
+
+def zobrist_hash(buffer: bytes) -> int:
+    """zobrist hash of a compact state buffer computed from scratch"""
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    bits = np.unpackbits(data[: W_ZOBRIST * 8], bitorder="little").astype(bool)
+    values = data.astype(np.int64)
+    values[:CUBES] = 0
+    return int(
+        np.bitwise_xor.reduce(_ZOBRIST_BIT_KEYS[bits])
+        ^ np.bitwise_xor.reduce(_ZOBRIST_BYTE_KEYS[np.arange(STATE_SIZE), values])
+    )
+
+
+def snapshot_hash(blob: bytes) -> int:
+    """zobrist hash stored in a snapshot"""
+    return memoryview(blob)[W_ZOBRIST * 8 : NUM_WORDS * 8].cast("Q")[0]
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def popcount(mask: int) -> int:
+    return bin(mask).count("1")
+
+
+def cards_mask(cards: Iterable[Card]) -> int:
+    mask = 0
+    for card in cards:
+        mask |= 1 << card
+    return mask
+
+
+class _ByteMapView(MutableMapping):
+    """dict like view of one byte per key, e.g. the cube supply per virus"""
+
+    __slots__ = ("_state", "_offsets", "_as_bool")
+
+    def __init__(self, state: "CompactState", offsets: Dict[int, int], as_bool: bool = False):
+        self._state = state
+        self._offsets = offsets
+        self._as_bool = as_bool
+
+    def __getitem__(self, key: int):
+        value = self._state._bytes[self._offsets[key]]
+        return value != 0 if self._as_bool else value
+
+    def __setitem__(self, key: int, value: int):
+        self._state._set8(self._offsets[key], int(value))
+
+    def __delitem__(self, key: int):
+        raise TypeError("keys of a compact state view can not be deleted")
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._offsets)
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class _CardSetView(MutableSet):
+    """set like view of a card bitmask"""
+
+    __slots__ = ("_state", "_word")
+
+    def __init__(self, state: "CompactState", word: int):
+        self._state = state
+        self._word = word
+
+    def __contains__(self, card) -> bool:
+        return card > 0 and self._state._words[self._word] >> card & 1 == 1
+
+    def __iter__(self) -> Iterator[int]:
+        return iter_bits(self._state._words[self._word])
+
+    def __len__(self) -> int:
+        return popcount(self._state._words[self._word])
+
+    def add(self, card: Card):
+        self._state._set64(self._word, self._state._words[self._word] | 1 << card)
+
+    def discard(self, card: Card):
+        self._state._set64(self._word, self._state._words[self._word] & ~(1 << card))
+
+    def __repr__(self):
+        return repr(set(self))
+
+
+class DeckView(MutableSequence):
+    """list like view of a fixed size card array, top card first"""
+
+    __slots__ = ("_state", "_offset", "_capacity")
+
+    def __init__(self, state: "CompactState", offset: int, capacity: int):
+        self._state = state
+        self._offset = offset
+        self._capacity = capacity
+
+    def _cards(self) -> List[Card]:
+        start = self._offset + 1
+        return list(self._state._bytes[start : start + self._state._bytes[self._offset]])
+
+    def _write(self, cards: List[Card]):
+        if len(cards) > self._capacity:
+            raise ValueError("deck capacity exceeded")
+        # unused slots stay zero so equal decks are equal bytes
+        self._state._set_slice(self._offset + 1, bytes(cards) + bytes(self._capacity - len(cards)))
+        self._state._set8(self._offset, len(cards))
+
+    def as_array(self) -> np.ndarray:
+        return np.frombuffer(self._state._bytes, dtype=np.uint8, count=len(self), offset=self._offset + 1)
+
+    def __len__(self) -> int:
+        return self._state._bytes[self._offset]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._cards()[index]
+        length = self._state._bytes[self._offset]
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("deck index out of range")
+        return self._state._bytes[self._offset + 1 + index]
+
+    def __setitem__(self, index, value):
+        cards = self._cards()
+        cards[index] = value
+        self._write(cards)
+
+    def __delitem__(self, index):
+        cards = self._cards()
+        del cards[index]
+        self._write(cards)
+
+    def __iter__(self) -> Iterator[Card]:
+        return iter(self._cards())
+
+    def __eq__(self, other) -> bool:
+        try:
+            return self._cards() == list(other)
+        except TypeError:
+            return NotImplemented
+
+    def __add__(self, other) -> List[Card]:
+        return self._cards() + list(other)
+
+    def __radd__(self, other) -> List[Card]:
+        return list(other) + self._cards()
+
+    def __repr__(self):
+        return repr(self._cards())
+
+    def insert(self, index: int, card: Card):
+        cards = self._cards()
+        cards.insert(index, card)
+        self._write(cards)
+
+    def append(self, card: Card):
+        length = self._state._bytes[self._offset]
+        if length == self._capacity:
+            raise ValueError("deck capacity exceeded")
+        self._state._set8(self._offset + 1 + length, card)
+        self._state._set8(self._offset, length + 1)
+
+    def pop(self, index: int = -1) -> Card:
+        length = self._state._bytes[self._offset]
+        if length == 0:
+            raise IndexError("pop from empty deck")
+        if index == -1 or index == length - 1:
+            card = self._state._bytes[self._offset + length]
+            self._state._set8(self._offset + length, 0)
+            self._state._set8(self._offset, length - 1)
+            return card
+        cards = self._cards()
+        card = cards.pop(index)
+        self._write(cards)
+        return card
+
+    def clear(self):
+        self._write([])
+
+    def copy(self) -> List[Card]:
+        return self._cards()
+
+
+class DrawPileView(DeckView):
+    """
+    deck view of a draw pile, stored top card last so drawing and putting cards on top leave the other
+    slots alone. Same interface as Deck.
+    """
+
+    __slots__ = ()
+
+    def _cards(self) -> List[Card]:
+        start = self._offset + 1
+        return list(self._state._bytes[start : start + self._state._bytes[self._offset]])[::-1]
+
+    def _write(self, cards: List[Card]):
+        super()._write(cards[::-1])
+
+    def as_array(self) -> np.ndarray:
+        return super().as_array()[::-1]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._cards()[index]
+        length = self._state._bytes[self._offset]
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("deck index out of range")
+        return self._state._bytes[self._offset + length - index]
+
+    def draw(self) -> Card:
+        length = self._state._bytes[self._offset]
+        if length == 0:
+            raise IndexError("draw from empty deck")
+        card = self._state._bytes[self._offset + length]
+        self._state._set8(self._offset + length, 0)
+        self._state._set8(self._offset, length - 1)
+        return card
+
+    def draw_bottom(self) -> Card:
+        cards = self._cards()
+        card = cards.pop()
+        self._write(cards)
+        return card
+
+    def put_on_top(self, cards: List[Card]):
+        length = self._state._bytes[self._offset]
+        if length + len(cards) > self._capacity:
+            raise ValueError("deck capacity exceeded")
+        self._state._set_slice(self._offset + 1 + length, bytes(list(cards)[::-1]))
+        self._state._set8(self._offset, length + len(cards))
+
+    def reorder_top(self, cards: List[Card]):
+        length = self._state._bytes[self._offset]
+        if len(cards) > length:
+            raise ValueError("more cards than in the deck")
+        self._state._set_slice(self._offset + 1 + length - len(cards), bytes(list(cards)[::-1]))
+
+    def intensify(self, discard_pile: List[Card], random):
+        cards = list(discard_pile)
+        random.shuffle(cards)
+        self.put_on_top(cards)
+        discard_pile.clear()
+
+    def pop(self, index: int = -1) -> Card:
+        if index == 0:
+            return self.draw()
+        cards = self._cards()
+        card = cards.pop(index)
+        self._write(cards)
+        return card
+
+    def insert(self, index: int, card: Card):
+        if index == 0:
+            self.put_on_top([card])
+        else:
+            super().insert(index, card)
+
+    def append(self, card: Card):
+        cards = self._cards()
+        cards.append(card)
+        self._write(cards)
+
+
+class _ViralStateView(MutableMapping):
+    """cubes of one city by virus"""
+
+    __slots__ = ("_state", "_offset")
+
+    def __init__(self, state: "CompactState", offset: int):
+        self._state = state
+        self._offset = offset
+
+    def __getitem__(self, virus: int) -> int:
+        if not 0 < virus <= NUM_VIRUSES:
+            raise KeyError(virus)
+        return self._state._bytes[self._offset + virus - 1]
+
+    def __setitem__(self, virus: int, value: int):
+        if not 0 < virus <= NUM_VIRUSES:
+            raise KeyError(virus)
+        self._state._set8(self._offset + virus - 1, value)
+
+    def __delitem__(self, virus: int):
+        raise TypeError("viruses of a compact city view can not be deleted")
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(VIRAL_STATE_ORDER)
+
+    def __len__(self) -> int:
+        return NUM_VIRUSES
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class CityView:
+    """CityState API on top of a compact state"""
+
+    __slots__ = ("_state", "_city", "_viral_state")
+
+    def __init__(self, state: "CompactState", city: City):
+        self._state = state
+        self._city = city
+        self._viral_state = _ViralStateView(state, CUBES + (city - 1) * NUM_VIRUSES)
+
+    @property
+    def viral_state(self) -> MutableMapping:
+        return self._viral_state
+
+    @viral_state.setter
+    def viral_state(self, value: Dict[int, int]):
+        # assigning cubes writes them into the state, like CityState keeps the dict
+        self._viral_state.update(value)
+
+    @property
+    def research_station(self) -> bool:
+        return self.has_research_station()
+
+    def inc_infection(self, color: Virus) -> bool:
+        index = CUBES + (self._city - 1) * NUM_VIRUSES + color - 1
+        count = self._state._bytes[index]
+        if count < 3:
+            self._state._set8(index, count + 1)
+            return False
+        # outbreak!
+        return True
+
+    def dec_infection(self, color: Virus) -> bool:
+        index = CUBES + (self._city - 1) * NUM_VIRUSES + color - 1
+        count = self._state._bytes[index]
+        if count > 0:
+            self._state._set8(index, count - 1)
+            return False
+        # treated
+        return True
+
+    def format_infection_state(self) -> str:
+        return CityState(viral_state=dict(self.viral_state.items())).format_infection_state()
+
+    def has_research_station(self) -> bool:
+        return self._state._words[W_RESEARCH_STATIONS] >> self._city & 1 == 1
+
+    def build_research_station(self):
+        self._state._set64(W_RESEARCH_STATIONS, self._state._words[W_RESEARCH_STATIONS] | 1 << self._city)
+
+    def remove_research_station(self):
+        self._state._set64(W_RESEARCH_STATIONS, self._state._words[W_RESEARCH_STATIONS] & ~(1 << self._city))
+
+
+class _CitiesView(Mapping):
+    __slots__ = ("_state",)
+
+    def __init__(self, state: "CompactState"):
+        self._state = state
+
+    def __getitem__(self, city: City) -> CityView:
+        if not 0 < city <= NUM_CITIES:
+            raise KeyError(city)
+        return CityView(self._state, city)
+
+    def __iter__(self) -> Iterator[City]:
+        return iter(City.__members__)
+
+    def __len__(self) -> int:
+        return NUM_CITIES
+
+
+class PlayerView:
+    """PlayerState API on top of one player slot of a compact state"""
+
+    __slots__ = ("_state", "_slot")
+
+    def __init__(self, state: "CompactState", slot: int):
+        self._state = state
+        self._slot = slot
+
+    @property
+    def _hand(self) -> int:
+        return self._state._words[W_HANDS + self._slot]
+
+    @property
+    def city(self) -> City:
+        return self._state._bytes[PLAYER_CITIES + self._slot]
+
+    @city.setter
+    def city(self, value: City):
+        self._state._set8(PLAYER_CITIES + self._slot, value)
+
+    @property
+    def cards(self) -> set:
+        return self.city_cards | self.event_cards
+
+    @cards.setter
+    def cards(self, value):
+        self.clear_cards()
+        self.add_cards(list(value))
+
+    @property
+    def city_cards(self) -> set:
+        cards = set(iter_bits(self._hand & constants.CITY_CARDS_MASK))
+        contingency = self._state._bytes[PLAYER_CONTINGENCY_CARDS + self._slot]
+        if contingency and Card.card_type(contingency) == Card.CITY:
+            cards.add(contingency)
+        return cards
+
+    @property
+    def event_cards(self) -> set:
+        cards = set(iter_bits(self._hand & constants.EVENT_CARDS_MASK))
+        contingency = self._state._bytes[PLAYER_CONTINGENCY_CARDS + self._slot]
+        if contingency and Card.card_type(contingency) == Card.EVENT:
+            cards.add(contingency)
+        return cards
+
+    @property
+    def city_colors(self) -> Dict[Virus, int]:
+        hand = self._hand
+        contingency = self._state._bytes[PLAYER_CONTINGENCY_CARDS + self._slot]
+        colors = {}
+        for virus, mask in constants.CITY_COLOR_MASKS.items():
+            count = popcount(hand & mask) + (contingency != 0 and mask >> contingency & 1)
+            if count:
+                colors[virus] = count
+        return colors
+
+    @property
+    def contingency_planner_card(self) -> Optional[Card]:
+        card = self._state._bytes[PLAYER_CONTINGENCY_CARDS + self._slot]
+        return card if card else None
+
+    @contingency_planner_card.setter
+    def contingency_planner_card(self, value: Optional[Card]):
+        self._state._set8(PLAYER_CONTINGENCY_CARDS + self._slot, value if value else 0)
+
+    def add_card(self, card: Card):
+        if Card.card_type(card) != Card.EPIDEMIC:
+            self._state._set64(W_HANDS + self._slot, self._hand | 1 << card)
+
+    def add_cards(self, cards: List[Card]):
+        [self.add_card(card) for card in cards]
+
+    def clear_cards(self):
+        self._state._set64(W_HANDS + self._slot, 0)
+        self._state._set8(PLAYER_CONTINGENCY_CARDS + self._slot, 0)
+
+    def remove_card(self, card: Card) -> Optional[bool]:
+        hand = self._hand
+        if hand >> card & 1:
+            self._state._set64(W_HANDS + self._slot, hand & ~(1 << card))
+            return True
+        if card == self._state._bytes[PLAYER_CONTINGENCY_CARDS + self._slot]:
+            self._state._set8(PLAYER_CONTINGENCY_CARDS + self._slot, 0)
+            return False
+        if Card.card_type(card) != Card.CITY:
+            raise KeyError
+        return None
+
+    def num_cards(self) -> int:
+        return popcount(self._hand)
+
+    def used_operations_expert_shuttle_move(self):
+        self._state._set8(PLAYER_SPECIAL_SHUTTLES + self._slot, 0)
+
+    def signal_turn_end(self):
+        self._state._set8(PLAYER_SPECIAL_SHUTTLES + self._slot, 1)
+
+    def operations_expert_has_charter_flight(self) -> bool:
+        return self._state._bytes[PLAYER_SPECIAL_SHUTTLES + self._slot] == 1
+
+    def cards_to_string(self) -> str:
+        return " ".join(map(lambda x: str(x), self.cards))
+
+
+class _PlayersView(Mapping):
+    """players by character in the order of their slots"""
+
+    __slots__ = ("_state",)
+
+    def __init__(self, state: "CompactState"):
+        self._state = state
+
+    def _slot(self, character: Character) -> int:
+        data = self._state._bytes
+        for slot in range(data[NUM_PLAYERS]):
+            if data[PLAYER_CHARACTERS + slot] == character:
+                return slot
+        raise KeyError(character)
+
+    def __getitem__(self, character: Character) -> PlayerView:
+        return PlayerView(self._state, self._slot(character))
+
+    def __contains__(self, character) -> bool:
+        data = self._state._bytes
+        return character in data[PLAYER_CHARACTERS : PLAYER_CHARACTERS + data[NUM_PLAYERS]]
+
+    def __iter__(self) -> Iterator[Character]:
+        data = self._state._bytes
+        return iter(list(data[PLAYER_CHARACTERS : PLAYER_CHARACTERS + data[NUM_PLAYERS]]))
+
+    def __len__(self) -> int:
+        return self._state._bytes[NUM_PLAYERS]
+
+
+class ChooseCardsPhaseView:
+    """ChooseCardsPhase API on top of a compact state"""
+
+    __slots__ = ("_state", "cards_to_choose_from")
+
+    def __init__(self, state: "CompactState"):
+        self._state = state
+        self.cards_to_choose_from = _CardSetView(state, W_CARDS_TO_CHOOSE_FROM)
+
+    @property
+    def next_phase(self) -> int:
+        return self._state._bytes[CCP_NEXT_PHASE]
+
+    @property
+    def count(self) -> int:
+        return self._state._bytes[CCP_COUNT]
+
+    @property
+    def player(self) -> Character:
+        return self._state._bytes[CCP_PLAYER]
+
+    @property
+    def after(self):
+        return CHOOSE_CARDS_AFTER[self._state._bytes[CCP_AFTER]]
+
+    @property
+    def chosen_cards(self) -> List[Card]:
+        data = self._state._bytes
+        return list(data[CCP_CHOSEN : CCP_CHOSEN + data[CCP_NUM_CHOSEN]])
+
+    def add_chosen_card(self, card: Card):
+        chosen = self._state._bytes[CCP_NUM_CHOSEN]
+        if chosen == CHOSEN_CARDS_CAPACITY:
+            raise ValueError("too many chosen cards")
+        self._state._set8(CCP_CHOSEN + chosen, card)
+        self._state._set8(CCP_NUM_CHOSEN, chosen + 1)
+
+    def call_after(self, state):
+        self.after(state, self.player, self.chosen_cards)
+
+    def to_phase(self) -> ChooseCardsPhase:
+        ccp = ChooseCardsPhase(
+            next_phase=self.next_phase,
+            cards_to_choose_from=set(self.cards_to_choose_from),
+            count=self.count,
+            player=self.player,
+            after=self.after,
+        )
+        [ccp.add_chosen_card(card) for card in self.chosen_cards]
+        return ccp
+
+
+def _byte_property(offset: int):
+    def getter(self) -> int:
+        return self._bytes[offset]
+
+    def setter(self, value: int):
+        self._set8(offset, value)
+
+    return property(getter, setter)
+
+
+def _bool_property(offset: int):
+    def getter(self) -> bool:
+        return self._bytes[offset] != 0
+
+    def setter(self, value: bool):
+        self._set8(offset, 1 if value else 0)
+
+    return property(getter, setter)
+
+
+class CompactState:
+    """
+    InternalState as one flat buffer: 48x4 cube counts, research stations and hands as card bitmasks,
+    decks as fixed size card arrays.
+    """
+
+    __slots__ = ("_bytes", "_words", "_steps", "journal", "dirty")
+
+    def __init__(self, buffer: Optional[bytes] = None):
+        if buffer is None:
+            buffer = bytes(STATE_SIZE)
+        elif len(buffer) != STATE_SIZE:
+            raise ValueError(f"compact state needs {STATE_SIZE} bytes, got {len(buffer)}")
+        self._bytes = bytearray(buffer)
+        view = memoryview(self._bytes)
+        self._words = view[: NUM_WORDS * 8].cast("Q")
+        self._steps = view[STEPS : STEPS + 4].cast("I")
+        # if set, every write appends (buffer, index, old value) so it can be reverted
+        self.journal: Optional[List[Tuple[Any, Any, Any]]] = None
+        # DIRTY_* flags of the parts written since the owner last cleared them, writes through
+        # cube_array are not tracked
+        self.dirty = DIRTY_ALL
+
+    ###########
+    # buffer  #
+    ###########
+
+    def _set8(self, index: int, value: int):
+        old = self._bytes[index]
+        if self.journal is not None:
+            self.journal.append((self._bytes, index, old))
+        self.dirty |= _DIRTY_BYTES[index]
+        keys = _ZOBRIST_BYTES[index]
+        self._words[W_ZOBRIST] ^= keys[old] ^ keys[value]
+        self._bytes[index] = value
+
+    def _set64(self, word: int, value: int):
+        words = self._words
+        old = words[word]
+        if self.journal is not None:
+            self.journal.append((words, word, old))
+        self.dirty |= _DIRTY_WORDS[word]
+        keys = _ZOBRIST_WORDS[word]
+        zobrist = words[W_ZOBRIST]
+        # cards may be numpy ints
+        for bit in iter_bits(old ^ int(value)):
+            zobrist ^= keys[bit]
+        words[W_ZOBRIST] = zobrist
+        words[word] = value
+
+    def _set_slice(self, start: int, values: bytes):
+        index = slice(start, start + len(values))
+        if self.journal is not None:
+            self.journal.append((self._bytes, index, bytes(self._bytes[index])))
+        # slices are deck writes within one part or a load of the whole buffer, which brings its hash
+        if len(values) == STATE_SIZE:
+            self.dirty |= self._changed(values)
+        else:
+            self.dirty |= _DIRTY_BYTES[start]
+            zobrist = self._words[W_ZOBRIST]
+            for keys, old, new in zip(_ZOBRIST_BYTES[index], self._bytes[index], values):
+                if old != new:
+                    zobrist ^= keys[old] ^ keys[new]
+            self._words[W_ZOBRIST] = zobrist
+        self._bytes[index] = values
+
+    def _changed(self, buffer: bytes) -> int:
+        """dirty flags of the parts in which buffer differs from this state"""
+        if self._bytes == buffer:
+            return 0
+        difference = int.from_bytes(self._bytes, "little") ^ int.from_bytes(buffer, "little")
+        dirty = 0
+        for mask, flag in _DIRTY_REGION_MASKS:
+            if difference & mask:
+                dirty |= flag
+        return dirty
+
+    def track(self, journal: Optional[List[Tuple[Any, Any, Any]]]):
+        """
+        journal the following writes. A new journal starts with the zobrist hash, which every write keeps
+        up to date incrementally, so reverting it restores the hash as well.
+        """
+        if journal is not None and not journal:
+            journal.append((self._words, W_ZOBRIST, self._words[W_ZOBRIST]))
+        self.journal = journal
+
+    def revert(self, journal: List[Tuple[Any, Any, Any]]):
+        """undo the writes recorded in a journal, newest first"""
+        for buffer, index, old in reversed(journal):
+            buffer[index] = old
+        self.dirty = DIRTY_ALL
+
+    def to_bytes(self) -> bytes:
+        return bytes(self._bytes)
+
+    def load(self, buffer: bytes):
+        """overwrite this state in place with the content of another compact state buffer"""
+        if len(buffer) != STATE_SIZE:
+            raise ValueError(f"compact state needs {STATE_SIZE} bytes, got {len(buffer)}")
+        self._set_slice(0, buffer)
+
+    def copy(self) -> "CompactState":
+        return CompactState(self._bytes)
+
+    def __copy__(self) -> "CompactState":
+        return self.copy()
+
+    def __deepcopy__(self, memo) -> "CompactState":
+        return self.copy()
+
+    def __reduce__(self):
+        return CompactState, (bytes(self._bytes),)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, CompactState):
+            return NotImplemented
+        return self._bytes == other._bytes
+
+    @property
+    def cube_array(self) -> np.ndarray:
+        """cubes per city and virus as (48, 4) uint8 array, row city - 1 and column virus - 1"""
+        return np.frombuffer(self._bytes, dtype=np.uint8, count=NUM_CITIES * NUM_VIRUSES, offset=CUBES).reshape(
+            NUM_CITIES, NUM_VIRUSES
+        )
+
+    @property
+    def research_station_mask(self) -> int:
+        return self._words[W_RESEARCH_STATIONS]
+
+    @property
+    def zobrist(self) -> int:
+        """64 bit zobrist hash of the state, the steps are not part of it"""
+        return self._words[W_ZOBRIST]
+
+    def hand_mask(self, character: Character) -> int:
+        return self._words[W_HANDS + self.players._slot(character)]
+
+    def event_cards_mask(self) -> int:
+        """event cards held by any player, including stored contingency planner cards"""
+        words = self._words
+        mask = 0
+        for word in range(W_HANDS, W_HANDS + MAX_PLAYERS):
+            mask |= words[word]
+        for card in self._bytes[PLAYER_CONTINGENCY_CARDS : PLAYER_CONTINGENCY_CARDS + MAX_PLAYERS]:
+            mask |= 1 << card
+        return mask & constants.EVENT_CARDS_MASK
+
+    ##############
+    # attributes #
+    ##############
+
+    phase = _byte_property(PHASE)
+    previous_phase = _byte_property(PREVIOUS_PHASE)
+    active_player = _byte_property(ACTIVE_PLAYER)
+    research_stations = _byte_property(RESEARCH_STATIONS)
+    outbreaks = _byte_property(OUTBREAKS)
+    infection_rate_marker = _byte_property(INFECTION_RATE_MARKER)
+    actions_left = _byte_property(ACTIONS_LEFT)
+    one_quiet_night = _bool_property(ONE_QUIET_NIGHT)
+    drawn_cards = _byte_property(DRAWN_CARDS)
+    infections_steps = _byte_property(INFECTIONS_STEPS)
+    last_build_research_station = _byte_property(LAST_BUILD_RESEARCH_STATION)
+    game_state = _byte_property(GAME_STATE)
+
+    @property
+    def steps(self) -> int:
+        return self._steps[0]
+
+    @steps.setter
+    def steps(self, value: int):
+        if self.journal is not None:
+            self.journal.append((self._steps, 0, self._steps[0]))
+        self._steps[0] = value
+
+    @property
+    def virus_to_cure(self) -> Optional[Virus]:
+        virus = self._bytes[VIRUS_TO_CURE]
+        return virus if virus else None
+
+    @virus_to_cure.setter
+    def virus_to_cure(self, value: Optional[Virus]):
+        self._set8(VIRUS_TO_CURE, value if value else 0)
+
+    @property
+    def cubes(self) -> _ByteMapView:
+        return _ByteMapView(self, _CUBE_SUPPLY_OFFSETS)
+
+    @cubes.setter
+    def cubes(self, value: Dict[Virus, int]):
+        [self._set8(_CUBE_SUPPLY_OFFSETS[virus], count) for virus, count in value.items()]
+
+    @property
+    def cures(self) -> _ByteMapView:
+        return _ByteMapView(self, _CURES_OFFSETS, as_bool=True)
+
+    @cures.setter
+    def cures(self, value: Dict[Virus, bool]):
+        [self._set8(_CURES_OFFSETS[virus], 1 if cured else 0) for virus, cured in value.items()]
+
+    @property
+    def cities(self) -> _CitiesView:
+        return _CitiesView(self)
+
+    @cities.setter
+    def cities(self, value: Dict[City, CityState]):
+        stations = 0
+        for city, city_state in value.items():
+            row = CUBES + (city - 1) * NUM_VIRUSES
+            self._set_slice(row, bytes(city_state.viral_state[virus] for virus in range(1, NUM_VIRUSES + 1)))
+            if city_state.has_research_station():
+                stations |= 1 << city
+        self._set64(W_RESEARCH_STATIONS, stations)
+
+    @property
+    def players(self) -> _PlayersView:
+        return _PlayersView(self)
+
+    @players.setter
+    def players(self, value: Dict[Character, PlayerState]):
+        if len(value) > MAX_PLAYERS:
+            raise ValueError(f"a compact state holds at most {MAX_PLAYERS} players")
+        self._set8(NUM_PLAYERS, len(value))
+        for slot in range(MAX_PLAYERS):
+            self._set8(PLAYER_CHARACTERS + slot, 0)
+            self._set8(PLAYER_CITIES + slot, 0)
+            self._set8(PLAYER_CONTINGENCY_CARDS + slot, 0)
+            self._set8(PLAYER_SPECIAL_SHUTTLES + slot, 0)
+            self._set64(W_HANDS + slot, 0)
+        for slot, (character, player) in enumerate(value.items()):
+            self._set8(PLAYER_CHARACTERS + slot, character)
+            self._set8(PLAYER_CITIES + slot, player.city)
+            self._set8(PLAYER_SPECIAL_SHUTTLES + slot, 1 if player.operations_expert_has_charter_flight() else 0)
+            contingency = player.contingency_planner_card
+            self._set8(PLAYER_CONTINGENCY_CARDS + slot, contingency if contingency else 0)
+            if isinstance(player, PlayerView):
+                hand = player._hand
+            else:
+                hand = cards_mask(player._city_cards | player._event_cards)
+            self._set64(W_HANDS + slot, hand)
+
+    @property
+    def player_deck(self) -> DrawPileView:
+        return DrawPileView(self, PLAYER_DECK, PLAYER_DECK_CAPACITY)
+
+    @player_deck.setter
+    def player_deck(self, value: List[Card]):
+        self.player_deck._write(list(value))
+
+    @property
+    def player_discard_pile(self) -> DeckView:
+        return DeckView(self, PLAYER_DISCARD_PILE, PLAYER_DECK_CAPACITY)
+
+    @player_discard_pile.setter
+    def player_discard_pile(self, value: List[Card]):
+        self.player_discard_pile._write(list(value))
+
+    @property
+    def infection_deck(self) -> DrawPileView:
+        return DrawPileView(self, INFECTION_DECK, INFECTION_DECK_CAPACITY)
+
+    @infection_deck.setter
+    def infection_deck(self, value: List[City]):
+        self.infection_deck._write(list(value))
+
+    @property
+    def infection_discard_pile(self) -> DeckView:
+        return DeckView(self, INFECTION_DISCARD_PILE, INFECTION_DECK_CAPACITY)
+
+    @infection_discard_pile.setter
+    def infection_discard_pile(self, value: List[City]):
+        self.infection_discard_pile._write(list(value))
+
+    @property
+    def phase_state(self) -> Optional[ChooseCardsPhaseView]:
+        return ChooseCardsPhaseView(self) if self._bytes[CCP_ACTIVE] else None
+
+    @phase_state.setter
+    def phase_state(self, value: Optional[ChooseCardsPhase]):
+        self._set64(W_CARDS_TO_CHOOSE_FROM, 0)
+        self._set_slice(CCP_ACTIVE, bytes(CCP_CHOSEN + CHOSEN_CARDS_CAPACITY - CCP_ACTIVE))
+        if value is None:
+            return
+        after_id = getattr(value.after, "after_id", None)
+        if after_id is None:
+            raise ValueError(f"{value.after} is not a registered choose cards callback")
+        self._set8(CCP_ACTIVE, 1)
+        self._set8(CCP_NEXT_PHASE, value.next_phase)
+        self._set8(CCP_COUNT, value.count)
+        self._set8(CCP_PLAYER, value.player)
+        self._set8(CCP_AFTER, after_id)
+        self._set64(W_CARDS_TO_CHOOSE_FROM, cards_mask(value.cards_to_choose_from))
+        [ChooseCardsPhaseView(self).add_chosen_card(card) for card in value.chosen_cards]
+
+    def report(self) -> str:
+        return self.to_internal_state().report()
+
+    ##############
+    # conversion #
+    ##############
+
+    @staticmethod
+    def from_internal_state(internal_state) -> "CompactState":
+        state = CompactState()
+        state.players = internal_state.players
+        state.cities = internal_state.cities
+        state.cubes = internal_state.cubes
+        state.cures = internal_state.cures
+        state.player_deck = internal_state.player_deck
+        state.player_discard_pile = internal_state.player_discard_pile
+        state.infection_deck = internal_state.infection_deck
+        state.infection_discard_pile = internal_state.infection_discard_pile
+        state.phase_state = internal_state.phase_state
+        state.phase = internal_state.phase
+        state.previous_phase = internal_state.previous_phase
+        state.active_player = internal_state.active_player
+        state.research_stations = internal_state.research_stations
+        state.outbreaks = internal_state.outbreaks
+        state.infection_rate_marker = internal_state.infection_rate_marker
+        state.actions_left = internal_state.actions_left
+        state.one_quiet_night = internal_state.one_quiet_night
+        state.drawn_cards = internal_state.drawn_cards
+        state.infections_steps = internal_state.infections_steps
+        state.last_build_research_station = internal_state.last_build_research_station
+        state.virus_to_cure = internal_state.virus_to_cure
+        state.game_state = internal_state.game_state
+        state.steps = internal_state.steps
+        return state
+
+    def to_internal_state(self):
+        from pandemic.simulation.state import InternalState
+
+        phase_state = self.phase_state
+        return InternalState(
+            phase_state=phase_state.to_phase() if phase_state is not None else None,
+            previous_phase=self.previous_phase,
+            phase=self.phase,
+            players={character: self._player_state(player) for character, player in self.players.items()},
+            active_player=self.active_player,
+            research_stations=self.research_stations,
+            outbreaks=self.outbreaks,
+            infection_rate_marker=self.infection_rate_marker,
+            cubes=dict(self.cubes.items()),
+            actions_left=self.actions_left,
+            cures=dict(self.cures.items()),
+            one_quiet_night=self.one_quiet_night,
+            drawn_cards=self.drawn_cards,
+            infections_steps=self.infections_steps,
+            last_build_research_station=self.last_build_research_station,
+            virus_to_cure=self.virus_to_cure,
+            cities={
+                city: CityState(
+                    viral_state=dict(view.viral_state.items()), research_station=view.has_research_station()
+                )
+                for city, view in self.cities.items()
+            },
+            infection_deck=Deck(self.infection_deck),
+            infection_discard_pile=list(self.infection_discard_pile),
+            player_deck=Deck(self.player_deck),
+            player_discard_pile=list(self.player_discard_pile),
+            game_state=self.game_state,
+            steps=self.steps,
+        )
+
+    @staticmethod
+    def _player_state(player: PlayerView) -> PlayerState:
+        hand = player._hand
+        player_state = PlayerState(
+            city=player.city,
+            _city_cards=set(iter_bits(hand & constants.CITY_CARDS_MASK)),
+            _event_cards=set(iter_bits(hand & constants.EVENT_CARDS_MASK)),
+            _operations_expert_special_shuttle=player.operations_expert_has_charter_flight(),
+            _num_cards=player.num_cards(),
+            _city_colors=defaultdict(int, player.city_colors),
+        )
+        contingency = player.contingency_planner_card
+        if contingency is not None:
+            if Card.card_type(contingency) == Card.CITY:
+                player_state._contingency_planner_city_card = contingency
+            else:
+                player_state._contingency_planner_event_card = contingency
+        return player_state
+
+
+def snapshot(internal_state) -> bytes:
+    """immutable compact blob of an InternalState or CompactState"""
+    if isinstance(internal_state, CompactState):
+        return internal_state.to_bytes()
+    return CompactState.from_internal_state(internal_state).to_bytes()
+
+
+def check_byte_order():
+    """raise ValueError on hosts whose byte order differs from the little endian words of the buffer"""
+    if sys.byteorder != "little":
+        raise ValueError(f"compact state records are little endian, this host is {sys.byteorder} endian")
+
+
+def check_format(expected_magic: bytes, magic: bytes, version: int, state_size: int):
+    """raise ValueError unless a header describes compact states of this format version"""
+    check_byte_order()
+    if magic != expected_magic:
+        raise ValueError(f"unknown magic {magic!r}, expected {expected_magic!r}")
+    if version != FORMAT_VERSION or state_size != STATE_SIZE:
+        raise ValueError(
+            f"compact state format {version} with {state_size} bytes, expected {FORMAT_VERSION} with {STATE_SIZE}"
+        )
+
+
+def encode(internal_state) -> bytes:
+    """fixed size record of an InternalState or CompactState: header and compact buffer"""
+    check_byte_order()
+    return RECORD_HEADER.pack(RECORD_MAGIC, FORMAT_VERSION, STATE_SIZE) + snapshot(internal_state)
+
+
+def decode(record: bytes) -> CompactState:
+    """compact state of a record written by encode"""
+    check_format(RECORD_MAGIC, *RECORD_HEADER.unpack_from(record))
+    return CompactState(memoryview(record)[RECORD_HEADER.size :])
+
+
+_CUBE_SUPPLY_OFFSETS = {virus: CUBE_SUPPLY + virus - 1 for virus in CUBES_ORDER}
+_CURES_OFFSETS = {virus: CURES + virus - 1 for virus in CUBES_ORDER}
@@ -0,0 +1,97 @@
+"""
+State corpus files: a versioned header followed by fixed size compact state records. A corpus is
+opened with np.memmap, so any position can be read without loading the file and restored into a
+State without decoding.
+"""
+
+import struct
+from collections.abc import Sequence
+from typing import Iterable
+
+import numpy as np
+
+from pandemic.simulation.compact_state import (
+    CompactState,
+    FORMAT_VERSION,
+    STATE_SIZE,
+    check_byte_order,
+    check_format,
+    snapshot,
+)
+
+CORPUS_MAGIC = b"PNDC"
+# magic, format version, record size and number of records, padded so the records start aligned
+CORPUS_HEADER = struct.Struct("<4sHHQ")
+CORPUS_HEADER_SIZE = 64
+
+
+def _header(count: int) -> bytes:
+    return CORPUS_HEADER.pack(CORPUS_MAGIC, FORMAT_VERSION, STATE_SIZE, count).ljust(CORPUS_HEADER_SIZE, b"\0")
+
+
+class CorpusWriter:
+    """appends states to a new corpus file, the number of records is written on close"""
+
+    def __init__(self, path: str):
+        check_byte_order()
+        self._file = open(path, "wb")
+        self._file.write(_header(0))
+        self.count = 0
+
+    def append(self, state):
+        """add an InternalState, CompactState or snapshot"""
+        blob = state if isinstance(state, (bytes, bytearray, memoryview)) else snapshot(state)
+        if len(blob) != STATE_SIZE:
+            raise ValueError(f"compact state needs {STATE_SIZE} bytes, got {len(blob)}")
+        self._file.write(blob)
+        self.count += 1
+
+    def extend(self, states: Iterable):
+        [self.append(state) for state in states]
+
+    def close(self):
+        if not self._file.closed:
+            self._file.seek(0)
+            self._file.write(_header(self.count))
+            self._file.close()
+
+    def __enter__(self) -> "CorpusWriter":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+def write_corpus(path: str, states: Iterable) -> int:
+    with CorpusWriter(path) as writer:
+        writer.extend(states)
+    return writer.count
+
+
+class StateCorpus(Sequence):
+    """
+    memory mapped corpus file. Items are snapshots viewing the mapped records, they can be passed to
+    State.restore as they are.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as file:
+            magic, version, state_size, count = CORPUS_HEADER.unpack(file.read(CORPUS_HEADER.size))
+        check_format(CORPUS_MAGIC, magic, version, state_size)
+        # np.memmap can not map zero bytes
+        self.records: np.ndarray = (
+            np.memmap(path, dtype=np.uint8, mode="r", offset=CORPUS_HEADER_SIZE, shape=(count, STATE_SIZE))
+            if count
+            else np.zeros((0, STATE_SIZE), dtype=np.uint8)
+        )
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(self, index: int) -> memoryview:
+        if isinstance(index, slice):
+            return [memoryview(record) for record in self.records[index]]
+        return memoryview(self.records[index])
+
+    def state(self, index: int) -> CompactState:
+        return CompactState(self[index])
@@ -0,0 +1,63 @@
+"""
+Listeners for game events. A State only holds Hooks while a listener is registered, every place an
+event happens checks for None first, so without listeners no arguments are built and nothing is called.
+"""
+
+import functools
+import logging
+from typing import Any, Callable, Dict, List
+
+# events and the arguments their listeners are called with
+INFECTION = "infection"  # city, virus, times
+OUTBREAK = "outbreak"  # city, virus
+EPIDEMIC = "epidemic"  # city drawn from the bottom of the infection deck
+CARD_DRAW = "card_draw"  # player card, epidemics included
+CURE = "cure"  # virus
+GAME_END = "game_end"  # GameState.WIN or GameState.LOST
+ACTION = "action"  # action Simulation.step was called with, None for passing
+
+EVENTS = (INFECTION, OUTBREAK, EPIDEMIC, CARD_DRAW, CURE, GAME_END, ACTION)
+
+logger = logging.getLogger(__name__)
+
+
+class Hooks:
+    __slots__ = ("_listeners",)
+
+    def __init__(self):
+        self._listeners: Dict[str, List[Callable[..., Any]]] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self._listeners)
+
+    def add(self, event: str, listener: Callable[..., Any]):
+        if event not in EVENTS:
+            raise ValueError(f"unknown event {event}")
+        self._listeners.setdefault(event, []).append(listener)
+
+    def remove(self, event: str, listener: Callable[..., Any]):
+        listeners = self._listeners[event]
+        listeners.remove(listener)
+        if not listeners:
+            del self._listeners[event]
+
+    def emit(self, event: str, *args):
+        for listener in self._listeners.get(event, ()):
+            listener(*args)
+
+
+def _log(log: Callable[[str], Any], event: str, *args):
+    log(" ".join([event] + [str(arg) for arg in args]))
+
+
+def log_events(target, log: Callable[[str], Any] = logger.debug, events=EVENTS) -> List[Callable[..., Any]]:
+    """
+    register listeners on a Simulation or State which write events to log, e.g. print for stdout.
+    Returns the listeners in the order of events for removing them again.
+    """
+    listeners = []
+    for event in events:
+        listener = functools.partial(_log, log, event)
+        target.add_listener(event, listener)
+        listeners.append(listener)
+    return listeners
@@ -1,4 +1,4 @@
-from dataclasses import dataclass, InitVar
+from dataclasses import dataclass
 from typing import Tuple, List
 
 from pandemic.simulation.model.city_id import City, Card
@@ -9,12 +9,53 @@ def _csum(nums: List[int]):
     return sum((n * pow(100, idx) for idx, n in enumerate(nums)), 0)
 
 
-@dataclass(unsafe_hash=True)
-class ActionInterface:
+class _Interned(type):
+    """
+    metaclass keeping one instance per class and field values: creating an action returns the shared
+    instance, so actions compare by identity and hash by a value computed once
+    """
+
+    def __init__(cls, name, bases, namespace):
+        super().__init__(name, bases, namespace)
+        cls._pool = {}
+        # dataclass field names, known once the class is decorated
+        cls._names = None
+
+    def __call__(cls, *args, **kwargs):
+        if kwargs:
+            args = cls._positional(args, kwargs)
+        action = cls._pool.get(args, None)
+        if action is None:
+            action = cls._pool[args] = super().__call__(*args)
+        return action
+
+    def _positional(cls, args: tuple, kwargs: dict) -> tuple:
+        if cls._names is None:
+            cls._names = tuple(cls.__dataclass_fields__)
+        names = cls._names[len(args) :]
+        if len(names) != len(kwargs) or not all(name in kwargs for name in names):
+            # let the generated __init__ raise the usual TypeError
+            super().__call__(*args, **kwargs)
+        return args + tuple(kwargs[name] for name in names)
+
+
+@dataclass(frozen=True, eq=False)
+class ActionInterface(metaclass=_Interned):
+    __slots__ = ("feature", "_hash")
+
     index = None
 
     def __post_init__(self):
-        self.feature = self.index, self.csum()
+        feature = self.index, self.csum()
+        object.__setattr__(self, "feature", feature)
+        object.__setattr__(self, "_hash", hash(feature))
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        # unpickling and copying go through the pool as well
+        return type(self), tuple(getattr(self, name) for name in self.__dataclass_fields__)
 
     def to_command(self):
         raise NotImplementedError()
@@ -26,8 +67,9 @@ class ActionInterface:
         raise NotImplementedError()
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(frozen=True, eq=False)
 class Movement(ActionInterface):
+    __slots__ = ("player", "destination")
     PREFIX = "m"
 
     command = None
@@ -43,43 +85,49 @@ class Movement(ActionInterface):
         return self.player * 100 + self.destination
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(frozen=True, eq=False)
 class DriveFerry(Movement):
+    __slots__ = ()
     command = "d"
     index = 1
     dim = 4 * 6
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(frozen=True, eq=False)
 class DirectFlight(Movement):
+    __slots__ = ()
     command = "f"
     index = DriveFerry.index + DriveFerry.dim
     dim = 4 * 7
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(frozen=True, eq=False)
 class CharterFlight(Movement):
+    __slots__ = ()
     command = "c"
     index = DriveFerry.index + DriveFerry.dim
     dim = 4 * 47
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(frozen=True, eq=False)
 class ShuttleFlight(Movement):
+    __slots__ = ()
     command = "s"
     index = CharterFlight.index + CharterFlight.dim
     dim = 4 * 5
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(frozen=True, eq=False)
 class Dispatch(Movement):
+    __slots__ = ()
     command = "d"
     index = ShuttleFlight.index + ShuttleFlight.dim
     dim = 4 * 3
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(frozen=True, eq=False)
 class OperationsFlight(Movement):
+    __slots__ = ("discard_card",)
     command = "o"
     index = Dispatch.index + Dispatch.dim
     dim = 48 * 7
@@ -99,11 +147,13 @@ class OperationsFlight(Movement):
 
 
 class Other(ActionInterface):
+    __slots__ = ()
     PREFIX = "o"
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(frozen=True, eq=False)
 class ShareKnowledge(Other):
+    __slots__ = ("player", "card", "target_player")
     index = OperationsFlight.index + OperationsFlight.dim
     dim = 3 + 3
 
@@ -118,8 +168,9 @@ class ShareKnowledge(Other):
         return self.player * 10000 + self.card * 100 + self.target_player
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(frozen=True, eq=False)
 class TreatDisease(Other):
+    __slots__ = ("city", "target_virus")
     index = ShareKnowledge.index + ShareKnowledge.dim
     dim = 4
 
@@ -133,8 +184,9 @@ class TreatDisease(Other):
         return self.city * 100 + self.target_virus
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(frozen=True, eq=False)
 class DiscoverCure(Other):
+    __slots__ = ("target_virus",)
     index = TreatDisease.index + TreatDisease.dim
     dim = 1
 
@@ -147,8 +199,9 @@ class DiscoverCure(Other):
         return self.target_virus
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(frozen=True, eq=False)
 class BuildResearchStation(Other):
+    __slots__ = ("city",)
     index = DiscoverCure.index + DiscoverCure.dim
     dim = 1
 
@@ -161,8 +214,9 @@ class BuildResearchStation(Other):
         return self.city
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(frozen=True, eq=False)
 class ReserveCard(Other):
+    __slots__ = ("card",)
     index = BuildResearchStation.index + BuildResearchStation.dim
     dim = 1
 
@@ -180,15 +234,17 @@ class ReserveCard(Other):
 ######################
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(frozen=True, eq=False)
 class Event(ActionInterface):
+    __slots__ = ("player",)
     PREFIX = "e"
 
     player: int
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(frozen=True, eq=False)
 class MoveResearchStation(Event):
+    __slots__ = ("move_from",)
     index = ReserveCard.index + ReserveCard.dim
     dim = 6
 
@@ -202,8 +258,9 @@ class MoveResearchStation(Event):
         return self.player * 100 + self.move_from
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(frozen=True, eq=False)
 class Forecast(Event):
+    __slots__ = ()
     index = MoveResearchStation.index + MoveResearchStation.dim
     dim = 1
 
@@ -214,8 +271,9 @@ class Forecast(Event):
         return 1
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(frozen=True, eq=False)
 class GovernmentGrant(Event):
+    __slots__ = ("target_city",)
     index = Forecast.index + Forecast.dim
     dim = 47
 
@@ -228,8 +286,9 @@ class GovernmentGrant(Event):
         return self.player * 100 + self.target_city
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(frozen=True, eq=False)
 class Airlift(Event):
+    __slots__ = ("target_player", "destination")
     index = GovernmentGrant.index + GovernmentGrant.dim
     dim = 48 * 4
 
@@ -243,8 +302,9 @@ class Airlift(Event):
         return self.player * 100 + self.target_player * 100 + self.destination
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(frozen=True, eq=False)
 class ResilientPopulation(Event):
+    __slots__ = ("discard_city",)
     index = Airlift.index + Airlift.dim
     dim = 48
 
@@ -257,8 +317,9 @@ class ResilientPopulation(Event):
         return self.player * 100 + self.discard_city
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(frozen=True, eq=False)
 class OneQuietNight(Event):
+    __slots__ = ()
     index = ResilientPopulation.index + ResilientPopulation.dim
     dim = 1
 
@@ -269,8 +330,9 @@ class OneQuietNight(Event):
         return self.player * 100
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(frozen=True, eq=False)
 class DiscardCard(ActionInterface):
+    __slots__ = ("player", "card")
     index = OneQuietNight.index + OneQuietNight.dim
     dim = 9
 
@@ -286,8 +348,9 @@ class DiscardCard(ActionInterface):
         return self.player * 100 + self.card
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(frozen=True, eq=False)
 class ChooseCard(ActionInterface):
+    __slots__ = ("player", "card")
     index = DiscardCard.index + DiscardCard.dim
     dim = 7
 
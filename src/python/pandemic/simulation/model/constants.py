@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 from typing import Dict, Set
 
-from pandemic.simulation.model.city_id import City
+from pandemic.simulation.model.city_id import City, EventCard
 from pandemic.simulation.model.enums import Virus
 from pandemic.simulation.model.citystate import CityState
 
@@ -208,6 +208,20 @@ def create_cities_init_state() -> Dict[City, CityState]:
 
 CITY_COLORS = {id: city.color for id, city in CITY_DATA.items()}
 
+# card bitmasks, bit n is set for card n
+CITY_CARDS_MASK = sum(1 << city for city in City.__members__)
+EVENT_CARDS_MASK = sum(1 << card for card in EventCard.__members__)
+CITY_COLOR_MASKS = {
+    virus: sum(1 << city for city, color in CITY_COLORS.items() if color == virus)
+    for virus in (Virus.BLUE, Virus.RED, Virus.YELLOW, Virus.BLACK)
+}
+
+# city bitmasks, bit n is set for city n
+ALL_CITIES_MASK = CITY_CARDS_MASK
+NEIGHBOR_MASKS = {city: sum(1 << n for n in neighbors) for city, neighbors in NEIGHBORS.items()}
+# cities the quarantine specialist protects from each location
+QUARANTINE_MASKS = {city: mask | 1 << city for city, mask in NEIGHBOR_MASKS.items()}
+
 CONNECTIONS: (City, City) = [
     (City.SAN_FRANCISCO, City.TOKYO),
     (City.SAN_FRANCISCO, City.MANILA),
@@ -315,7 +329,3 @@ PLAYER_ACTIONS = 4
 INFECTIONS_RATES = [2, 2, 2, 3, 3, 4, 4]
 
 COUNT_CUBES = 24
-
-for i, l in NEIGHBORS.items():
-    numbers = ", ".join([str(n - 1) for n in l])
-    print(f" &[{numbers}], ")
@@ -0,0 +1,149 @@
+from collections.abc import MutableSequence
+from itertools import islice
+from random import Random
+from typing import Iterable, Iterator, List, Sequence
+
+from pandemic.simulation.model.city_id import Card
+
+
+class Deck(MutableSequence):
+    """
+    Draw pile as a list with a head index, top card first: the cards are _cards[_head:]. Drawing from
+    the top or the bottom is O(1) and k cards go on top in O(k) while the slots before head are free.
+    """
+
+    __slots__ = ("_cards", "_head")
+
+    def __init__(self, cards: Iterable[Card] = ()):
+        self._cards: List = list(cards)
+        self._head = 0
+
+    def draw(self) -> Card:
+        if self._head == len(self._cards):
+            raise IndexError("draw from empty deck")
+        card = self._cards[self._head]
+        self._head += 1
+        return card
+
+    def draw_bottom(self) -> Card:
+        if self._head == len(self._cards):
+            raise IndexError("draw from empty deck")
+        return self._cards.pop()
+
+    def put_on_top(self, cards: Sequence[Card]):
+        """put cards on the deck, cards[0] becomes the top card"""
+        k = len(cards)
+        if k > self._head:
+            # make room for as many cards as the deck holds, so refilling it again stays O(k)
+            live = self._cards[self._head :]
+            self._head = k + len(live)
+            self._cards = [None] * self._head + live
+        self._head -= k
+        self._cards[self._head : self._head + k] = cards
+
+    def reorder_top(self, cards: Sequence[Card]):
+        """replace the top len(cards) cards by cards, in that order"""
+        if len(cards) > len(self):
+            raise ValueError("more cards than in the deck")
+        self._cards[self._head : self._head + len(cards)] = cards
+
+    def intensify(self, discard_pile: List[Card], random: Random):
+        """shuffle the discard pile and put it on top of the deck"""
+        cards = list(discard_pile)
+        random.shuffle(cards)
+        self.put_on_top(cards)
+        discard_pile.clear()
+
+    def copy(self) -> "Deck":
+        return Deck(self._cards[self._head :])
+
+    def __copy__(self) -> "Deck":
+        return self.copy()
+
+    def __deepcopy__(self, memo) -> "Deck":
+        # cards are ints
+        return self.copy()
+
+    def __reduce__(self):
+        return Deck, (self._cards[self._head :],)
+
+    def __len__(self) -> int:
+        return len(self._cards) - self._head
+
+    def __iter__(self) -> Iterator[Card]:
+        return islice(self._cards, self._head, None)
+
+    def _index(self, index: int) -> int:
+        length = len(self._cards) - self._head
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("deck index out of range")
+        return self._head + index
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._cards[self._head :][index]
+        return self._cards[self._index(index)]
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            cards = self._cards[self._head :]
+            cards[index] = value
+            self._cards, self._head = cards, 0
+        else:
+            self._cards[self._index(index)] = value
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            cards = self._cards[self._head :]
+            del cards[index]
+            self._cards, self._head = cards, 0
+        elif index == 0:
+            self.draw()
+        else:
+            del self._cards[self._index(index)]
+
+    def pop(self, index: int = -1) -> Card:
+        if index == 0:
+            return self.draw()
+        if index == -1:
+            return self.draw_bottom()
+        index = self._index(index)
+        return self._cards.pop(index)
+
+    def insert(self, index: int, card: Card):
+        if index == 0 and self._head > 0:
+            self._head -= 1
+            self._cards[self._head] = card
+            return
+        length = len(self._cards) - self._head
+        if index < 0:
+            index = max(index + length, 0)
+        self._cards.insert(self._head + min(index, length), card)
+
+    def append(self, card: Card):
+        self._cards.append(card)
+
+    def remove(self, card: Card):
+        del self._cards[self._cards.index(card, self._head)]
+
+    def clear(self):
+        self._cards = []
+        self._head = 0
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Deck):
+            return self._cards[self._head :] == other._cards[other._head :]
+        try:
+            return self._cards[self._head :] == list(other)
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self):
+        return "Deck(%r)" % self._cards[self._head :]
+
+
+def as_deck(cards: Iterable[Card]):
+    """cards as a Deck, decks and compact deck views are kept as they are"""
+    return Deck(cards) if isinstance(cards, (list, tuple)) else cards
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import List, Tuple, Callable, Any, Set
+from typing import List, Tuple, Callable, Any, Set, Dict
 
 from pandemic.simulation.model.city_id import Card
 from pandemic.simulation.model.enums import Character
@@ -17,6 +17,19 @@ class Phase:
     CURE_VIRUS = 8
 
 
+# callbacks which may finish a choose cards phase, by a stable id so phase state can be stored as plain data
+CHOOSE_CARDS_AFTER: Dict[int, Callable[[Any, Character, List[Card]], None]] = {}
+
+
+def choose_cards_after(after_id: int):
+    def register(after: Callable[[Any, Character, List[Card]], None]):
+        after.after_id = after_id
+        CHOOSE_CARDS_AFTER[after_id] = after
+        return after
+
+    return register
+
+
 @dataclass
 class ChooseCardsPhase:
 
@@ -0,0 +1,109 @@
+"""
+Fast reset: the setup of a new game which does not depend on the shuffles is cached per characters
+and number of epidemic cards. A reset replays the shuffles of State.init on plain lists and writes
+decks, hands and initial infections straight into a copy of the cached setup.
+"""
+
+import random
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from pandemic.simulation.compact_state import CompactState, W_HANDS, CUBES, NUM_VIRUSES, cards_mask
+from pandemic.simulation.model.city_id import EventCard, EpidemicCard, Card
+from pandemic.simulation.model.constants import *
+from pandemic.simulation.model.enums import Character
+from pandemic.simulation.state import InternalState, new_internal_state
+
+_CITIES: Tuple[City, ...] = tuple(CITY_COLORS.keys())
+_PLAYER_CARDS: Tuple[Card, ...] = _CITIES + tuple(EventCard.__members__)
+
+
+class Deal(NamedTuple):
+    hands: List[List[Card]]
+    player_deck: List[Card]
+    infection_deck: List[City]
+    infection_discard_pile: List[City]
+    # (city, cubes) of the initial infections
+    infections: List[Tuple[City, int]]
+
+
+class ResetTemplate:
+    _templates: Dict[Tuple, "ResetTemplate"] = {}
+
+    @staticmethod
+    def get(characters, num_epidemic_cards: int) -> "ResetTemplate":
+        key = (tuple(characters), num_epidemic_cards)
+        template = ResetTemplate._templates.get(key, None)
+        if template is None:
+            template = ResetTemplate._templates[key] = ResetTemplate(*key)
+        return template
+
+    def __init__(self, characters: Tuple[Character, ...], num_epidemic_cards: int):
+        self.characters = characters
+        self.num_epidemic_cards = num_epidemic_cards
+        self.hand_size = TOTAL_STARTING_PLAYER_CARDS - len(characters)
+        # the quarantine specialist starts in atlanta and protects it and its neighbors from the start
+        self.protected = QUARANTINE_MASKS[PLAYER_START] if Character.QUARANTINE_SPECIALIST in characters else 0
+        self.blob = CompactState.from_internal_state(new_internal_state(characters, [], [])).to_bytes()
+
+    def deal(self, rand: random.Random, infect_deck_shuffle_seed: Optional[int]) -> Deal:
+        """the shuffles of State.init, drawing the same numbers from rand"""
+        infection_deck = list(_CITIES)
+        if infect_deck_shuffle_seed is not None:
+            rand.seed(infect_deck_shuffle_seed)
+        rand.shuffle(infection_deck)
+        if infect_deck_shuffle_seed is not None:
+            rand.seed(infect_deck_shuffle_seed)
+        player_cards = list(_PLAYER_CARDS)
+        rand.shuffle(player_cards)
+
+        dealt = self.hand_size * len(self.characters)
+        hands = [player_cards[i : i + self.hand_size] for i in range(0, dealt, self.hand_size)]
+        city_cards = player_cards[dealt:]
+        rand.shuffle(city_cards)
+        # chunks as np.array_split makes them, the larger ones first
+        player_deck: List[Card] = []
+        epidemic_cards = list(EpidemicCard.__members__)
+        size, larger = divmod(len(city_cards), self.num_epidemic_cards)
+        start = 0
+        for chunk in range(self.num_epidemic_cards):
+            end = start + size + (chunk < larger)
+            cards = city_cards[start:end]
+            cards.append(epidemic_cards.pop())
+            rand.shuffle(cards)
+            player_deck.extend(cards)
+            start = end
+
+        # infections of __draw_and_infect: three times the second card for 3, 2 and 1 cubes
+        infection_discard_pile = []
+        infections = []
+        for times in (3, 3, 3, 2, 2, 2, 1, 1, 1):
+            city = infection_deck.pop(1)
+            infection_discard_pile.append(city)
+            if not self.protected >> city & 1:
+                infections.append((city, times))
+        return Deal(hands, player_deck, infection_deck, infection_discard_pile, infections)
+
+    def compact_state(self, deal: Deal) -> CompactState:
+        state = CompactState(self.blob)
+        for slot, hand in enumerate(deal.hands):
+            state._set64(W_HANDS + slot, cards_mask(hand))
+        state.player_deck = deal.player_deck
+        state.infection_deck = deal.infection_deck
+        state.infection_discard_pile = deal.infection_discard_pile
+        cubes = state.cubes
+        for city, times in deal.infections:
+            color = CITY_DATA[city].color
+            state._set8(CUBES + (city - 1) * NUM_VIRUSES + color - 1, times)
+            cubes[color] -= times
+        return state
+
+    def internal_state(self, deal: Deal) -> InternalState:
+        state = new_internal_state(self.characters, deal.infection_deck, deal.player_deck)
+        for player, hand in zip(state.players.values(), deal.hands):
+            player.add_cards(hand)
+        state.infection_discard_pile = deal.infection_discard_pile
+        for city, times in deal.infections:
+            color = CITY_DATA[city].color
+            state.cities[city].viral_state[color] = times
+            state.cubes[color] -= times
+        return state
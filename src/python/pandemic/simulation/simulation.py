@@ -1,15 +1,25 @@
-from typing import List, Optional, Tuple
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from pandemic.simulation.action_cache import ActionCache, EVENTS, DISCARDS, MOVES, OTHERS
+from pandemic.simulation.action_catalog import ACTIONS, ACTION_IDS, PASS
+from pandemic.simulation.action_mask import ActionMask
 
 from pandemic.simulation.actions.events import event_action, get_possible_event_actions
 from pandemic.simulation.actions.moves import move_player, get_possible_move_actions
 from pandemic.simulation.actions.others import throw_card_action, other_action, get_possible_other_actions
+from pandemic.simulation.hooks import ACTION
 from pandemic.simulation.model.actions import ActionInterface, Movement, Other, Event, DiscardCard, ChooseCard
 from pandemic.simulation.model.constants import *
 from pandemic.simulation.model.enums import Character, GameState
 from pandemic.simulation.model.phases import ChooseCardsPhase, Phase
-from pandemic.simulation.state import State
+from pandemic.simulation.state import State, UndoRecord
 
-print("version ", 2.0)
+# phases in which generating actions changes the state
+UNCACHED_PHASES = (Phase.FORECAST, Phase.MOVE_STATION, Phase.CURE_VIRUS, Phase.CHOOSE_CARDS)
+# phases which step(None) continues
+PASSING_PHASES = (Phase.DRAW_CARDS, Phase.INFECTIONS, Phase.EPIDEMIC)
 
 
 class Simulation:
@@ -21,6 +31,8 @@ class Simulation:
         player_deck_shuffle_seed=None,
         infect_deck_shuffle_seed=None,
         epidemic_shuffle_seed=None,
+        compact_state: bool = True,
+        fast_reset: bool = False,
     ):
         self.state = State(
             num_epidemic_cards,
@@ -29,10 +41,19 @@ class Simulation:
             player_deck_shuffle_seed,
             infect_deck_shuffle_seed,
             epidemic_shuffle_seed,
+            compact_state,
+            fast_reset,
         )
+        self._undo_records: List[UndoRecord] = []
+        self._action_cache = ActionCache()
+        self._action_mask = ActionMask()
 
-    def step(self, action: Optional[ActionInterface]):
+    def step(self, action: Optional[ActionInterface], record_undo: bool = False):
         _state = self.state
+        if _state.hooks is not None:
+            _state.hooks.emit(ACTION, action)
+        if record_undo:
+            self._undo_records.append(_state.new_undo_record())
         if isinstance(action, DiscardCard):
             throw_card_action(_state, action)
         elif isinstance(action, ChooseCard):
@@ -75,7 +96,13 @@ class Simulation:
         if player is None:
             player = state.active_player
 
-        possible_actions: List[ActionInterface] = get_possible_event_actions(state)
+        cache = self._action_cache
+        cached = state.phase not in UNCACHED_PHASES and cache.refresh(state.internal_state)
+
+        def group(name, generate):
+            return cache.get(name, player, generate) if cached else generate()
+
+        possible_actions: List[ActionInterface] = list(group(EVENTS, lambda: get_possible_event_actions(state)))
         if state.phase is Phase.FORECAST or state.phase is Phase.MOVE_STATION:
             return possible_actions
 
@@ -84,20 +111,64 @@ class Simulation:
             return [ChooseCard(choose_phase.player, card) for card in choose_phase.cards_to_choose_from]
 
         # check all players for hand limit and prompt action
-        too_many_cards = False
-        extend = possible_actions.extend
-        for color, p_state in filter(lambda cs: cs[1].num_cards() > 7, state.players.items()):
-            too_many_cards = True
-            extend(DiscardCard(color, c) for c in p_state.cards)
-
-        if too_many_cards:
-            return possible_actions
+        discard_actions = group(DISCARDS, lambda: self._discard_actions(state))
+        if discard_actions:
+            return possible_actions + discard_actions
 
         if state.phase == Phase.ACTIONS:
-            possible_actions.extend(
-                get_possible_move_actions(state, player) + get_possible_other_actions(state, player)
-            )
+            possible_actions += group(MOVES, lambda: get_possible_move_actions(state, player))
+            possible_actions += group(OTHERS, lambda: get_possible_other_actions(state, player))
         return possible_actions
 
+    def step_id(self, action_id: int, record_undo: bool = False):
+        """step with the action of an action_catalog id, PASS steps with None"""
+        self.step(ACTIONS[action_id], record_undo)
+
+    def get_legal_action_ids(self, player: Character = None) -> List[int]:
+        """
+        action_catalog ids of the possible actions. PASS is legal when stepping with None moves the
+        game on: while drawing, infecting or resolving an epidemic, and when nothing else is possible.
+        """
+        actions = self.get_possible_actions(player)
+        ids = [ACTION_IDS[action] for action in actions]
+        if not ids or (
+            self.state.phase in PASSING_PHASES and not any(isinstance(action, DiscardCard) for action in actions)
+        ):
+            ids.append(PASS)
+        return ids
+
+    def get_legal_action_mask(self) -> np.ndarray:
+        """
+        bool mask over the action_catalog ids of get_legal_action_ids for the active player. The array
+        is reused, copy it to keep it past the next call.
+        """
+        return self._action_mask.update(self)
+
+    @staticmethod
+    def _discard_actions(state: State) -> List[DiscardCard]:
+        return [
+            DiscardCard(color, c)
+            for color, p_state in state.players.items()
+            if p_state.num_cards() > 7
+            for c in p_state.cards
+        ]
+
+    def undo(self):
+        """
+        revert the last step done with record_undo=True, which needs compact_state. Changes made after
+        that step, e.g. by get_possible_actions or steps without recording, are reverted with it.
+        """
+        self.state.undo(self._undo_records.pop())
+        self.state.track_changes(self._undo_records[-1] if self._undo_records else None)
+
+    def add_listener(self, event: str, listener: Callable):
+        """call listener on every event of this kind, see hooks for the events and their arguments"""
+        self.state.add_listener(event, listener)
+
+    def remove_listener(self, event: str, listener: Callable):
+        self.state.remove_listener(event, listener)
+
     def reset(self):
+        self._undo_records.clear()
+        self.state.track_changes(None)
         self.state.reset()
@@ -1,13 +1,16 @@
 import itertools
-import logging
 import random
-from typing import List, Optional, Tuple, Any
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple, Any
 
 import numpy as np
 
+from pandemic.simulation.compact_state import CompactState, snapshot, iter_bits
+from pandemic.simulation.hooks import Hooks, INFECTION, OUTBREAK, EPIDEMIC, CARD_DRAW, CURE, GAME_END
 from pandemic.simulation.model.actions import ActionInterface
 from pandemic.simulation.model.city_id import EventCard, EpidemicCard, Card
 from pandemic.simulation.model.constants import *
+from pandemic.simulation.model.deck import Deck, as_deck
 from pandemic.simulation.model.enums import Character, GameState
 from pandemic.simulation.model.phases import ChooseCardsPhase, Phase
 from pandemic.simulation.model.playerstate import PlayerState
@@ -41,10 +44,10 @@ class InternalState:
 
     # cards
     cities: Dict[int, CityState]
-    infection_deck: List[int]
+    infection_deck: Deck
     infection_discard_pile: List[City]
 
-    player_deck: List[Card]
+    player_deck: Deck
     player_discard_pile: List[Card]
 
     game_state: int
@@ -70,6 +73,48 @@ class InternalState:
         )
 
 
+@dataclass
+class UndoRecord:
+    # (buffer, index, old value) of every write to a compact state, oldest first
+    changes: List[Tuple[Any, Any, Any]] = field(default_factory=list)
+    random_state: Optional[tuple] = None
+
+
+def new_internal_state(characters, infection_deck: List[City], player_deck: List[Card]) -> "InternalState":
+    """state of a new game before cards are dealt and cities infected"""
+    players = {c: PlayerState() for c in characters}
+    return InternalState(
+        players=players,
+        active_player=list(players.keys())[0],
+        research_stations=5,
+        outbreaks=0,
+        infection_rate_marker=0,
+        cubes={
+            Virus.YELLOW: COUNT_CUBES,
+            Virus.BLACK: COUNT_CUBES,
+            Virus.BLUE: COUNT_CUBES,
+            Virus.RED: COUNT_CUBES,
+        },
+        actions_left=PLAYER_ACTIONS,
+        cures={Virus.YELLOW: False, Virus.BLACK: False, Virus.BLUE: False, Virus.RED: False},
+        one_quiet_night=False,
+        drawn_cards=0,
+        infections_steps=0,
+        last_build_research_station=City.ATLANTA,
+        virus_to_cure=None,
+        cities=create_cities_init_state(),
+        infection_deck=Deck(infection_deck),
+        infection_discard_pile=[],
+        player_deck=Deck(player_deck),
+        player_discard_pile=[],
+        previous_phase=Phase.SETUP,
+        phase=Phase.ACTIONS,
+        game_state=GameState.RUNNING,
+        phase_state=None,
+        steps=0,
+    )
+
+
 class State:
     def __init__(
         self,
@@ -79,6 +124,8 @@ class State:
         player_deck_shuffle_seed=None,
         infect_deck_shuffle_seed=None,
         epidemic_shuffle_seed=None,
+        compact: bool = False,
+        fast_reset: bool = False,
     ):
         self.epidemic_shuffle_seed = epidemic_shuffle_seed
         self.infect_deck_shuffle_seed = infect_deck_shuffle_seed
@@ -87,13 +134,22 @@ class State:
         self.random = random.Random()
         # TODO: allow for new player shuffle on reset:
         self.characters = characters if characters else random.sample(tuple(Character.__members__), k=player_count)
+        # run on the array backed CompactState instead of the object graph of InternalState
+        self.compact = compact
+        # build new games from a cached ResetTemplate instead of playing through the setup
+        self.fast_reset = fast_reset
+        self._reset_template = None
         self.internal_state: InternalState = None
+        self._undo_record: Optional[UndoRecord] = None
+        # event listeners, None while there are none
+        self.hooks: Optional[Hooks] = None
         self.init()
 
     # @profile
     def init(self):
-
-        players = {c: PlayerState() for c in self.characters}
+        if self.fast_reset:
+            self._init_from_template()
+            return
 
         infection_deck: List[City] = list(CITY_COLORS.keys())
 
@@ -107,36 +163,7 @@ class State:
         player_deck: List[Card] = list(CITY_COLORS.keys()) + list(EventCard.__members__)
         self.random.shuffle(player_deck)
 
-        self.internal_state = InternalState(
-            players=players,
-            active_player=list(players.keys())[0],
-            research_stations=5,
-            outbreaks=0,
-            infection_rate_marker=0,
-            cubes={
-                Virus.YELLOW: COUNT_CUBES,
-                Virus.BLACK: COUNT_CUBES,
-                Virus.BLUE: COUNT_CUBES,
-                Virus.RED: COUNT_CUBES,
-            },
-            actions_left=PLAYER_ACTIONS,
-            cures={Virus.YELLOW: False, Virus.BLACK: False, Virus.BLUE: False, Virus.RED: False},
-            one_quiet_night=False,
-            drawn_cards=0,
-            infections_steps=0,
-            last_build_research_station=City.ATLANTA,
-            virus_to_cure=None,
-            cities=create_cities_init_state(),
-            infection_deck=infection_deck,
-            infection_discard_pile=[],
-            player_deck=player_deck,
-            player_discard_pile=[],
-            previous_phase=Phase.SETUP,
-            phase=Phase.ACTIONS,
-            game_state=GameState.RUNNING,
-            phase_state=None,
-            steps=0,
-        )
+        self.internal_state = new_internal_state(self.characters, infection_deck, player_deck)
 
         self._serve_player_cards(len(self.characters))
         self._prepare_player_deck(self.num_epidemic_cards)
@@ -147,9 +174,78 @@ class State:
         if self.epidemic_shuffle_seed is not None:
             self.random.seed(self.epidemic_shuffle_seed)
 
+        if self.compact:
+            self.internal_state = CompactState.from_internal_state(self.internal_state)
+
+    def _init_from_template(self):
+        if self._reset_template is None:
+            from pandemic.simulation.reset_template import ResetTemplate
+
+            self._reset_template = ResetTemplate.get(self.characters, self.num_epidemic_cards)
+        deal = self._reset_template.deal(self.random, self.infect_deck_shuffle_seed)
+        if self.compact:
+            self.internal_state = self._reset_template.compact_state(deal)
+        else:
+            self.internal_state = self._reset_template.internal_state(deal)
+        if self.epidemic_shuffle_seed is not None:
+            self.random.seed(self.epidemic_shuffle_seed)
+
     def reset(self):
         self.init()
 
+    def add_listener(self, event: str, listener: Callable):
+        """call listener on every event of this kind, see hooks for the events and their arguments"""
+        if self.hooks is None:
+            self.hooks = Hooks()
+        self.hooks.add(event, listener)
+
+    def remove_listener(self, event: str, listener: Callable):
+        self.hooks.remove(event, listener)
+        if not self.hooks:
+            self.hooks = None
+
+    def snapshot(self) -> bytes:
+        return snapshot(self.internal_state)
+
+    def restore(self, blob: bytes):
+        if isinstance(self.internal_state, CompactState):
+            self.internal_state.load(blob)
+        else:
+            self.internal_state = CompactState(blob).to_internal_state()
+
+    def state_hash(self) -> int:
+        """
+        64 bit zobrist hash of the game state without the step counter, kept up to date on every
+        change of a compact state and computed from scratch for InternalState
+        """
+        internal_state = self.internal_state
+        if not isinstance(internal_state, CompactState):
+            internal_state = CompactState.from_internal_state(internal_state)
+        return internal_state.zobrist
+
+    def new_undo_record(self) -> UndoRecord:
+        """
+        record all following changes of this state, until another record is tracked. Only writes to a
+        compact state are journaled, InternalState would need a full copy per record.
+        """
+        if not isinstance(self.internal_state, CompactState):
+            raise ValueError("undo records need a compact state, create the simulation with compact_state=True")
+        record = UndoRecord()
+        self.track_changes(record)
+        return record
+
+    def track_changes(self, record: Optional[UndoRecord]):
+        self._undo_record = record
+        if isinstance(self.internal_state, CompactState):
+            self.internal_state.track(record.changes if record is not None else None)
+
+    def undo(self, record: UndoRecord):
+        if self._undo_record is record:
+            self.track_changes(None)
+        self.internal_state.revert(record.changes)
+        if record.random_state is not None:
+            self.random.setstate(record.random_state)
+
     def _init_infection_markers(self):
         [self.__draw_and_infect(i) for i in range(3, 0, -1)]
 
@@ -162,6 +258,8 @@ class State:
     def infect_city(self, city: City, color: Virus = None, times: int = 1) -> bool:
         if color is None:
             color = CITY_DATA[city].color
+        if self.hooks is not None:
+            self.hooks.emit(INFECTION, city, color, times)
         outbreak = self._infect_city(city, color, times)
         if outbreak:
             self._outbreak(city, color)
@@ -174,24 +272,36 @@ class State:
         if color is None:
             color = CITY_DATA[city].color
 
-        if self._is_city_protected_by_quarantine(city) or (
-            self.cures[color]
-            and (self.cubes[color] == COUNT_CUBES or self._character_location(Character.MEDIC) == city)
-        ):
+        if self._protection_mask(color) >> city & 1:
             # virus has been eradicated or city is protected by medic or quarantine expert
             return outbreak_occurred
         for _ in itertools.repeat(None, times):
             outbreak_occurred = self.cities[city].inc_infection(color)
             if outbreak_occurred:
                 break
-
-            if self.cubes[color] > 0:
-                self.cubes[color] -= 1
-            else:
-                self.game_state = GameState.LOST
+            self._take_cube(color)
 
         return outbreak_occurred
 
+    def _take_cube(self, color: Virus):
+        if self.cubes[color] > 0:
+            self.cubes[color] -= 1
+        else:
+            self.game_state = GameState.LOST
+
+    def _protection_mask(self, color: Virus) -> int:
+        """cities which can not be infected with color"""
+        protected = 0
+        if self.cures[color]:
+            if self.cubes[color] == COUNT_CUBES:
+                return ALL_CITIES_MASK
+            medic = self._character_location(Character.MEDIC)
+            if medic:
+                protected = 1 << medic
+        if self.phase != Phase.SETUP and Character.QUARANTINE_SPECIALIST in self.players.keys():
+            protected |= QUARANTINE_MASKS[self._character_location(Character.QUARANTINE_SPECIALIST)]
+        return protected
+
     def _character_location(self, char: Character) -> Optional[City]:
         state = self.players.get(char, None)
         return state.city if state else None
@@ -200,12 +310,6 @@ class State:
         self.phase = Phase.CHOOSE_CARDS
         self.phase_state = inp
 
-    def _is_city_protected_by_quarantine(self, city) -> bool:
-        if self.phase != Phase.SETUP and Character.QUARANTINE_SPECIALIST in self.players.keys():
-            location = self._character_location(Character.QUARANTINE_SPECIALIST)
-            return city in CITY_DATA[location].neighbors.union([location])
-        return False
-
     def treat_city(self, city: City, color: Virus = None, times: int = 1) -> bool:
         is_empty = False
         city_state = self.cities[city]
@@ -234,7 +338,7 @@ class State:
             pass
         elif self.infections_steps < self.infection_rate():
             try:
-                top_card = self.infection_deck.pop(0)
+                top_card = self.infection_deck.draw()
             except IndexError:
                 # TODO: inspect here!
                 self.game_state = GameState.LOST
@@ -263,7 +367,7 @@ class State:
         chunks = np.array_split(city_cards, num_epidemic_cards)
         epidemic_cards = list(EpidemicCard.__members__)
         [self.__prepare_chunk(c, epidemic_cards, prepared_deck) for c in chunks]
-        self.player_deck = prepared_deck
+        self.player_deck = Deck(prepared_deck)
 
     def __prepare_chunk(self, c, epidemic_cards, prepared_deck):
         d = list(c)
@@ -277,15 +381,16 @@ class State:
     def _epidemic_1st_part(self):
         self.phase = Phase.EPIDEMIC
         self.infection_rate_marker += 1
-        bottom_card = self.infection_deck.pop(-1)
-        logging.info("Epidemic in %s!" % bottom_card)
+        bottom_card = self.infection_deck.draw_bottom()
+        if self.hooks is not None:
+            self.hooks.emit(EPIDEMIC, bottom_card)
         self.infect_city(bottom_card, times=3)
         self.infection_discard_pile.append(bottom_card)
 
     def epidemic_2nd_part(self):
-        self.random.shuffle(self.infection_discard_pile)
-        self.infection_deck = self.infection_discard_pile.copy() + self.infection_deck
-        self.infection_discard_pile.clear()
+        if self._undo_record is not None and self._undo_record.random_state is None:
+            self._undo_record.random_state = self.random.getstate()
+        self.infection_deck.intensify(self.infection_discard_pile, self.random)
         if self.drawn_cards == 2:
             self.drawn_cards = 0
             self.phase = Phase.INFECTIONS
@@ -300,14 +405,16 @@ class State:
 
     def draw_card(self) -> Optional[Card]:
         try:
-            top_card = self.player_deck.pop(0)
+            top_card = self.player_deck.draw()
+            if self.hooks is not None:
+                self.hooks.emit(CARD_DRAW, top_card)
             if Card.card_type(top_card) == Card.EPIDEMIC:
                 self._epidemic_1st_part()
                 return -1
             else:
                 return top_card
         except IndexError:
-            logging.info("you lost no more cards")
+            # no more player cards
             self.game_state = GameState.LOST
             return -1
 
@@ -315,20 +422,27 @@ class State:
     Function to simulate outbreaks
     """
 
-    def _outbreak(self, city: City, color: Virus, outbreaks: Set[City] = None):
-        if outbreaks is None:
-            outbreaks = set()
-        if city not in outbreaks:
+    def _outbreak(self, city: City, color: Virus):
+        cities = self.cities
+        unprotected = ~self._protection_mask(color)
+        outbroken = 0
+        worklist = [city]
+        while worklist:
+            city = worklist.pop()
+            if outbroken >> city & 1:
+                continue
+            outbroken |= 1 << city
             self.outbreaks += 1
+            if self.hooks is not None:
+                self.hooks.emit(OUTBREAK, city, color)
             if self.outbreaks > 7:
                 self.game_state = GameState.LOST
                 return
-            neighbors = CITY_DATA[city].neighbors
-            for n in neighbors:
-                has_outbreak = self._infect_city(n, color, 1)
-                if has_outbreak:
-                    outbreaks.add(city)
-                    self._outbreak(n, color, outbreaks)
+            for n in iter_bits(NEIGHBOR_MASKS[city] & unprotected):
+                if cities[n].inc_infection(color):
+                    worklist.append(n)
+                else:
+                    self._take_cube(color)
 
     def _serve_player_cards(self, player_count: int):
         [
@@ -490,7 +604,7 @@ class State:
 
     @infection_deck.setter
     def infection_deck(self, value):
-        self.internal_state.infection_deck = value
+        self.internal_state.infection_deck = as_deck(value)
 
     @property
     def infection_discard_pile(self):
@@ -506,7 +620,7 @@ class State:
 
     @player_deck.setter
     def player_deck(self, value):
-        self.internal_state.player_deck = value
+        self.internal_state.player_deck = as_deck(value)
 
     @property
     def player_discard_pile(self):
@@ -522,4 +636,12 @@ class State:
 
     @game_state.setter
     def game_state(self, value):
+        ended = self.internal_state.game_state == GameState.RUNNING and value != GameState.RUNNING
         self.internal_state.game_state = value
+        if ended and self.hooks is not None:
+            self.hooks.emit(GAME_END, value)
+
+    def cure(self, virus: Virus):
+        self.internal_state.cures[virus] = True
+        if self.hooks is not None:
+            self.hooks.emit(CURE, virus)
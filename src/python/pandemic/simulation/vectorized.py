@@ -0,0 +1,333 @@
+"""
+Batch simulator running many games in lockstep on stacked NumPy arrays.
+
+It plays the base rules of State/Simulation (moves, treating, research stations, cures, hand limit,
+drawing, epidemics, infections and outbreak chains) without character abilities and event cards, which
+are dealt as plain cards. The turn ends automatically after the fourth action: drawing two player cards,
+resolving epidemics and infecting are done in the same call. So there are no phases in which Simulation
+steps with None, and PASS is only legal for finished games. A running game ignores PASS, it does not use
+up an action.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+from pandemic.simulation.model.city_id import City, EventCard, EpidemicCard
+from pandemic.simulation.model.constants import (
+    NEIGHBORS,
+    CITY_COLORS,
+    COUNT_CUBES,
+    INFECTIONS_RATES,
+    PLAYER_ACTIONS,
+    PLAYER_START,
+    TOTAL_STARTING_PLAYER_CARDS,
+)
+from pandemic.simulation.model.enums import GameState
+
+NUM_CITIES = 48
+NUM_VIRUSES = 4
+NUM_CARDS = 60
+HAND_LIMIT = 7
+MAX_RESEARCH_STATIONS = 6
+MAX_OUTBREAKS = 7
+
+# integer action layout, cities and viruses zero based
+PASS = 0
+DRIVE_FERRY = 1
+DIRECT_FLIGHT = DRIVE_FERRY + NUM_CITIES
+CHARTER_FLIGHT = DIRECT_FLIGHT + NUM_CITIES
+SHUTTLE_FLIGHT = CHARTER_FLIGHT + NUM_CITIES
+TREAT_DISEASE = SHUTTLE_FLIGHT + NUM_CITIES
+BUILD_RESEARCH_STATION = TREAT_DISEASE + NUM_VIRUSES
+DISCOVER_CURE = BUILD_RESEARCH_STATION + 1
+DISCARD_CARD = DISCOVER_CURE + NUM_VIRUSES
+NUM_ACTIONS = DISCARD_CARD + NUM_CARDS
+
+EPIDEMIC = EpidemicCard.EPIDEMIC_CARD_1
+
+ADJACENCY = np.zeros((NUM_CITIES, NUM_CITIES), dtype=np.int16)
+for _city, _neighbors in NEIGHBORS.items():
+    ADJACENCY[_city - 1, [n - 1 for n in _neighbors]] = 1
+
+# virus (zero based) of every city and city card
+CITY_VIRUS = np.array([CITY_COLORS[city] - 1 for city in City.__members__], dtype=np.int64)
+CARD_COLORS = np.zeros((NUM_CARDS, NUM_VIRUSES), dtype=np.int16)
+CARD_COLORS[np.arange(1, NUM_CITIES + 1), CITY_VIRUS] = 1
+
+PLAYER_CARDS = np.array(list(City.__members__) + list(EventCard.__members__), dtype=np.int8)
+
+
+class VectorizedSimulation:
+    def __init__(
+        self,
+        num_games: int,
+        player_count: int = 2,
+        num_epidemic_cards: int = 5,
+        cards_for_cure: int = 5,
+        seed: Optional[int] = None,
+    ):
+        if not 2 <= player_count <= 4:
+            raise ValueError("player count must be between 2 and 4")
+        self.num_games = num_games
+        self.player_count = player_count
+        self.num_epidemic_cards = num_epidemic_cards
+        self.cards_for_cure = cards_for_cure
+        self.random = np.random.default_rng(seed)
+
+        n = num_games
+        deck_size = len(PLAYER_CARDS) - player_count * (TOTAL_STARTING_PLAYER_CARDS - player_count)
+        self._deck_size = deck_size + num_epidemic_cards
+        self._chunk_sizes = [len(c) for c in np.array_split(np.arange(deck_size), num_epidemic_cards)]
+
+        self.cubes = np.zeros((n, NUM_CITIES, NUM_VIRUSES), dtype=np.int16)
+        self.supply = np.zeros((n, NUM_VIRUSES), dtype=np.int16)
+        self.cures = np.zeros((n, NUM_VIRUSES), dtype=bool)
+        self.research_stations = np.zeros((n, NUM_CITIES), dtype=bool)
+        self.positions = np.zeros((n, player_count), dtype=np.int64)
+        self.hands = np.zeros((n, player_count, NUM_CARDS), dtype=bool)
+        self.player_deck = np.zeros((n, self._deck_size), dtype=np.int8)
+        self.player_deck_top = np.zeros(n, dtype=np.int64)
+        # infection deck: the deck are the cards not discarded, ordered by key, top card has the smallest key
+        self.infection_keys = np.zeros((n, NUM_CITIES))
+        self.infection_discarded = np.zeros((n, NUM_CITIES), dtype=bool)
+        self.active_player = np.zeros(n, dtype=np.int64)
+        self.actions_left = np.zeros(n, dtype=np.int64)
+        self.infection_rate_marker = np.zeros(n, dtype=np.int64)
+        self.outbreaks = np.zeros(n, dtype=np.int64)
+        self.game_state = np.zeros(n, dtype=np.int8)
+        self.steps = np.zeros(n, dtype=np.int64)
+        self.reset()
+
+    #########
+    # setup #
+    #########
+
+    def reset(self, games: Optional[np.ndarray] = None):
+        """start new games, for all games or the ones selected by an index or boolean array"""
+        g = np.arange(self.num_games)[games] if games is not None else np.arange(self.num_games)
+        n = len(g)
+        if n == 0:
+            return
+        self.cubes[g] = 0
+        self.supply[g] = COUNT_CUBES
+        self.cures[g] = False
+        self.research_stations[g] = False
+        self.research_stations[g, PLAYER_START - 1] = True
+        self.positions[g] = PLAYER_START - 1
+        self.hands[g] = False
+        self.active_player[g] = 0
+        self.actions_left[g] = PLAYER_ACTIONS
+        self.infection_rate_marker[g] = 0
+        self.outbreaks[g] = 0
+        self.game_state[g] = GameState.RUNNING
+        self.steps[g] = 0
+
+        # deal the player cards and shuffle one epidemic into each chunk of the rest
+        cards = PLAYER_CARDS[np.argsort(self.random.random((n, len(PLAYER_CARDS))), axis=1)]
+        per_player = TOTAL_STARTING_PLAYER_CARDS - self.player_count
+        for p in range(self.player_count):
+            self.hands[g[:, None], p, cards[:, p * per_player : (p + 1) * per_player]] = True
+        rest = cards[:, self.player_count * per_player :]
+        start = 0
+        for chunk, size in enumerate(self._chunk_sizes):
+            epidemic_at = self.random.integers(0, size + 1, n)[:, None]
+            column = np.arange(size + 1)[None, :]
+            source = rest[:, start : start + size]
+            shifted = np.take_along_axis(source, np.clip(column - (column > epidemic_at), 0, size - 1), axis=1)
+            self.player_deck[g, start + chunk : start + chunk + size + 1] = np.where(
+                column == epidemic_at, EPIDEMIC, shifted
+            )
+            start += size
+        self.player_deck_top[g] = 0
+
+        # initial infections: 3 cities with 3, 2 and 1 cubes
+        self.infection_keys[g] = self.random.random((n, NUM_CITIES))
+        self.infection_discarded[g] = False
+        for times in (3, 3, 3, 2, 2, 2, 1, 1, 1):
+            city = self._draw_infection_card(g)
+            self._infect(g, city, CITY_VIRUS[city], times)
+
+    ###########
+    # actions #
+    ###########
+
+    def legal_action_mask(self) -> np.ndarray:
+        """(num_games, NUM_ACTIONS) bool array of legal actions, finished games can only pass"""
+        n = self.num_games
+        games = np.arange(n)
+        mask = np.zeros((n, NUM_ACTIONS), dtype=bool)
+        running = self.game_state == GameState.RUNNING
+        player = self.active_player
+        position = self.positions[games, player]
+        hand = self.hands[games, player]
+        city_cards = hand[:, 1 : NUM_CITIES + 1]
+        other_cities = np.ones((n, NUM_CITIES), dtype=bool)
+        other_cities[games, position] = False
+        has_station = self.research_stations[games, position]
+
+        mask[:, DRIVE_FERRY:DIRECT_FLIGHT] = ADJACENCY[position] > 0
+        mask[:, DIRECT_FLIGHT:CHARTER_FLIGHT] = city_cards & other_cities
+        mask[:, CHARTER_FLIGHT:SHUTTLE_FLIGHT] = city_cards[games, position][:, None] & other_cities
+        mask[:, SHUTTLE_FLIGHT:TREAT_DISEASE] = has_station[:, None] & self.research_stations & other_cities
+        mask[:, TREAT_DISEASE:BUILD_RESEARCH_STATION] = self.cubes[games, position] > 0
+        mask[:, BUILD_RESEARCH_STATION] = (
+            ~has_station & city_cards[games, position] & (self.research_stations.sum(axis=1) < MAX_RESEARCH_STATIONS)
+        )
+        mask[:, DISCOVER_CURE:DISCARD_CARD] = (
+            has_station[:, None] & (hand.astype(np.int16) @ CARD_COLORS >= self.cards_for_cure) & ~self.cures
+        )
+
+        # a player over the hand limit has to discard first
+        discarding, discard_player = self._over_hand_limit()
+        mask[discarding] = False
+        mask[discarding, DISCARD_CARD:] = self.hands[discarding, discard_player[discarding]]
+
+        mask[~running] = False
+        mask[~running, PASS] = True
+        return mask
+
+    def sample_random_actions(self, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """one uniformly random legal action per game"""
+        if mask is None:
+            mask = self.legal_action_mask()
+        return np.argmax(self.random.random(mask.shape) * mask, axis=1)
+
+    def step(self, actions: np.ndarray):
+        """apply one integer action per game, games which are not running ignore their action"""
+        actions = np.asarray(actions, dtype=np.int64)
+        n = self.num_games
+        games = np.arange(n)
+        running = self.game_state == GameState.RUNNING
+        player = self.active_player
+        position = self.positions[games, player]
+
+        def selected(start: int, stop: int):
+            g = np.nonzero(running & (actions >= start) & (actions < stop))[0]
+            return g, actions[g] - start
+
+        g, city = selected(DRIVE_FERRY, DIRECT_FLIGHT)
+        self.positions[g, player[g]] = city
+
+        g, city = selected(DIRECT_FLIGHT, CHARTER_FLIGHT)
+        self.hands[g, player[g], city + 1] = False
+        self.positions[g, player[g]] = city
+
+        g, city = selected(CHARTER_FLIGHT, SHUTTLE_FLIGHT)
+        self.hands[g, player[g], position[g] + 1] = False
+        self.positions[g, player[g]] = city
+
+        g, city = selected(SHUTTLE_FLIGHT, TREAT_DISEASE)
+        self.positions[g, player[g]] = city
+
+        g, virus = selected(TREAT_DISEASE, BUILD_RESEARCH_STATION)
+        count = self.cubes[g, position[g], virus]
+        treated = np.where(self.cures[g, virus], count, np.minimum(count, 1))
+        self.cubes[g, position[g], virus] -= treated
+        self.supply[g, virus] += treated
+
+        g, _ = selected(BUILD_RESEARCH_STATION, DISCOVER_CURE)
+        self.research_stations[g, position[g]] = True
+        self.hands[g, player[g], position[g] + 1] = False
+
+        g, virus = selected(DISCOVER_CURE, DISCARD_CARD)
+        cure_cards = self.hands[g, player[g]] & (CARD_COLORS[:, virus].T > 0)
+        self.hands[g, player[g]] &= ~(cure_cards & (np.cumsum(cure_cards, axis=1) <= self.cards_for_cure))
+        self.cures[g, virus] = True
+        self.game_state[g[self.cures[g].all(axis=1)]] = GameState.WIN
+
+        g, card = selected(DISCARD_CARD, NUM_ACTIONS)
+        _, discard_player = self._over_hand_limit()
+        self.hands[g, discard_player[g], card] = False
+
+        # passing and discarding do not use up an action
+        acted = running & (actions > PASS) & (actions < DISCARD_CARD) & (self.game_state == GameState.RUNNING)
+        self.steps[running & (actions != PASS)] += 1
+        self.actions_left[acted] -= 1
+        self._end_turn(np.nonzero(acted & (self.actions_left == 0))[0])
+
+    ############
+    # internal #
+    ############
+
+    def _over_hand_limit(self):
+        over = self.hands.sum(axis=2) > HAND_LIMIT
+        return over.any(axis=1), np.argmax(over, axis=1)
+
+    def _end_turn(self, g: np.ndarray):
+        for _ in range(2):
+            g = g[self.game_state[g] == GameState.RUNNING]
+            out_of_cards = self.player_deck_top[g] >= self._deck_size
+            self.game_state[g[out_of_cards]] = GameState.LOST
+            g = g[~out_of_cards]
+            card = self.player_deck[g, self.player_deck_top[g]].astype(np.int64)
+            self.player_deck_top[g] += 1
+            epidemic = card == EPIDEMIC
+            self.hands[g[~epidemic], self.active_player[g[~epidemic]], card[~epidemic]] = True
+            self._epidemic(g[epidemic])
+
+        g = g[self.game_state[g] == GameState.RUNNING]
+        rates = np.array(INFECTIONS_RATES)[self.infection_rate_marker[g]]
+        for infection in range(max(INFECTIONS_RATES)):
+            infecting = g[(rates > infection) & (self.game_state[g] == GameState.RUNNING)]
+            city = self._draw_infection_card(infecting)
+            self._infect(infecting, city, CITY_VIRUS[city], 1)
+
+        self.active_player[g] = (self.active_player[g] + 1) % self.player_count
+        self.actions_left[g] = PLAYER_ACTIONS
+
+    def _draw_infection_card(self, g: np.ndarray, bottom: bool = False) -> np.ndarray:
+        empty = self.infection_discarded[g].all(axis=1)
+        self.game_state[g[empty]] = GameState.LOST
+        keys = np.where(self.infection_discarded[g], np.nan, self.infection_keys[g])
+        city = np.zeros(len(g), dtype=np.int64)
+        city[~empty] = (np.nanargmax if bottom else np.nanargmin)(keys[~empty], axis=1)
+        self.infection_discarded[g, city] = True
+        return city
+
+    def _epidemic(self, g: np.ndarray):
+        self.infection_rate_marker[g] += 1
+        city = self._draw_infection_card(g, bottom=True)
+        self._infect(g, city, CITY_VIRUS[city], 3)
+        # intensify: shuffle the discard pile back on top of the deck
+        discarded = self.infection_discarded[g]
+        top = np.where(discarded, np.inf, self.infection_keys[g]).min(axis=1, initial=np.inf)
+        top = np.where(np.isinf(top), 0, top)
+        new_keys = top[:, None] - 1 - self.random.random(discarded.shape)
+        self.infection_keys[g] = np.where(discarded, new_keys, self.infection_keys[g])
+        self.infection_discarded[g] = False
+
+    def _infect(self, g: np.ndarray, city: np.ndarray, virus: np.ndarray, times: int):
+        running = self.game_state[g] == GameState.RUNNING
+        eradicated = self.cures[g, virus] & (self.supply[g, virus] == COUNT_CUBES)
+        g, city, virus = g[running & ~eradicated], city[running & ~eradicated], virus[running & ~eradicated]
+        count = self.cubes[g, city, virus]
+        placed = np.minimum(times, 3 - count)
+        self.cubes[g, city, virus] += placed
+        self._take_cubes(g, virus, placed)
+        outbreak = count + times > 3
+        self._outbreak(g[outbreak], city[outbreak], virus[outbreak])
+
+    def _outbreak(self, g: np.ndarray, city: np.ndarray, virus: np.ndarray):
+        """resolve the chain reactions of outbreaks in waves"""
+        pending = np.zeros((len(g), NUM_CITIES), dtype=bool)
+        pending[np.arange(len(g)), city] = True
+        outbroken = np.zeros_like(pending)
+        while len(g):
+            self.outbreaks[g] += pending.sum(axis=1)
+            self.game_state[g[self.outbreaks[g] > MAX_OUTBREAKS]] = GameState.LOST
+            outbroken |= pending
+            incoming = pending.astype(np.int16) @ ADJACENCY
+            count = self.cubes[g, :, virus]
+            placed = np.minimum(incoming, 3 - count)
+            self.cubes[g, :, virus] += placed
+            self._take_cubes(g, virus, placed.sum(axis=1))
+            pending = (incoming > 3 - count) & ~outbroken
+            chain = pending.any(axis=1) & (self.game_state[g] == GameState.RUNNING)
+            g, virus, pending, outbroken = g[chain], virus[chain], pending[chain], outbroken[chain]
+
+    def _take_cubes(self, g: np.ndarray, virus: np.ndarray, count: np.ndarray):
+        self.supply[g, virus] -= count
+        exhausted = self.supply[g, virus] < 0
+        self.game_state[g[exhausted]] = GameState.LOST
+        self.supply[g[exhausted], virus[exhausted]] = 0
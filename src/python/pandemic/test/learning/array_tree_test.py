@@ -0,0 +1,150 @@
+import random
+
+import numpy as np
+import pytest
+
+from pandemic.learning.array_tree import NO_NODE, ArrayMcts, ArraySpMcts, ArrayTree, ArrayTreeSearch
+from pandemic.learning.mcts_state import PandemicMctsState, PandemicTreeSearchState
+from pandemic.learning.rollout import Rollout
+from pandemic.simulation.action_catalog import ACTION_IDS, PASS, action_of
+from pandemic.simulation.model.enums import GameState
+from pandemic.simulation.model.phases import Phase
+from pandemic.test.learning.rollout_test import create_state
+
+
+class TestArrayTree:
+    @staticmethod
+    def test_children_grow_the_arrays():
+        tree = ArrayTree(capacity=2)
+        root = tree.add_node()
+        first = tree.add_children(root, [5, 7, 9])
+        grandchild = tree.add_children(first + 2, [3])
+        assert len(tree) == 5 and tree.capacity >= 5
+        assert tree.children(root) == range(1, 4) and tree.children(first) == range(0)
+        assert tree.child(root, 9) == 3 and tree.parent[grandchild] == 3 and tree.parent[root] == NO_NODE
+        assert tree.path(grandchild).tolist() == [4, 3, 0]
+        with pytest.raises(KeyError):
+            tree.child(root, 4)
+
+    @staticmethod
+    def test_backpropagate_and_choose_children():
+        tree = ArrayTree()
+        root = tree.add_node()
+        first = tree.add_children(root, [1, 2])
+        assert tree.best_child(root, 0.7, 0.1) == first
+        tree.backpropagate(first, 2, 30)
+        tree.backpropagate(first, 2, 20)
+        assert tree.best_child(root, 0.7, 0.1) == first + 1
+        tree.backpropagate(first + 1, 3, 40)
+        tree.backpropagate(first + 1, 0, 10)
+        assert tree.num_visits[root] == 4 and tree.total_reward[root] == 7 and tree.squared_reward[root] == 17
+        assert tree.max_reward[root] == 3 and tree.max_steps[root] == 40
+        assert tree.max_steps[first] == 20
+        assert tree.most_rewarding_child(root) == first + 1
+        assert tree.ucb_child(root, 0) == first and tree.mean_child(root) == first
+
+        third = tree.add_children(first, [4, 6])
+        tree.backpropagate(third + 1, -1, 5)
+        assert tree.ucb_child(first, 0.7) == third and tree.mean_child(first) == third + 1
+
+
+class TestArraySpMcts:
+    @staticmethod
+    def test_rounds_keep_states_of_expanded_nodes():
+        random.seed(1)
+        initial_state = create_state()
+        sp_mcts = ArraySpMcts(
+            initial_state, select_treshold=3, rollout_policy=Rollout(rand=random.Random(1)), capacity=8
+        )
+        for _ in range(40):
+            sp_mcts.execute_round()
+        tree = sp_mcts.tree
+        assert tree.num_visits[sp_mcts.root] == 40
+        assert tree.num_visits[list(tree.children(sp_mcts.root))].sum() == 37
+        assert sorted(tree.states) == np.flatnonzero(tree.child_count[: len(tree)]).tolist()
+        assert sp_mcts.max_reward == tree.max_reward[sp_mcts.root] and sp_mcts.max_steps > 0
+
+        # children are the filtered actions of the root, in the states take_action leads to
+        actions = [action_of(action) for action in tree.action[list(tree.children(sp_mcts.root))]]
+        assert actions == initial_state._possible_actions
+        for child in list(tree.children(sp_mcts.root))[:3]:
+            sp_mcts.enter(child)
+            expected = initial_state.take_action(actions.index(action_of(int(tree.action[child]))))
+            assert sp_mcts.env.state.snapshot() == expected.state
+
+    @staticmethod
+    def test_leaves_are_entered_alike_after_epidemics():
+        initial_state = create_state()
+        env = initial_state.env
+        env.state.phase = Phase.EPIDEMIC
+        sp_mcts = ArraySpMcts(PandemicMctsState(env, env.state.snapshot()), seed=2)
+        # waiting resolves the epidemic, which shuffles the infection discard pile
+        epidemic = sp_mcts.tree.add_children(sp_mcts.root, [PASS])
+        sp_mcts.enter(epidemic)
+        after_epidemic = env.state.snapshot()
+        assert not len(env.state.infection_discard_pile) and after_epidemic != initial_state.state
+
+        # the shuffle of the discard pile does not depend on the random state of the simulation
+        for seed in range(3):
+            env.state.random.seed(seed)
+            sp_mcts.enter(epidemic)
+            assert env.state.snapshot() == after_epidemic
+            assert env.state.random.getstate() == random.Random(seed).getstate()
+        sp_mcts.seed += 1
+        sp_mcts.enter(epidemic)
+        assert env.state.snapshot() != after_epidemic
+
+    @staticmethod
+    def test_next_action_follows_most_rewarding_children():
+        sp_mcts = ArraySpMcts(create_state(), time_limit=100, select_treshold=1)
+        action = sp_mcts.search()
+        best = sp_mcts.tree.most_rewarding_child(sp_mcts.root)
+        assert action == sp_mcts.tree.action[best] and action in ACTION_IDS.values()
+        if sp_mcts.tree.child_count[best]:
+            sp_mcts.get_next_action(action)
+            assert sp_mcts.root == best
+
+
+class TestArrayMcts:
+    @staticmethod
+    def test_search_chooses_the_best_average_reward():
+        with pytest.raises(ValueError):
+            ArrayMcts(create_state())
+        mcts = ArrayMcts(create_state(), iteration_limit=30, rollout_policy=Rollout(rand=random.Random(3)), seed=3)
+        action = mcts.search()
+        tree = mcts.tree
+        children = list(tree.children(mcts.root))
+        assert tree.num_visits[mcts.root] == 30 and tree.num_visits[children].sum() == 30
+        visited = [child for child in children if tree.num_visits[child]]
+        means = [tree.total_reward[child] / tree.num_visits[child] for child in visited]
+        assert action == tree.action[visited[int(np.argmax(means))]]
+        assert sorted(tree.states) == np.flatnonzero(tree.child_count[: len(tree)]).tolist()
+
+
+class TestArrayTreeSearch:
+    @staticmethod
+    def test_walks_keep_their_nodes():
+        initial_state = create_state()
+        env = initial_state.env
+        search = ArrayTreeSearch(PandemicTreeSearchState(env, initial_state.state), select_threshold=3, seed=4)
+        rewards = [search.walk() for _ in range(12)]
+        tree = search.tree
+        assert search.discovered_final_states == 12 and search.max_reward >= max(rewards)
+        assert tree.num_visits[search.root] >= 12 and search.current_node != search.root
+        # only the root and the nodes current_node moved to keep their states, at most one per walk
+        assert search.current_node in tree.states and len(tree.states) <= 1 + 12 < len(tree)
+
+        # final states are made again alike from the closest snapshot
+        final = int(np.flatnonzero(tree.terminal[: len(tree)])[-1])
+        search.enter(final)
+        expected = env.state.snapshot()
+        search.enter(search.root)
+        search.enter(final)
+        assert env.state.snapshot() == expected and env.state.game_state != GameState.RUNNING
+
+    @staticmethod
+    def test_search_chooses_the_most_rewarding_child():
+        initial_state = create_state()
+        search = ArrayTreeSearch(PandemicTreeSearchState(initial_state.env, initial_state.state), time_limit=100)
+        action = search.search()
+        assert action == search.tree.action[search.tree.most_rewarding_child(search.root)]
@@ -0,0 +1,58 @@
+import os
+
+import numpy as np
+import pytest
+
+from pandemic.learning.disk_replay import DiskReplayMemory
+
+
+def push(memory: DiskReplayMemory, start: int, count: int):
+    actions = np.arange(start, start + count)
+    states = actions[:, None].repeat(memory.observation_size, axis=1)
+    memory.push_batch(states, actions, states + 0.5, actions / 10, actions % 3 == 0)
+
+
+def assert_consistent(batch):
+    assert (batch.state[:, 0] == batch.action).all()
+    assert (batch.next_state == batch.state + 0.5).all()
+    assert np.allclose(batch.reward, batch.action / 10)
+    assert (batch.done == (batch.action % 3 == 0)).all()
+
+
+class TestDiskReplayMemory:
+    @staticmethod
+    def test_sampling_across_chunks(tmp_path):
+        with DiskReplayMemory(str(tmp_path), observation_size=4, capacity=100, chunk_size=8, seed=1) as memory:
+            push(memory, 0, 30)
+            memory.push([30] * 4, 30, [30.5] * 4, 3.0, True)
+            assert len(memory) == 31
+            assert len(os.listdir(tmp_path)) == 4
+            batch = memory.sample(500)
+            assert_consistent(batch)
+            assert set(batch.action.tolist()) == set(range(31))
+            assert memory.gather([0, 8, 30]).action.tolist() == [0, 8, 30]
+
+    @staticmethod
+    def test_evicts_oldest_chunk(tmp_path):
+        with DiskReplayMemory(str(tmp_path), observation_size=2, capacity=32, chunk_size=8, seed=2) as memory:
+            push(memory, 0, 33)
+            assert len(memory) == 25
+            assert len(os.listdir(tmp_path)) == 4
+            batch = memory.sample(300)
+            assert_consistent(batch)
+            assert batch.action.min() == 8
+            assert memory.gather([0]).action.tolist() == [8]
+
+    @staticmethod
+    def test_reopen(tmp_path):
+        directory = str(tmp_path)
+        with DiskReplayMemory(directory, observation_size=3, capacity=40, chunk_size=8) as memory:
+            push(memory, 0, 21)
+        with DiskReplayMemory(directory, observation_size=3, capacity=40, chunk_size=8, seed=3) as memory:
+            assert len(memory) == 21
+            push(memory, 21, 30)
+            assert len(memory) == 35
+            assert memory.gather(np.arange(35)).action.tolist() == list(range(16, 51))
+            assert_consistent(memory.sample(100))
+        with pytest.raises(ValueError):
+            DiskReplayMemory(directory, observation_size=4, capacity=40, chunk_size=8)
@@ -0,0 +1,75 @@
+import random
+
+import numpy as np
+
+from pandemic.learning.easy_environment import EasyPandemic
+from pandemic.learning.environment import Pandemic
+from pandemic.learning.observation import Observation
+from pandemic.simulation.action_catalog import NUM_ACTION_IDS
+from pandemic.simulation.compact_state import DIRTY_ALL
+from pandemic.simulation.model.enums import Character, GameState
+
+
+def create_env(seed: int, env_class=Pandemic, **kwargs) -> Pandemic:
+    return env_class(
+        characters={Character.MEDIC, Character.SCIENTIST},
+        player_deck_shuffle_seed=seed,
+        infect_deck_shuffle_seed=seed + 1,
+        epidemic_shuffle_seed=seed + 2,
+        **kwargs,
+    )
+
+
+class TestPandemic:
+    @staticmethod
+    def test_catalog_actions_step_without_action_objects(monkeypatch):
+        env = create_env(3, catalog_actions=True)
+        reference = create_env(3, catalog_actions=True)
+        rand = random.Random(3)
+        for _ in range(60):
+            # like the env, the reference resolves forecasts while generating actions
+            assert env.legal_actions() == sorted(reference._simulation.get_legal_action_ids())
+            assert len(env.action_space) == NUM_ACTION_IDS
+            assert env._simulation.state.snapshot() == reference._simulation.state.snapshot()
+            action = rand.choice(env.legal_actions())
+            if env.step(action)[2]:
+                break
+            reference._simulation.step_id(action)
+
+        # while the player acts the mask is made without possible actions
+        env.reset()
+        assert env._simulation.state.game_state == GameState.RUNNING
+        monkeypatch.setattr(env._simulation, "get_possible_actions", None)
+        env.step(env.legal_actions()[-1])
+        assert env.action_space.any()
+
+        illegal = int(np.flatnonzero(~env.action_space)[0])
+        assert env.step(illegal)[1] == -1 and env.step(NUM_ACTION_IDS)[1] == -1
+
+    @staticmethod
+    def test_steps_update_observations_incrementally(monkeypatch):
+        for env_class in (Pandemic, EasyPandemic):
+            env = create_env(4, env_class)
+            written = []
+            write = env._observation._write
+            monkeypatch.setattr(
+                env._observation, "_write", lambda state, dirty: written.append(dirty) or write(state, dirty)
+            )
+            rand = random.Random(4)
+            for _ in range(30):
+                observation, _, done, _ = env.step(rand.choice(env.legal_actions()))
+                assert np.array_equal(observation, Observation(2).update(env._simulation.state))
+                if done:
+                    break
+            # the compact default only rewrites the blocks a step changed
+            assert written and DIRTY_ALL not in written
+
+        written.clear()
+        env = create_env(4, compact_state=False)
+        monkeypatch.setattr(env._observation, "_write", lambda state, dirty: written.append(dirty))
+        env.step(env.legal_actions()[0])
+        assert written == [DIRTY_ALL]
+
+    @staticmethod
+    def test_pad_with_zeros():
+        assert Pandemic.pad_with_zeros(4, np.array([3, 1])).tolist() == [3, 1, 0, 0]
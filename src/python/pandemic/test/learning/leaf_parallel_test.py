@@ -0,0 +1,68 @@
+import functools
+import random
+
+import pytest
+
+from pandemic.learning.leaf_parallel import RolloutPool
+from pandemic.learning.mcts import Mcts
+from pandemic.learning.rollout import Rollout
+from pandemic.learning.sp_mcts import SpMcts
+from pandemic.simulation.model.enums import Character
+from pandemic.simulation.simulation import Simulation
+from pandemic.test.learning.rollout_test import create_state
+from pandemic.test.learning.transposition_test import GridState
+
+
+def grid_rollout(state: GridState):
+    while not state.is_terminal():
+        state = state.take_action(random.choice(state.get_possible_actions()))
+    return state.get_reward()
+
+
+def failing_rollout(state):
+    raise RuntimeError("rollout failed")
+
+
+def visits_of_tree(node) -> int:
+    return sum(child.num_visits for child in node.children.values())
+
+
+class TestRolloutPool:
+    @staticmethod
+    def test_mcts_rounds():
+        with RolloutPool(2, grid_rollout, batch_size=4) as pool:
+            mcts = Mcts(iteration_limit=40, rollout_pool=pool)
+            assert mcts.search(GridState()) in (0, 1)
+            assert mcts.root.num_visits == 40 and visits_of_tree(mcts.root) == 40
+            # every reward of the grid is 9
+            assert mcts.root.total_reward == 360
+
+            assert pool.execute_rounds(mcts, time_limit=50) > 0
+            assert mcts.root.num_visits == visits_of_tree(mcts.root)
+
+    @staticmethod
+    def test_sp_mcts_on_warm_simulations():
+        simulation_factory = functools.partial(
+            Simulation, characters={Character.RESEARCHER, Character.SCIENTIST}, compact_state=True
+        )
+        with RolloutPool(2, Rollout(), simulation_factory, batch_size=3) as pool:
+            sp_mcts = SpMcts(create_state(), select_treshold=2, rollout_pool=pool)
+            pool.execute_rounds(sp_mcts, rounds=12)
+            assert sp_mcts.root.num_visits == 12
+            assert sp_mcts.max_steps > 0 and sp_mcts.root.max_reward == sp_mcts.max_reward
+
+    @staticmethod
+    def test_default_rollouts_play_on_the_simulation_of_the_leaf():
+        with RolloutPool(2, batch_size=2) as pool:
+            sp_mcts = SpMcts(create_state(), select_treshold=2, rollout_pool=pool)
+            pool.execute_rounds(sp_mcts, rounds=6)
+            assert sp_mcts.root.num_visits == 6 and sp_mcts.max_steps > 0
+
+    @staticmethod
+    def test_failed_rollout_removes_virtual_loss():
+        with RolloutPool(2, failing_rollout, batch_size=3) as pool:
+            mcts = Mcts(iteration_limit=5, rollout_pool=pool)
+            mcts.root = mcts.new_node(GridState(), None)
+            with pytest.raises(RuntimeError):
+                pool.execute_rounds(mcts, rounds=5)
+            assert mcts.root.num_visits == 0
@@ -0,0 +1,87 @@
+import random
+
+import numpy as np
+
+from pandemic.learning.environment import Pandemic
+from pandemic.learning.observation import Observation, observation_size, HAND_SIZE
+from pandemic.simulation.model.enums import Character, GameState
+from pandemic.simulation.simulation import Simulation
+
+
+def expected_observation(state) -> np.ndarray:
+    """the observation built from scratch the way the environment used to"""
+    counts = [
+        state.active_player,
+        state.phase,
+        state.outbreaks / 8,
+        state.infection_rate_marker / 7,
+        state.actions_left / 4,
+        len(state.player_deck),
+        len(state.infection_discard_pile),
+        state.research_stations,
+    ]
+    city_tuples = [
+        (int(city.has_research_station()),) + tuple(city.viral_state.values()) for city in state.cities.values()
+    ]
+    cities = list(sum(zip(*city_tuples), ()))
+    players = list(sum(zip(*[(character, player.city) for character, player in state.players.items()]), ()))
+    hands = []
+    for player in state.players.values():
+        cards = sorted(player.cards)
+        hands += cards + [0] * (HAND_SIZE - len(cards))
+    cubes = [c / 24 for c in state.cubes.values()]
+    cures = [int(c) for c in state.cures.values()]
+    return np.array(counts + cities + players + hands + cubes + cures, dtype=np.float32)
+
+
+def play(compact_state: bool, seed: int):
+    simulation = Simulation(
+        characters={Character.MEDIC, Character.RESEARCHER, Character.CONTINGENCY_PLANNER},
+        player_deck_shuffle_seed=seed,
+        infect_deck_shuffle_seed=seed + 1,
+        epidemic_shuffle_seed=seed + 2,
+        compact_state=compact_state,
+    )
+    observation = Observation(3)
+    rand = random.Random(seed)
+    snapshots = []
+    while simulation.state.game_state == GameState.RUNNING:
+        assert np.array_equal(observation.update(simulation.state), expected_observation(simulation.state))
+        snapshots.append(simulation.state.snapshot())
+        actions = simulation.get_possible_actions()
+        simulation.step(rand.choice(actions) if actions else None)
+    return simulation, observation, snapshots
+
+
+class TestObservation:
+    @staticmethod
+    def test_incremental_updates_equal_full_build():
+        for seed in range(3):
+            simulation, observation, snapshots = play(compact_state=True, seed=seed)
+            # jumping between states of the game
+            for snapshot in random.Random(seed).sample(snapshots, 10):
+                simulation.state.restore(snapshot)
+                assert np.array_equal(observation.update(simulation.state), expected_observation(simulation.state))
+
+    @staticmethod
+    def test_object_backend():
+        play(compact_state=False, seed=5)
+
+    @staticmethod
+    def test_view_and_copy():
+        simulation, observation, _ = play(compact_state=True, seed=7)
+        view = observation.update(simulation.state)
+        assert view is observation.update(simulation.state)
+        copy = observation.update(simulation.state, copy=True)
+        assert copy is not view and np.array_equal(copy, view)
+        assert view.dtype == np.float32 and view.shape == (observation_size(3),)
+
+    @staticmethod
+    def test_environment_observations():
+        env = Pandemic(characters={Character.MEDIC, Character.SCIENTIST}, player_deck_shuffle_seed=1)
+        first = env._get_obs()
+        assert first.shape == (observation_size(2),)
+        env.step(0 if 0 in env._action_lookup else next(iter(env._action_lookup)))
+        assert np.array_equal(env.observation_space, expected_observation(env._simulation.state))
+        env.reset()
+        assert np.array_equal(env.observation_space, expected_observation(env._simulation.state))
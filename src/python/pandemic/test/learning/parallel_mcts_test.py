@@ -0,0 +1,87 @@
+import random
+
+from pandemic.learning.mcts import Mcts
+from pandemic.learning.parallel_mcts import (
+    ChildStatistics,
+    ParallelSpMcts,
+    RootParallelMcts,
+    best_line,
+    merge_statistics,
+)
+from pandemic.learning.rollout import Rollout
+from pandemic.learning.sp_mcts import SpMcts
+from pandemic.test.learning.rollout_test import create_state
+from pandemic.test.learning.transposition_test import GridState
+
+
+class TestRootParallelMcts:
+    @staticmethod
+    def test_merge_statistics():
+        merged = merge_statistics(
+            [
+                {0: ChildStatistics(2, 3, 5, 2, 9), 1: ChildStatistics(1, 1, 1, 1)},
+                {0: ChildStatistics(4, 2, 2, 2, 7), 2: ChildStatistics(3, 0, 0, 0)},
+                {0: ChildStatistics(1, 1, 1, 1, 1)},
+            ]
+        )
+        assert merged[0] == ChildStatistics(7, 6, 8, 2, 7)
+        assert merged[1] == ChildStatistics(1, 1, 1, 1)
+        assert merged[2].mean_reward == 0
+
+    @staticmethod
+    def test_mcts_workers_merge_root_children():
+        search = RootParallelMcts([Mcts(iteration_limit=30), Mcts(iteration_limit=20)], seed=1)
+        action = search.search(GridState())
+        assert action in (0, 1)
+        assert sum(child.num_visits for child in search.statistics.values()) == 50
+        assert search.statistics[action].mean_reward == max(c.mean_reward for c in search.statistics.values())
+
+        # seeded workers search alike
+        again = RootParallelMcts([Mcts(iteration_limit=30), Mcts(iteration_limit=20)], seed=1)
+        assert again.search(GridState()) == action and again.statistics == search.statistics
+
+    @staticmethod
+    def test_sp_mcts_workers():
+        searches = [
+            SpMcts(create_state(), time_limit=100, meta_time_limit=50, rollout_policy=Rollout(rand=random.Random()))
+            for _ in range(2)
+        ]
+        search = RootParallelMcts(searches, seed=2)
+        action = search.search()
+        best = search.statistics[action]
+        assert best.max_reward == max(child.max_reward for child in search.statistics.values())
+        assert best.num_visits > 0 and best.max_steps < float("inf")
+
+
+class TestParallelSpMcts:
+    @staticmethod
+    def test_best_line():
+        sp_mcts = SpMcts(GridState(), select_treshold=1, rollout_policy=lambda state: (state.get_reward(), state.steps))
+        random.seed(3)
+        for _ in range(30):
+            sp_mcts.execute_round(None)
+        line = best_line(sp_mcts.root)
+        node, copied = sp_mcts.root, line
+        while node.children:
+            assert len(copied.children) == 1 and copied.max_reward == node.max_reward
+            action = SpMcts.get_action(node, SpMcts.get_most_rewarding_child(node))
+            node, copied = node.children[action], copied.children[action]
+            assert copied.state.state_hash() == node.state.state_hash()
+        assert not copied.children
+
+    @staticmethod
+    def test_meta_searches_in_processes():
+        root = create_state()
+        sp_mcts = ParallelSpMcts(
+            root, processes=2, seed=4, time_limit=100, meta_time_limit=50, rollout_policy=Rollout()
+        )
+        action, state = sp_mcts.search()
+        assert state.state == root.state and state.env is root.env
+        assert sp_mcts.root.max_reward == sp_mcts.max_reward and sp_mcts.max_steps > 0
+
+        # get_next_action follows the line sent back
+        node = sp_mcts.root.children[action]
+        assert node.state.env is root.env
+        while node.children:
+            action = sp_mcts.get_next_action(action)
+            node = sp_mcts.root.children[action]
@@ -0,0 +1,80 @@
+import random
+
+import numpy as np
+
+from pandemic.learning.environment import Pandemic
+from pandemic.learning.recorder import EpisodeRecorder, load_episodes
+from pandemic.simulation.action_catalog import PASS, action_of
+from pandemic.simulation.model.enums import Character, GameState
+
+
+def play_episode(env: Pandemic, rand: random.Random):
+    """actions and rewards of one random episode"""
+    actions, rewards = [], []
+    done = False
+    while not done:
+        action = rand.choice(env.legal_actions())
+        actions.append(env._action_lookup[action])
+        _, reward, done, _ = env.step(action)
+        rewards.append(reward)
+    return actions, rewards
+
+
+class TestEpisodeRecorder:
+    @staticmethod
+    def test_records_episodes_of_env(tmp_path):
+        directory = str(tmp_path)
+        rand = random.Random(1)
+        with EpisodeRecorder(directory, chunk_steps=64) as recorder:
+            env = Pandemic(
+                characters={Character.MEDIC, Character.SCIENTIST},
+                player_deck_shuffle_seed=1,
+                infect_deck_shuffle_seed=2,
+                epidemic_shuffle_seed=3,
+                recorder=recorder,
+                action_history=10,
+            )
+            played = [play_episode(env, rand)]
+            env.reset()
+            played.append(play_episode(env, rand))
+            assert len(env.performed_actions_reward) == 10
+            # an episode not played to its end
+            env.reset()
+            env.step(env.legal_actions()[0])
+
+        steps, episodes = load_episodes(directory)
+        assert episodes["id"].tolist() == [0, 1, 2]
+        assert episodes["steps"].tolist() == [len(played[0][0]), len(played[1][0]), 1]
+        assert episodes["game_state"].tolist() == [GameState.LOST, GameState.LOST, GameState.RUNNING]
+        assert episodes["characters"].tolist() == [[Character.MEDIC, Character.SCIENTIST, 0, 0]] * 3
+        assert episodes["player_deck_shuffle_seed"].tolist() == [1, 1, 1]
+
+        for episode, (actions, rewards) in enumerate(played):
+            selected = steps["episode"] == episode
+            assert np.allclose(steps["reward"][selected], rewards)
+            recorded = [action_of(a) if a != PASS else "Wait" for a in steps["action"][selected]]
+            assert recorded == actions
+        assert steps["outbreaks"].max() > 0
+
+    @staticmethod
+    def test_reset_begins_no_empty_episode(tmp_path):
+        directory = str(tmp_path)
+        with EpisodeRecorder(directory) as recorder:
+            env = Pandemic(characters={Character.MEDIC, Character.SCIENTIST}, recorder=recorder)
+            env.reset()
+            for action in range(5):
+                env.step(env.legal_actions()[action % 2])
+            env.reset()
+        _, episodes = load_episodes(directory)
+        assert episodes["steps"].tolist() == [5]
+
+    @staticmethod
+    def test_reopen_continues_episode_ids(tmp_path):
+        directory = str(tmp_path)
+        for _ in range(2):
+            with EpisodeRecorder(directory) as recorder:
+                recorder.begin_episode({Character.MEDIC, Character.DISPATCHER}, 5)
+                recorder.end_episode(GameState.WIN)
+        _, episodes = load_episodes(directory)
+        assert episodes["id"].tolist() == [0, 1]
+        assert episodes["game_state"].tolist() == [GameState.WIN] * 2
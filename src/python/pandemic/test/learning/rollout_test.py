@@ -0,0 +1,66 @@
+import random
+
+from pandemic.learning.mcts import Mcts
+from pandemic.learning.mcts_state import PandemicMctsState
+from pandemic.learning.rollout import Rollout, filtered_policy
+from pandemic.learning.sp_mcts import SpMcts
+from pandemic.simulation.model.actions import DriveFerry
+from pandemic.simulation.model.enums import Character
+from pandemic.simulation.simulation import Simulation
+
+
+def create_state(action_filter=None) -> PandemicMctsState:
+    env = Simulation(
+        characters={Character.RESEARCHER, Character.SCIENTIST},
+        player_deck_shuffle_seed=5,
+        infect_deck_shuffle_seed=10,
+        epidemic_shuffle_seed=12,
+        compact_state=True,
+    )
+    if action_filter is None:
+        return PandemicMctsState(env, env.state.snapshot())
+    return PandemicMctsState(env, env.state.snapshot(), action_filter=action_filter)
+
+
+def take_actions_rollout(state: PandemicMctsState, rand: random.Random):
+    """uniform rollout through take_action, drawing like uniform_policy"""
+    while not state.is_terminal():
+        actions = state._possible_actions
+        state = state.take_action(0 if actions == ["Wait"] else rand.choice(range(len(actions))))
+    return state.get_reward(), state.steps
+
+
+class TestRollout:
+    @staticmethod
+    def test_equals_rollout_through_states():
+        for action_filter in (None, lambda action: isinstance(action, DriveFerry)):
+            leaf = create_state(action_filter)
+            for seed in range(3):
+                # epidemics shuffle with the random generator of the simulation
+                leaf.env.state.random.seed(seed)
+                expected = take_actions_rollout(leaf, random.Random(seed))
+                leaf.env.state.random.seed(seed)
+                assert Rollout(rand=random.Random(seed))(leaf) == expected
+
+    @staticmethod
+    def test_scratch_simulation_and_terminal_leaf():
+        leaf = create_state()
+        scratch = Simulation(characters={Character.RESEARCHER, Character.SCIENTIST}, compact_state=True)
+        rollout = Rollout(filtered_policy, simulation=scratch, rand=random.Random(1))
+        before = leaf.env.state.snapshot()
+        reward, steps = rollout(leaf)
+        assert steps > 0
+        assert leaf.env.state.snapshot() == before
+
+        terminal = PandemicMctsState(leaf.env, leaf.state, done=True, reward=3, steps=7)
+        assert rollout(terminal) == (3, 7)
+
+    @staticmethod
+    def test_rollout_policy_of_searches():
+        sp_mcts = SpMcts(create_state(), select_treshold=1, rollout_policy=Rollout(rand=random.Random(2)))
+        for _ in range(5):
+            sp_mcts.execute_round(None)
+        assert sp_mcts.root.num_visits == 5 and sp_mcts.max_steps > 0
+
+        mcts = Mcts(iteration_limit=3, rollout_policy=Rollout(rand=random.Random(3), return_steps=False))
+        assert mcts.search(create_state()) is not None
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from pandemic.learning.transition import ArrayReplayMemory, SumTree
+
+
+def filled_memory(count: int, capacity: int, prioritized: bool = False) -> ArrayReplayMemory:
+    memory = ArrayReplayMemory(capacity, observation_size=3, prioritized=prioritized, seed=1)
+    states = np.arange(count, dtype=np.float32)[:, None].repeat(3, axis=1)
+    memory.push_batch(states, np.arange(count), states + 1, np.arange(count) / 10, np.arange(count) % 2 == 0)
+    return memory
+
+
+class TestSumTree:
+    @staticmethod
+    def test_sums_and_find():
+        tree = SumTree(5)
+        tree.update(np.arange(5), np.array([1.0, 0.0, 2.0, 3.0, 4.0]))
+        assert tree.total == 10
+        assert tree.find(np.array([0, 0.99, 1, 2.5, 3, 5.99, 6, 9.99])).tolist() == [0, 0, 2, 2, 3, 3, 4, 4]
+        tree.update(np.array([4, 4]), np.array([9.0, 0.5]))
+        assert tree.total == 6.5
+
+    @staticmethod
+    def test_find_skips_empty_leaves():
+        # 0.1 + 0.2 + 0.3 rounds up, the total would step past the last filled leaf
+        tree = SumTree(8)
+        tree.update(np.arange(3), np.array([0.1, 0.2, 0.3]))
+        assert tree.find(np.array([tree.total, np.nextafter(tree.total, 1)])).tolist() == [2, 2]
+
+        rand = np.random.default_rng(3)
+        for _ in range(200):
+            capacity = int(rand.integers(1, 100))
+            size = int(rand.integers(1, capacity + 1))
+            tree = SumTree(capacity)
+            priorities = rand.random(size) ** 8
+            priorities[rand.random(size) < 0.3] = 0
+            priorities[-1] = rand.random() + 1e-3
+            tree.update(np.arange(size), priorities)
+            values = np.concatenate([rand.random(50) * tree.total, [tree.total]])
+            assert (tree[tree.find(values)] > 0).all()
+
+
+class TestArrayReplayMemory:
+    @staticmethod
+    def test_ring_buffer_overwrites_oldest():
+        memory = filled_memory(7, capacity=5)
+        assert len(memory) == 5
+        assert sorted(memory.actions.tolist()) == [2, 3, 4, 5, 6]
+        memory.push([9, 9, 9], 9, [10, 10, 10], 0.9, True)
+        assert sorted(memory.actions.tolist()) == [3, 4, 5, 6, 9]
+        assert memory.sample_slice(5).action.tolist() == [3, 4, 5, 6, 9]
+
+    @staticmethod
+    def test_uniform_batches_are_consistent():
+        memory = filled_memory(50, capacity=64)
+        batch = memory.sample(256)
+        assert batch.state.shape == (256, 3) and batch.state.flags["C_CONTIGUOUS"]
+        assert (batch.state[:, 0] == batch.action).all()
+        assert (batch.next_state == batch.state + 1).all()
+        assert np.allclose(batch.reward, batch.action / 10)
+        assert (batch.done == (batch.action % 2 == 0)).all()
+        assert set(batch.action.tolist()) == set(range(50))
+
+    @staticmethod
+    def test_prioritized_sampling():
+        memory = filled_memory(4, capacity=8, prioritized=True)
+        memory.alpha = 1
+        memory.update_priorities(np.arange(4), np.array([0, 0, 0, 1.0]))
+        batch = memory.sample(1000)
+        assert (batch.action == 3).mean() > 0.99
+        assert batch.weights.max() == 1
+        # new transitions are sampled with the highest priority
+        memory.push([5, 5, 5], 5, [6, 6, 6], 0.5)
+        assert (memory.sample(1000).action == 5).mean() > 0.4
+        with pytest.raises(ValueError):
+            filled_memory(4, capacity=8).update_priorities([0], [1.0])
@@ -0,0 +1,89 @@
+from pandemic.learning.mcts import Mcts, MctsState
+from pandemic.learning.mcts_state import PandemicMctsState
+from pandemic.learning.sp_mcts import SpMcts
+from pandemic.learning.transposition import TranspositionTable
+from pandemic.simulation.model.enums import Character
+from pandemic.simulation.simulation import Simulation
+
+
+class GridState(MctsState):
+    """walk right or up on a 4x4 grid, every cell is reached by several move orders"""
+
+    def __init__(self, x=0, y=0):
+        self.x = x
+        self.y = y
+        self.steps = x + y
+        self._possible_actions = ["right", "up"]
+
+    def get_current_player(self):
+        return 1
+
+    def is_terminal(self) -> bool:
+        return self.x == 3 and self.y == 3
+
+    def get_possible_actions(self):
+        return [a for a, possible in enumerate((self.x < 3, self.y < 3)) if possible]
+
+    def take_action(self, action):
+        return GridState(self.x + (action == 0), self.y + (action == 1))
+
+    def get_reward(self):
+        return self.x * self.y
+
+    def state_hash(self) -> int:
+        return self.x * 4 + self.y
+
+
+def count_nodes(root) -> int:
+    seen, stack = set(), [root]
+    while stack:
+        node = stack.pop()
+        if id(node) not in seen:
+            seen.add(id(node))
+            stack.extend(node.children.values())
+    return len(seen)
+
+
+class TestTranspositionTable:
+    @staticmethod
+    def test_least_recently_used_is_replaced():
+        table = TranspositionTable(2)
+        table.put(1, "a")
+        table.put(2, "b")
+        assert table.get(1) == "a"
+        table.put(3, "c")
+        assert 2 not in table
+        assert table.get(1) == "a" and table.get(3) == "c"
+        assert len(table) == 2
+
+    @staticmethod
+    def test_mcts_shares_nodes_of_equal_states():
+        mcts = Mcts(iteration_limit=200, transposition_table_size=100)
+        mcts.search(GridState())
+        assert count_nodes(mcts.root) == 16
+        assert mcts.transpositions.hits > 0
+        # every visit of a shared node is counted once, whichever parent it was reached from
+        assert mcts.root.num_visits == 200
+
+        tree = Mcts(iteration_limit=200)
+        tree.search(GridState())
+        assert count_nodes(tree.root) > 16
+
+    @staticmethod
+    def test_sp_mcts_with_pandemic_states():
+        env = Simulation(
+            characters={Character.RESEARCHER, Character.SCIENTIST},
+            player_deck_shuffle_seed=5,
+            infect_deck_shuffle_seed=10,
+            epidemic_shuffle_seed=12,
+            compact_state=True,
+        )
+        state = PandemicMctsState(env, env.state.snapshot())
+        assert state.state_hash() == env.state.state_hash()
+
+        sp_mcts = SpMcts(state, select_treshold=1, transposition_table_size=50)
+        for _ in range(10):
+            node = sp_mcts.select_node(sp_mcts.root)
+            sp_mcts.backpropogate(node, 1, node.state.steps)
+        assert 0 < len(sp_mcts.transpositions) <= 50
+        assert sp_mcts.root.num_visits == 10
@@ -0,0 +1,79 @@
+import functools
+import random
+
+import numpy as np
+
+from pandemic.learning.easy_environment import EasyPandemic
+from pandemic.learning.environment import Pandemic
+from pandemic.learning.vector_environment import PandemicVectorEnv
+from pandemic.simulation.action_catalog import NUM_ACTION_IDS
+from pandemic.simulation.model.enums import Character
+
+
+def env_fns(env_class, count: int, **kwargs):
+    return [
+        functools.partial(
+            env_class,
+            characters={Character.MEDIC, Character.SCIENTIST},
+            player_deck_shuffle_seed=seed,
+            infect_deck_shuffle_seed=seed + 1,
+            epidemic_shuffle_seed=seed + 2,
+            **kwargs,
+        )
+        for seed in range(count)
+    ]
+
+
+class TestPandemicVectorEnv:
+    @staticmethod
+    def test_steps_like_local_environments():
+        fns = env_fns(Pandemic, 4)
+        local = [fn() for fn in fns]
+        rand = random.Random(1)
+        with PandemicVectorEnv(fns, num_workers=2) as vector_env:
+            observations = vector_env.reset()
+            for _ in range(40):
+                assert np.array_equal(observations, np.array([env.observation_space for env in local]))
+                for env, mask in zip(local, vector_env.action_masks):
+                    assert np.flatnonzero(mask).tolist() == sorted(env.legal_actions())
+                actions = [rand.choice(env.legal_actions()) for env in local]
+                observations, rewards, dones, infos = vector_env.step(actions)
+                for index, (env, action) in enumerate(zip(local, actions)):
+                    _, reward, done, info = env.step(action)
+                    assert rewards[index] == np.float32(reward)
+                    assert dones[index] == done
+                    assert infos[index]["steps"] == info["steps"]
+
+    @staticmethod
+    def test_catalog_action_masks():
+        fns = env_fns(Pandemic, 2, catalog_actions=True)
+        local = [fn() for fn in fns]
+        rand = random.Random(3)
+        with PandemicVectorEnv(fns, num_workers=1) as vector_env:
+            vector_env.reset()
+            for _ in range(20):
+                assert vector_env.action_masks.shape == (2, NUM_ACTION_IDS)
+                assert np.array_equal(vector_env.action_masks, np.array([env.action_space for env in local]))
+                actions = [rand.choice(env.legal_actions()) for env in local]
+                vector_env.step(actions)
+                for env, action in zip(local, actions):
+                    env.step(action)
+
+    @staticmethod
+    def test_auto_reset():
+        fns = env_fns(EasyPandemic, 2)
+        rand = random.Random(2)
+        with PandemicVectorEnv(fns, num_workers=1) as vector_env:
+            initial = vector_env.reset().copy()
+            for _ in range(2000):
+                actions = [rand.choice(np.flatnonzero(mask)) for mask in vector_env.action_masks]
+                observations, _, dones, infos = vector_env.step(actions)
+                if dones.any():
+                    break
+            index = int(np.flatnonzero(dones)[0])
+            assert "terminal_observation" in infos[index]
+            # reset to a fresh deal of the same seeds
+            local = fns[index]()
+            local.reset()
+            assert np.array_equal(observations[index], local.observation_space)
+            assert not np.array_equal(infos[index]["terminal_observation"], initial[index])
@@ -0,0 +1,69 @@
+import random
+
+from pandemic.learning.environment import Pandemic
+from pandemic.simulation.action_cache import ActionCache, MOVES, OTHERS
+from pandemic.simulation.model.actions import TreatDisease
+from pandemic.simulation.model.city_id import City
+from pandemic.simulation.model.enums import Character, GameState, Virus
+from pandemic.simulation.simulation import Simulation, UNCACHED_PHASES
+
+
+def create_simulation() -> Simulation:
+    return Simulation(
+        characters={Character.CONTINGENCY_PLANNER, Character.OPERATIONS_EXPERT, Character.DISPATCHER},
+        player_deck_shuffle_seed=2,
+        infect_deck_shuffle_seed=4,
+        epidemic_shuffle_seed=6,
+        compact_state=True,
+    )
+
+
+class TestActionCache:
+    @staticmethod
+    def test_cached_actions_match_regenerated():
+        for seed in range(5):
+            simulation = create_simulation()
+            rand = random.Random(seed)
+            for _ in range(300):
+                if simulation.state.game_state != GameState.RUNNING:
+                    break
+                actions = simulation.get_possible_actions()
+                if simulation.state.phase not in UNCACHED_PHASES:
+                    cache = simulation._action_cache
+                    simulation._action_cache = ActionCache()
+                    assert simulation.get_possible_actions() == actions
+                    simulation._action_cache = cache
+                simulation.step(rand.choice(actions) if actions else None)
+
+    @staticmethod
+    def test_only_affected_groups_are_regenerated():
+        simulation = create_simulation()
+        state = simulation.state
+        player = state.active_player
+        state.cities[state.players[player].city].viral_state[Virus.BLUE] = 1
+        state.cubes[Virus.BLUE] -= 1
+        assert TreatDisease(state.players[player].city, Virus.BLUE) in simulation.get_possible_actions()
+        moves = simulation._action_cache._groups[MOVES]
+
+        simulation.step(TreatDisease(state.players[player].city, Virus.BLUE))
+        simulation.get_possible_actions()
+        assert simulation._action_cache._groups[MOVES] is moves
+        assert TreatDisease(state.players[player].city, Virus.BLUE) not in simulation._action_cache._groups[OTHERS][1]
+
+        state.players[player].city = City.PARIS
+        assert simulation._action_cache._groups[MOVES] is moves
+        simulation.get_possible_actions()
+        assert simulation._action_cache._groups[MOVES] is not moves
+
+    @staticmethod
+    def test_environment_steps_use_the_cache():
+        env = Pandemic(
+            characters={Character.MEDIC, Character.SCIENTIST},
+            player_deck_shuffle_seed=3,
+            infect_deck_shuffle_seed=4,
+            epidemic_shuffle_seed=5,
+        )
+        simulation = env._simulation
+        env.step(env.legal_actions()[0])
+        assert simulation._action_cache.refresh(simulation.state.internal_state)
+        assert simulation._action_cache._groups
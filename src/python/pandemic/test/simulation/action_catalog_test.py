@@ -0,0 +1,44 @@
+import random
+
+from pandemic.simulation.action_catalog import ACTIONS, NUM_ACTION_IDS, PASS, action_id, action_of
+from pandemic.simulation.model.actions import DriveFerry, TreatDisease
+from pandemic.simulation.model.city_id import City
+from pandemic.simulation.model.enums import Character, GameState, Virus
+from pandemic.simulation.simulation import Simulation
+
+
+def create_simulation(characters):
+    return Simulation(
+        characters=characters,
+        player_deck_shuffle_seed=8,
+        infect_deck_shuffle_seed=9,
+        epidemic_shuffle_seed=10,
+        compact_state=True,
+    )
+
+
+class TestActionCatalog:
+    @staticmethod
+    def test_ids_are_dense_and_unique():
+        assert action_of(PASS) is None
+        assert len(set(ACTIONS)) == NUM_ACTION_IDS
+        for action in (DriveFerry(Character.MEDIC, City.CHICAGO), TreatDisease(City.ATLANTA, Virus.BLUE)):
+            assert action_of(action_id(action)) == action
+
+    @staticmethod
+    def test_play_with_ids():
+        for characters in (
+            {Character.DISPATCHER, Character.OPERATIONS_EXPERT},
+            {Character.CONTINGENCY_PLANNER, Character.RESEARCHER, Character.QUARANTINE_SPECIALIST},
+        ):
+            simulation = create_simulation(characters)
+            id_simulation = create_simulation(characters)
+            rand = random.Random(3)
+            while simulation.state.game_state == GameState.RUNNING:
+                actions = simulation.get_possible_actions()
+                ids = id_simulation.get_legal_action_ids()
+                assert [action_of(i) for i in ids if i != PASS] == actions
+                chosen = rand.choice(ids)
+                simulation.step(action_of(chosen))
+                id_simulation.step_id(chosen)
+                assert id_simulation.state.snapshot() == simulation.state.snapshot()
@@ -0,0 +1,49 @@
+import itertools
+import random
+
+import numpy as np
+
+from pandemic.simulation.action_catalog import NUM_ACTION_IDS
+from pandemic.simulation.model.enums import Character, GameState
+from pandemic.simulation.simulation import Simulation
+
+
+def create_simulation(characters, seed: int, compact_state: bool = True):
+    return Simulation(
+        characters=characters,
+        player_deck_shuffle_seed=seed,
+        infect_deck_shuffle_seed=seed + 1,
+        epidemic_shuffle_seed=seed + 2,
+        compact_state=compact_state,
+    )
+
+
+def assert_mask_equals_ids(characters, seed: int, compact_state: bool = True):
+    simulation = create_simulation(characters, seed, compact_state)
+    reference = create_simulation(characters, seed, compact_state)
+    rand = random.Random(seed)
+    while simulation.state.game_state == GameState.RUNNING:
+        mask = simulation.get_legal_action_mask()
+        ids = reference.get_legal_action_ids()
+        expected = np.zeros(NUM_ACTION_IDS, dtype=bool)
+        expected[ids] = True
+        assert np.array_equal(mask, expected)
+        chosen = rand.choice(ids)
+        simulation.step_id(chosen)
+        reference.step_id(chosen)
+
+
+class TestActionMask:
+    @staticmethod
+    def test_mask_equals_legal_action_ids():
+        for characters in itertools.combinations(sorted(Character.__members__), 3):
+            assert_mask_equals_ids(characters, seed=len(characters) + characters[0])
+
+    @staticmethod
+    def test_mask_of_object_backend():
+        assert_mask_equals_ids({Character.DISPATCHER, Character.OPERATIONS_EXPERT}, seed=4, compact_state=False)
+
+    @staticmethod
+    def test_buffer_is_reused():
+        simulation = create_simulation({Character.MEDIC, Character.SCIENTIST}, seed=1)
+        assert simulation.get_legal_action_mask() is simulation.get_legal_action_mask()
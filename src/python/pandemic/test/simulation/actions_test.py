@@ -0,0 +1,45 @@
+import copy
+import dataclasses
+import pickle
+
+import pytest
+
+from pandemic.simulation.action_catalog import ACTIONS
+from pandemic.simulation.model.actions import Airlift, DriveFerry, OneQuietNight, TreatDisease
+from pandemic.simulation.model.city_id import City
+from pandemic.simulation.model.enums import Character, Virus
+
+
+class TestInternedActions:
+    @staticmethod
+    def test_same_fields_give_same_instance():
+        action = Airlift(Character.MEDIC, Character.SCIENTIST, City.LIMA)
+        assert Airlift(player=Character.MEDIC, target_player=Character.SCIENTIST, destination=City.LIMA) is action
+        assert Airlift(Character.MEDIC, Character.SCIENTIST, destination=City.LIMA) is action
+        assert Airlift(Character.MEDIC, Character.SCIENTIST, City.ATLANTA) is not action
+        assert DriveFerry(Character.MEDIC, City.LIMA) is not Airlift(Character.MEDIC, Character.MEDIC, City.LIMA)
+
+    @staticmethod
+    def test_missing_fields_raise():
+        with pytest.raises(TypeError):
+            Airlift(player=Character.MEDIC, destination=City.LIMA)
+
+    @staticmethod
+    def test_copies_are_interned():
+        for action in (TreatDisease(City.CHICAGO, Virus.BLUE), OneQuietNight(Character.MEDIC)):
+            assert pickle.loads(pickle.dumps(action)) is action
+            assert copy.deepcopy(action) is action
+            assert copy.copy(action) is action
+
+    @staticmethod
+    def test_immutable_and_hashed_by_feature():
+        action = DriveFerry(Character.MEDIC, City.CHICAGO)
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            action.destination = City.ATLANTA
+        assert hash(action) == hash(action.feature)
+        assert dataclasses.astuple(action) == (Character.MEDIC, City.CHICAGO)
+
+    @staticmethod
+    def test_catalog_uses_pooled_instances():
+        for action in ACTIONS[1:]:
+            assert type(action)(*dataclasses.astuple(action)) is action
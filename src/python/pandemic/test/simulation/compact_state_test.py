@@ -0,0 +1,111 @@
+import pickle
+import random
+from copy import deepcopy
+from dataclasses import astuple
+
+from pandemic.simulation.compact_state import CompactState, STATE_SIZE, zobrist_hash
+from pandemic.simulation.model.actions import DriveFerry
+from pandemic.simulation.model.city_id import City
+from pandemic.simulation.model.enums import Character, Virus, GameState
+from pandemic.simulation.simulation import Simulation
+
+
+def create_simulation(compact_state: bool, characters=(Character.MEDIC, Character.DISPATCHER, Character.SCIENTIST)):
+    return Simulation(
+        characters=characters,
+        player_deck_shuffle_seed=3,
+        infect_deck_shuffle_seed=7,
+        epidemic_shuffle_seed=11,
+        compact_state=compact_state,
+    )
+
+
+def action_key(action):
+    return type(action).__name__, tuple(int(field) for field in astuple(action))
+
+
+def play_in_lockstep(characters, seed: int, max_steps: int = 400):
+    simulation = create_simulation(False, characters)
+    compact_simulation = create_simulation(True, characters)
+    rand = random.Random(seed)
+    for _ in range(max_steps):
+        assert (
+            CompactState.from_internal_state(simulation.state.internal_state) == compact_simulation.state.internal_state
+        )
+        assert compact_simulation.state.state_hash() == zobrist_hash(compact_simulation.state.snapshot())
+        assert compact_simulation.state.state_hash() == simulation.state.state_hash()
+        if simulation.state.game_state != GameState.RUNNING:
+            break
+        actions = sorted(simulation.get_possible_actions(), key=action_key)
+        assert actions == sorted(compact_simulation.get_possible_actions(), key=action_key)
+        action = rand.choice(actions) if actions else None
+        simulation.step(action)
+        compact_simulation.step(action)
+    assert compact_simulation.state.game_state == simulation.state.game_state
+
+
+class TestCompactState:
+    @staticmethod
+    def test_round_trip():
+        simulation = create_simulation(False)
+        compact = CompactState.from_internal_state(simulation.state.internal_state)
+        assert compact.to_internal_state() == simulation.state.internal_state
+        assert CompactState.from_internal_state(compact.to_internal_state()) == compact
+        assert len(compact.to_bytes()) == STATE_SIZE
+
+    @staticmethod
+    def test_lockstep_with_internal_state():
+        play_in_lockstep((Character.MEDIC, Character.DISPATCHER, Character.SCIENTIST), seed=1)
+        play_in_lockstep((Character.QUARANTINE_SPECIALIST, Character.OPERATIONS_EXPERT), seed=2)
+        play_in_lockstep(
+            (Character.CONTINGENCY_PLANNER, Character.RESEARCHER, Character.MEDIC, Character.SCIENTIST), seed=3
+        )
+
+    @staticmethod
+    def test_copies_are_independent():
+        simulation = create_simulation(True)
+        state = simulation.state.internal_state
+        for state_copy in (state.copy(), deepcopy(state), pickle.loads(pickle.dumps(state))):
+            assert state_copy == state
+            state_copy.cities[City.ATLANTA].remove_research_station()
+            state_copy.cubes[Virus.RED] = 0
+            state_copy.infection_deck.pop(0)
+            assert state.cities[City.ATLANTA].has_research_station()
+            assert state.cubes[Virus.RED] != 0
+            assert state_copy != state
+
+    @staticmethod
+    def test_views_write_through():
+        simulation = create_simulation(True)
+        state = simulation.state
+        state.cities[City.LIMA].viral_state[Virus.YELLOW] = 2
+        assert state.internal_state.cube_array[City.LIMA - 1, Virus.YELLOW - 1] == 2
+
+        player = state.players[Character.SCIENTIST]
+        player.clear_cards()
+        player.add_cards([City.LIMA, City.SANTIAGO, City.PARIS])
+        assert player.cards == {City.LIMA, City.SANTIAGO, City.PARIS}
+        assert player.city_colors == {Virus.YELLOW: 2, Virus.BLUE: 1}
+        assert player.num_cards() == 3
+        assert player.remove_card(City.LIMA)
+        assert player.cards == {City.SANTIAGO, City.PARIS}
+
+        top_cards = state.infection_deck[:3]
+        state.infection_deck[:3] = list(reversed(top_cards))
+        assert state.infection_deck[:3] == list(reversed(top_cards))
+        assert state.infection_deck.pop(0) == top_cards[2]
+
+    @staticmethod
+    def test_state_hash_of_transpositions():
+        simulation = create_simulation(True)
+        player = simulation.state.active_player
+        start = simulation.state.snapshot()
+        simulation.step(DriveFerry(player, City.WASHINGTON))
+        simulation.step(DriveFerry(player, City.MONTREAL))
+        via_washington = simulation.state.state_hash()
+
+        simulation.state.restore(start)
+        simulation.step(DriveFerry(player, City.CHICAGO))
+        assert simulation.state.state_hash() != via_washington
+        simulation.step(DriveFerry(player, City.MONTREAL))
+        assert simulation.state.state_hash() == via_washington
@@ -0,0 +1,114 @@
+import random
+import sys
+
+import numpy as np
+import pytest
+
+from pandemic.simulation.compact_state import (
+    CompactState,
+    decode,
+    encode,
+    snapshot_hash,
+    NUM_WORDS,
+    RECORD_HEADER,
+    STATE_SIZE,
+    STEPS,
+    W_ZOBRIST,
+)
+from pandemic.simulation.corpus import StateCorpus, write_corpus
+from pandemic.simulation.model.actions import Forecast
+from pandemic.simulation.model.city_id import EventCard
+from pandemic.simulation.model.enums import Character, GameState
+from pandemic.simulation.model.phases import Phase
+from pandemic.simulation.simulation import Simulation
+
+
+def create_simulation(compact_state: bool = False):
+    return Simulation(
+        characters={Character.MEDIC, Character.SCIENTIST},
+        player_deck_shuffle_seed=2,
+        infect_deck_shuffle_seed=4,
+        epidemic_shuffle_seed=6,
+        compact_state=compact_state,
+    )
+
+
+def forecast_state(compact_state: bool = False):
+    simulation = create_simulation(compact_state)
+    active_player = simulation.state.active_player
+    simulation.state.players[active_player].add_card(EventCard.FORECAST)
+    simulation.step(Forecast(player=active_player))
+    simulation.step(simulation.get_possible_actions()[0])
+    assert simulation.state.phase == Phase.CHOOSE_CARDS
+    return simulation
+
+
+class TestStateFormat:
+    @staticmethod
+    def test_records_are_little_endian(tmp_path, monkeypatch):
+        simulation = create_simulation(compact_state=True)
+        record = encode(simulation.state.internal_state)
+        words = np.frombuffer(record, np.dtype("<u8"), NUM_WORDS, RECORD_HEADER.size)
+        assert int(words[W_ZOBRIST]) == simulation.state.state_hash()
+        steps = np.frombuffer(record, np.dtype("<u4"), 1, RECORD_HEADER.size + STEPS)
+        assert int(steps[0]) == simulation.state.internal_state.steps
+
+        monkeypatch.setattr(sys, "byteorder", "big")
+        with pytest.raises(ValueError):
+            encode(simulation.state.internal_state)
+        with pytest.raises(ValueError):
+            decode(record)
+        with pytest.raises(ValueError):
+            write_corpus(str(tmp_path / "states.corpus"), [record[RECORD_HEADER.size :]])
+
+    @staticmethod
+    def test_record_round_trip_with_choose_cards_phase():
+        simulation = forecast_state()
+        record = encode(simulation.state.internal_state)
+        assert len(record) == RECORD_HEADER.size + STATE_SIZE
+        assert decode(record).to_internal_state() == simulation.state.internal_state
+
+        # the forecast finishes the same way from the decoded state
+        compact = forecast_state(compact_state=True)
+        compact.state.restore(decode(record).to_bytes())
+        while simulation.state.phase == Phase.CHOOSE_CARDS:
+            action = simulation.get_possible_actions()[0]
+            simulation.step(action)
+            compact.step(action)
+        assert compact.state.internal_state == CompactState.from_internal_state(simulation.state.internal_state)
+
+    @staticmethod
+    def test_rejects_other_versions():
+        record = bytearray(encode(create_simulation().state.internal_state))
+        record[4] += 1
+        with pytest.raises(ValueError):
+            decode(bytes(record))
+
+
+class TestStateCorpus:
+    @staticmethod
+    def test_random_access(tmp_path):
+        simulation = create_simulation(compact_state=True)
+        rand = random.Random(1)
+        snapshots = []
+        while simulation.state.game_state == GameState.RUNNING:
+            snapshots.append(simulation.state.snapshot())
+            actions = simulation.get_possible_actions()
+            simulation.step(rand.choice(actions) if actions else None)
+
+        path = str(tmp_path / "positions.corpus")
+        assert write_corpus(path, snapshots) == len(snapshots)
+        corpus = StateCorpus(path)
+        assert len(corpus) == len(snapshots)
+        for index in (0, len(snapshots) // 2, len(snapshots) - 1):
+            assert bytes(corpus[index]) == snapshots[index]
+            assert snapshot_hash(corpus[index]) == snapshot_hash(snapshots[index])
+            simulation.state.restore(corpus[index])
+            assert simulation.state.snapshot() == snapshots[index]
+        assert corpus.state(1).to_internal_state() == CompactState(snapshots[1]).to_internal_state()
+
+    @staticmethod
+    def test_empty_corpus(tmp_path):
+        path = str(tmp_path / "empty.corpus")
+        assert write_corpus(path, []) == 0
+        assert len(StateCorpus(path)) == 0
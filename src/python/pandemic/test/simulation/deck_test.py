@@ -0,0 +1,59 @@
+import pickle
+import random
+from copy import deepcopy
+
+from pandemic.simulation.compact_state import CompactState
+from pandemic.simulation.model.deck import Deck
+from pandemic.simulation.model.enums import Character
+from pandemic.simulation.simulation import Simulation
+
+
+def decks():
+    compact = CompactState.from_internal_state(Simulation(characters={Character.MEDIC}).state.internal_state)
+    compact.infection_deck = list(range(1, 11))
+    return Deck(range(1, 11)), compact.infection_deck
+
+
+class TestDeck:
+    @staticmethod
+    def test_draw_from_top_and_bottom():
+        for deck in decks():
+            assert deck.draw() == 1
+            assert deck.draw_bottom() == 10
+            assert deck.pop(0) == 2
+            assert list(deck) == list(range(3, 10))
+            assert deck[0] == 3 and deck[-1] == 9 and deck[:2] == [3, 4]
+
+    @staticmethod
+    def test_put_on_top_and_reorder():
+        for deck in decks():
+            deck.draw()
+            deck.draw()
+            deck.put_on_top([21, 22, 23])
+            assert deck[:4] == [21, 22, 23, 3]
+            deck.reorder_top([23, 21, 22])
+            assert deck[:4] == [23, 21, 22, 3]
+            deck.insert(0, 24)
+            assert deck.draw() == 24
+            assert len(deck) == 11
+
+    @staticmethod
+    def test_intensify_shuffles_like_a_list():
+        discard_pile = [31, 32, 33, 34, 35]
+        expected = discard_pile.copy()
+        random.Random(4).shuffle(expected)
+
+        for deck in decks():
+            pile = discard_pile.copy()
+            deck.intensify(pile, random.Random(4))
+            assert pile == []
+            assert deck == expected + list(range(1, 11))
+
+    @staticmethod
+    def test_copies_are_independent():
+        deck = Deck(range(5))
+        deck.draw()
+        for copy in (deck.copy(), deepcopy(deck), pickle.loads(pickle.dumps(deck))):
+            assert copy == deck == [1, 2, 3, 4]
+            copy.draw()
+            assert len(deck) == 4
@@ -169,6 +169,46 @@ class TestGeneral:
         assert simulation.state.cities[City.ATLANTA].viral_state[Virus.BLUE] == 3
         assert simulation.state.outbreaks > before
 
+    @staticmethod
+    def test_outbreak_chain():
+        simulation = create_less_random_simulation(start_player=Character.QUARANTINE_SPECIALIST)
+        state = simulation.state
+        for city in state.cities.values():
+            city.viral_state[Virus.BLUE] = 0
+        state.cubes[Virus.BLUE] = 18
+        state.players[Character.QUARANTINE_SPECIALIST].city = City.CHICAGO
+        state.cities[City.WASHINGTON].viral_state[Virus.BLUE] = 3
+        state.cities[City.NEW_YORK].viral_state[Virus.BLUE] = 3
+
+        assert state.infect_city(City.WASHINGTON)
+        assert state.outbreaks == 2
+        infected = {city: city_state.viral_state[Virus.BLUE] for city, city_state in state.cities.items()}
+        assert {city for city, cubes in infected.items() if cubes} == {
+            City.WASHINGTON,
+            City.NEW_YORK,
+            City.MIAMI,
+            City.LONDON,
+            City.MADRID,
+        }
+        # atlanta and montreal are protected by the quarantine specialist in chicago
+        assert infected[City.MIAMI] == 1
+        assert state.cubes[Virus.BLUE] == 15
+
+    @staticmethod
+    def test_outbreak_chain_stops_at_eighth_outbreak():
+        simulation = create_less_random_simulation(start_player=Character.RESEARCHER)
+        state = simulation.state
+        state.outbreaks = 6
+        state.cities[City.WASHINGTON].viral_state[Virus.BLUE] = 3
+        state.cities[City.NEW_YORK].viral_state[Virus.BLUE] = 3
+        state.cities[City.ATLANTA].viral_state[Virus.BLUE] = 3
+
+        assert state.infect_city(City.WASHINGTON)
+        # washington and one of atlanta or new york break out, the chain ends with the lost game and the
+        # other one is not counted as a ninth outbreak, which the recursive chain used to do
+        assert state.outbreaks == 8
+        assert state.game_state == GameState.LOST
+
     @staticmethod
     def test_one_card_too_many():
         simulation = create_less_random_simulation(start_player=Character.RESEARCHER)
@@ -360,6 +400,22 @@ class TestGeneral:
 
         TestGeneral.walk_trough_round(simulation)
 
+    @staticmethod
+    def test_snapshot_restore():
+        for compact_state in (False, True):
+            simulation = Simulation(compact_state=compact_state)
+
+            snapshot = simulation.state.snapshot()
+            assert isinstance(snapshot, bytes)
+
+            TestGeneral.walk_trough_round(simulation)
+            assert simulation.state.snapshot() != snapshot
+
+            simulation.state.restore(snapshot)
+            assert simulation.state.snapshot() == snapshot
+
+            TestGeneral.walk_trough_round(simulation)
+
     @staticmethod
     def test_deterministic_simulation():
         simulation = Simulation(
@@ -408,7 +464,7 @@ class TestGeneral:
 
     @staticmethod
     def test_dissect_state_copy():
-        simulation = Simulation()
+        simulation = Simulation(compact_state=False)
 
         state = simulation.state.internal_state
         state_copy = deepcopy(simulation.state.internal_state)
@@ -0,0 +1,115 @@
+import random
+from collections import Counter
+
+import pytest
+
+from pandemic.simulation.hooks import (
+    Hooks,
+    ACTION,
+    CARD_DRAW,
+    CURE,
+    EPIDEMIC,
+    GAME_END,
+    INFECTION,
+    OUTBREAK,
+    log_events,
+)
+from pandemic.simulation.model.actions import DiscoverCure
+from pandemic.simulation.model.city_id import City, Card
+from pandemic.simulation.model.constants import CITY_COLORS
+from pandemic.simulation.model.enums import Character, GameState, Virus
+from pandemic.simulation.model.phases import Phase
+from pandemic.simulation.simulation import Simulation
+
+
+def create_simulation():
+    return Simulation(
+        characters={Character.SCIENTIST, Character.RESEARCHER},
+        player_deck_shuffle_seed=3,
+        infect_deck_shuffle_seed=4,
+        epidemic_shuffle_seed=5,
+        compact_state=True,
+    )
+
+
+def play(simulation: Simulation, seed: int):
+    rand = random.Random(seed)
+    while simulation.state.game_state == GameState.RUNNING:
+        actions = simulation.get_possible_actions()
+        simulation.step(rand.choice(actions) if actions else None)
+
+
+class TestHooks:
+    @staticmethod
+    def test_no_hooks_without_listeners():
+        simulation = create_simulation()
+        assert simulation.state.hooks is None
+        listener = Counter().update
+        simulation.add_listener(OUTBREAK, listener)
+        assert simulation.state.hooks
+        simulation.remove_listener(OUTBREAK, listener)
+        assert simulation.state.hooks is None
+        with pytest.raises(ValueError):
+            Hooks().add("unknown", listener)
+
+    @staticmethod
+    def test_game_events():
+        simulation = create_simulation()
+        events = []
+        for event in (INFECTION, OUTBREAK, EPIDEMIC, CARD_DRAW, GAME_END, ACTION):
+            simulation.add_listener(event, lambda *args, name=event: events.append((name, args)))
+        play(simulation, seed=1)
+        state = simulation.state
+
+        counts = Counter(name for name, _ in events)
+        assert counts[OUTBREAK] == state.outbreaks
+        assert counts[EPIDEMIC] == state.infection_rate_marker
+        assert counts[ACTION] == state.internal_state.steps
+        assert events[-1] == (GAME_END, (GameState.LOST,))
+        epidemics = [args[0] for name, args in events if name == EPIDEMIC]
+        assert all(city in state.infection_discard_pile for city in epidemics)
+        drawn = [args[0] for name, args in events if name == CARD_DRAW]
+        assert sum(Card.card_type(card) == Card.EPIDEMIC for card in drawn) == counts[EPIDEMIC]
+        assert (INFECTION, (epidemics[0], CITY_COLORS[epidemics[0]], 3)) in events
+
+    @staticmethod
+    def test_game_end_is_emitted_once():
+        simulation = create_simulation()
+        ends = []
+        simulation.add_listener(GAME_END, ends.append)
+        state = simulation.state
+        state.game_state = GameState.RUNNING
+        state.game_state = GameState.LOST
+        state.game_state = GameState.LOST
+        state.game_state = GameState.WIN
+        assert ends == [GameState.LOST]
+        state.game_state = GameState.RUNNING
+        state.game_state = GameState.WIN
+        assert ends == [GameState.LOST, GameState.WIN]
+
+    @staticmethod
+    def test_cure_event():
+        simulation = create_simulation()
+        state = simulation.state
+        cured = []
+        simulation.add_listener(CURE, cured.append)
+        player = state.players[state.active_player]
+        player.city = City.ATLANTA
+        player.clear_cards()
+        player.add_cards([City.ATLANTA, City.CHICAGO, City.ESSEN, City.LONDON, City.MADRID])
+        simulation.step(DiscoverCure(Virus.BLUE))
+        while state.phase in (Phase.CURE_VIRUS, Phase.CHOOSE_CARDS):
+            simulation.step(simulation.get_possible_actions()[0])
+        assert cured == [Virus.BLUE]
+        assert state.cures[Virus.BLUE]
+
+    @staticmethod
+    def test_log_events():
+        simulation = create_simulation()
+        lines = []
+        listeners = log_events(simulation, lines.append, events=(ACTION, GAME_END))
+        play(simulation, seed=2)
+        assert lines[0].startswith(ACTION) and lines[-1] == f"{GAME_END} {GameState.LOST}"
+        for event, listener in zip((ACTION, GAME_END), listeners):
+            simulation.remove_listener(event, listener)
+        assert simulation.state.hooks is None
@@ -0,0 +1,48 @@
+from pandemic.simulation.model.enums import Character
+from pandemic.simulation.simulation import Simulation
+
+
+def create_simulations(characters, num_epidemic_cards, seeds, compact_state):
+    return [
+        Simulation(
+            num_epidemic_cards,
+            characters=characters,
+            player_deck_shuffle_seed=seeds[0],
+            infect_deck_shuffle_seed=seeds[1],
+            epidemic_shuffle_seed=seeds[2],
+            compact_state=compact_state,
+            fast_reset=fast_reset,
+        )
+        for fast_reset in (False, True)
+    ]
+
+
+class TestResetTemplate:
+    @staticmethod
+    def test_fast_reset_equals_setup():
+        for characters, num_epidemic_cards in (
+            ((Character.MEDIC, Character.QUARANTINE_SPECIALIST), 4),
+            ((Character.SCIENTIST, Character.RESEARCHER, Character.DISPATCHER), 5),
+            ((Character.QUARANTINE_SPECIALIST, Character.OPERATIONS_EXPERT, Character.MEDIC, Character.SCIENTIST), 6),
+        ):
+            for compact_state in (False, True):
+                for seeds in ((1, 2, 3), (None, None, None)):
+                    simulation, fast = create_simulations(characters, num_epidemic_cards, seeds, compact_state)
+                    fast.state.random.setstate(simulation.state.random.getstate())
+                    for _ in range(3):
+                        simulation.reset()
+                        fast.reset()
+                        assert fast.state.internal_state == simulation.state.internal_state
+                        assert fast.state.state_hash() == simulation.state.state_hash()
+                        assert fast.state.random.getstate() == simulation.state.random.getstate()
+
+    @staticmethod
+    def test_fast_reset_of_played_game():
+        simulation, fast = create_simulations({Character.MEDIC, Character.RESEARCHER}, 5, (5, 10, 12), True)
+        first = fast.state.snapshot()
+        for _ in range(30):
+            actions = fast.get_possible_actions()
+            fast.step(actions[0] if actions else None)
+        fast.reset()
+        assert fast.state.snapshot() == first == simulation.state.snapshot()
+        assert fast.get_possible_actions() == simulation.get_possible_actions()
@@ -0,0 +1,107 @@
+import random
+
+import pytest
+
+from pandemic.simulation import compact_state
+from pandemic.simulation.compact_state import CompactState, zobrist_hash
+from pandemic.simulation.model.actions import DiscoverCure, ChooseCard
+from pandemic.simulation.model.city_id import City
+from pandemic.simulation.model.enums import Character, GameState, Virus
+from pandemic.simulation.model.phases import Phase
+from pandemic.simulation.simulation import Simulation
+from pandemic.test.utils import create_less_random_simulation
+
+
+def create_simulation(compact_state: bool = True) -> Simulation:
+    return Simulation(
+        characters={Character.CONTINGENCY_PLANNER, Character.MEDIC, Character.QUARANTINE_SPECIALIST},
+        player_deck_shuffle_seed=4,
+        infect_deck_shuffle_seed=8,
+        epidemic_shuffle_seed=15,
+        compact_state=compact_state,
+    )
+
+
+def play_and_undo(simulation: Simulation, seed: int, max_steps: int = 300):
+    rand = random.Random(seed)
+    snapshots = []
+    for _ in range(max_steps):
+        if simulation.state.game_state != GameState.RUNNING:
+            break
+        actions = simulation.get_possible_actions()
+        snapshots.append(simulation.state.snapshot())
+        simulation.step(rand.choice(actions) if actions else None, record_undo=True)
+
+    while snapshots:
+        simulation.undo()
+        assert simulation.state.snapshot() == snapshots.pop()
+        assert simulation.state.state_hash() == zobrist_hash(simulation.state.snapshot())
+
+
+class TestUndo:
+    @staticmethod
+    def test_undo_whole_game():
+        for seed in range(3):
+            simulation = create_simulation()
+            start = simulation.state.snapshot()
+            play_and_undo(simulation, seed)
+            assert simulation.state.snapshot() == start
+
+    @staticmethod
+    def test_undo_restores_hash_without_rehashing(monkeypatch):
+        simulation = create_simulation()
+        start = simulation.state.snapshot()
+        start_hash = simulation.state.state_hash()
+        rand = random.Random(3)
+        for _ in range(20):
+            actions = simulation.get_possible_actions()
+            simulation.step(rand.choice(actions) if actions else None, record_undo=True)
+
+        def rehash(_):
+            raise AssertionError("undo recomputed the zobrist hash")
+
+        monkeypatch.setattr(compact_state, "zobrist_hash", rehash)
+        for _ in range(20):
+            simulation.undo()
+        assert simulation.state.snapshot() == start
+        assert simulation.state.state_hash() == start_hash
+
+    @staticmethod
+    def test_undo_replays_identically():
+        simulation = create_simulation()
+        simulation.state.phase = Phase.EPIDEMIC
+        simulation.step(None, record_undo=True)
+        after_epidemic = simulation.state.snapshot()
+        simulation.undo()
+        simulation.step(None)
+        assert simulation.state.snapshot() == after_epidemic
+
+    @staticmethod
+    def test_object_backend_has_no_undo():
+        simulation = create_simulation(compact_state=False)
+        before = simulation.state.snapshot()
+        with pytest.raises(ValueError):
+            simulation.step(None, record_undo=True)
+        assert simulation.state.snapshot() == before
+
+    @staticmethod
+    def test_undo_cure_with_choose_cards_phase():
+        simulation = create_less_random_simulation(start_player=Character.RESEARCHER)
+        simulation.state.internal_state = CompactState.from_internal_state(simulation.state.internal_state)
+        cure_cards = [City.BANGKOK, City.HO_CHI_MINH_CITY, City.BEIJING, City.MANILA, City.HONG_KONG]
+        simulation.state.players[Character.RESEARCHER].cards = set(cure_cards)
+        before = simulation.state.snapshot()
+
+        simulation.step(DiscoverCure(target_virus=Virus.RED), record_undo=True)
+        assert len(simulation.get_possible_actions()) == len(cure_cards)
+        simulation.step(ChooseCard(Character.RESEARCHER, City.BANGKOK), record_undo=True)
+        simulation.step(ChooseCard(Character.RESEARCHER, City.MANILA), record_undo=True)
+        assert simulation.state.phase == Phase.CHOOSE_CARDS
+        assert simulation.state.phase_state.chosen_cards == [City.BANGKOK, City.MANILA]
+
+        simulation.undo()
+        assert simulation.state.phase_state.chosen_cards == [City.BANGKOK]
+        assert City.MANILA in simulation.state.phase_state.cards_to_choose_from
+        simulation.undo()
+        simulation.undo()
+        assert simulation.state.snapshot() == before
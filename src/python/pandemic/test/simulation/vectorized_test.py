@@ -0,0 +1,177 @@
+import numpy as np
+
+from pandemic.simulation.model.city_id import Card, City
+from pandemic.simulation.model.constants import COUNT_CUBES
+from pandemic.simulation.model.enums import Character, GameState, Virus
+from pandemic.simulation.model.phases import Phase
+from pandemic.simulation.simulation import Simulation
+from pandemic.simulation.vectorized import (
+    VectorizedSimulation,
+    CITY_VIRUS,
+    DISCARD_CARD,
+    DRIVE_FERRY,
+    EPIDEMIC,
+    HAND_LIMIT,
+    PASS,
+)
+
+
+def board_cubes(simulation: Simulation) -> np.ndarray:
+    return np.array(
+        [[simulation.state.cities[city].viral_state[virus] for virus in range(1, 5)] for city in range(1, 49)]
+    )
+
+
+def create_reference() -> Simulation:
+    return Simulation(
+        characters={Character.RESEARCHER, Character.SCIENTIST},
+        player_deck_shuffle_seed=1,
+        infect_deck_shuffle_seed=2,
+        epidemic_shuffle_seed=3,
+    )
+
+
+def mirror(reference: Simulation) -> VectorizedSimulation:
+    """a single game in the state of reference"""
+    state = reference.state
+    simulation = VectorizedSimulation(1, seed=1)
+    simulation.cubes[0] = board_cubes(reference)
+    simulation.supply[0] = [state.cubes[virus] for virus in range(1, 5)]
+    simulation.outbreaks[0] = state.outbreaks
+    simulation.infection_rate_marker[0] = state.infection_rate_marker
+    simulation.infection_keys[0, [city - 1 for city in state.infection_deck]] = np.arange(len(state.infection_deck))
+    simulation.infection_discarded[0] = False
+    simulation.infection_discarded[0, [city - 1 for city in state.infection_discard_pile]] = True
+    deck = [EPIDEMIC if Card.card_type(card) == Card.EPIDEMIC else card for card in state.player_deck]
+    simulation.player_deck_top[0] = simulation.player_deck.shape[1] - len(deck)
+    simulation.player_deck[0, simulation.player_deck_top[0] :] = deck
+    simulation.hands[0] = False
+    for index, player in enumerate(state.players.values()):
+        simulation.hands[0, index, list(player.cards)] = True
+    simulation.active_player[0] = list(state.players).index(state.active_player)
+    return simulation
+
+
+def infection_deck(simulation: VectorizedSimulation) -> list:
+    """top card first, as city ids"""
+    keys = simulation.infection_keys[0]
+    deck = [city for city in np.argsort(keys, kind="stable") if not simulation.infection_discarded[0, city]]
+    return [int(city) + 1 for city in deck]
+
+
+def assert_board_equal(simulation: VectorizedSimulation, reference: Simulation):
+    state = reference.state
+    assert (simulation.cubes[0] == board_cubes(reference)).all()
+    assert simulation.supply[0].tolist() == [state.cubes[virus] for virus in range(1, 5)]
+    assert simulation.outbreaks[0] == state.outbreaks
+    assert simulation.infection_rate_marker[0] == state.infection_rate_marker
+    discarded = np.flatnonzero(simulation.infection_discarded[0]) + 1
+    assert sorted(discarded.tolist()) == sorted(state.infection_discard_pile)
+
+
+class TestVectorizedSimulation:
+    @staticmethod
+    def test_random_games_keep_invariants():
+        simulation = VectorizedSimulation(64, player_count=3, seed=5)
+        assert (simulation.cubes.sum(axis=(1, 2)) == 18).all()
+        while (simulation.game_state == GameState.RUNNING).any():
+            running = simulation.game_state == GameState.RUNNING
+            mask = simulation.legal_action_mask()
+            assert mask.any(axis=1).all()
+            actions = simulation.sample_random_actions(mask)
+            assert mask[np.arange(len(actions)), actions].all()
+            simulation.step(actions)
+            still_running = simulation.game_state == GameState.RUNNING
+            assert (simulation.cubes[still_running].sum(axis=1) + simulation.supply[still_running] == COUNT_CUBES).all()
+            assert (simulation.cubes <= 3).all()
+            # only a player who just drew may be over the hand limit
+            assert (simulation.hands[running].sum(axis=2) <= HAND_LIMIT + 2).all()
+        assert (simulation.steps > 0).all()
+
+    @staticmethod
+    def test_hand_limit_forces_discard():
+        simulation = VectorizedSimulation(1, seed=3)
+        simulation.hands[0, 1, 1:10] = True
+        mask = simulation.legal_action_mask()[0]
+        assert not mask[PASS]
+        assert mask[DISCARD_CARD:].sum() == simulation.hands[0, 1].sum()
+        simulation.step([PASS])
+        assert simulation.actions_left[0] == 4 and simulation.steps[0] == 0
+        simulation.step([DISCARD_CARD + 2])
+        assert not simulation.hands[0, 1, 2]
+        assert simulation.actions_left[0] == 4
+
+    @staticmethod
+    def test_outbreak_chain_matches_state():
+        reference = Simulation(characters={Character.RESEARCHER, Character.SCIENTIST})
+        simulation = VectorizedSimulation(1, seed=1)
+        simulation.cubes[:] = 0
+        simulation.supply[:] = COUNT_CUBES
+        for city in reference.state.cities.values():
+            city.viral_state = {virus: 0 for virus in city.viral_state}
+        reference.state.cubes = {virus: COUNT_CUBES for virus in reference.state.cubes}
+        reference.state.outbreaks = 0
+
+        for city in (City.ATLANTA, City.WASHINGTON, City.MONTREAL):
+            reference.state.cities[city].viral_state[Virus.BLUE] = 3
+            simulation.cubes[0, city - 1, Virus.BLUE - 1] = 3
+        reference.state.cubes[Virus.BLUE] -= 9
+        simulation.supply[0, Virus.BLUE - 1] -= 9
+
+        reference.state.infect_city(City.ATLANTA)
+        simulation._infect(np.array([0]), np.array([City.ATLANTA - 1]), CITY_VIRUS[[City.ATLANTA - 1]], 1)
+        assert simulation.outbreaks[0] == reference.state.outbreaks == 3
+        assert (simulation.cubes[0] == board_cubes(reference)).all()
+        assert simulation.supply[0, Virus.BLUE - 1] == reference.state.cubes[Virus.BLUE]
+
+    @staticmethod
+    def test_pass_is_only_legal_in_finished_games():
+        simulation = VectorizedSimulation(2, seed=2)
+        simulation.game_state[1] = GameState.LOST
+        mask = simulation.legal_action_mask()
+        assert not mask[0, PASS] and mask[0, DRIVE_FERRY:].any()
+        assert mask[1, PASS] and mask[1].sum() == 1
+        simulation.step([PASS, PASS])
+        assert simulation.actions_left[0] == 4 and (simulation.steps == 0).all()
+
+    @staticmethod
+    def test_epidemic_matches_state():
+        reference = create_reference()
+        simulation = mirror(reference)
+        deck, discard_pile = list(reference.state.infection_deck), list(reference.state.infection_discard_pile)
+        assert infection_deck(simulation) == deck and discard_pile
+
+        reference.state._epidemic_1st_part()
+        reference.state.epidemic_2nd_part()
+        simulation._epidemic(np.array([0]))
+        assert_board_equal(simulation, reference)
+        assert not reference.state.infection_discard_pile and reference.state.infection_rate_marker == 1
+        # the discard pile and the bottom card are shuffled on top, in an order of either random
+        shuffled = len(discard_pile) + 1
+        vectorized_deck = infection_deck(simulation)
+        assert vectorized_deck[shuffled:] == list(reference.state.infection_deck)[shuffled:] == deck[:-1]
+        assert sorted(vectorized_deck[:shuffled]) == sorted(discard_pile + deck[-1:])
+        assert sorted(list(reference.state.infection_deck)[:shuffled]) == sorted(vectorized_deck[:shuffled])
+
+    @staticmethod
+    def test_end_of_turn_matches_state():
+        reference = create_reference()
+        state = reference.state
+        drawn = list(state.player_deck)[:2]
+        assert all(Card.card_type(card) != Card.EPIDEMIC for card in drawn)
+        discarded = len(state.infection_discard_pile)
+        simulation = mirror(reference)
+        player = int(simulation.active_player[0])
+
+        state.phase = Phase.DRAW_CARDS
+        while state.phase != Phase.ACTIONS:
+            reference.step(None)
+        simulation._end_turn(np.array([0]))
+
+        assert_board_equal(simulation, reference)
+        assert len(state.infection_discard_pile) == discarded + 2
+        assert infection_deck(simulation) == list(state.infection_deck)
+        hand = state.players[list(state.players)[player]].cards
+        assert np.flatnonzero(simulation.hands[0, player]).tolist() == sorted(hand) and set(drawn) <= hand
+        assert simulation.active_player[0] == list(state.players).index(state.active_player) == 1 - player
+        assert simulation.actions_left[0] == 4 and simulation.game_state[0] == state.game_state